@@ -21,8 +21,9 @@ parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
 import PhaseIdentifier as pi
-import x86Tracer.backTracer.instruction_restructor as ir
+import TraceReader as TR
 import FunctionLists as FL
+import InstructionParser as IP
 
 # Assembly instructions for moving opcode.
 MOVXX = [
@@ -36,7 +37,7 @@ def bytecode_identifier(lines: list, bytecode_dict: dict, phase_scope: dict):
     version 8.2.
 
     args:
-        lines (list): lines of raw ascii traces.
+        lines (TraceSource or list): lines of raw ascii traces.
         bytecode_dict (dict): dictionary of opcode-to-bytecode.
         phase_scope (dict): phase name-to-scope dictionary.
 
@@ -51,46 +52,66 @@ def bytecode_identifier(lines: list, bytecode_dict: dict, phase_scope: dict):
     ), f"ERROR: Failed to find GraphBuilderPhase in phase_scope. phase_scope: {phase_scope}"
     GraphBuilderPhase_Scope = phase_scope["GraphBuilderPhase"]
 
-    # Found and collected bytecode info. stored in this dictionary.
-    bytecode_info = {}
-    #base_counter = {}
-
-    is_return = False
+    scanner = BytecodeScanner(bytecode_dict)
     line_number = GraphBuilderPhase_Scope[0]
-    for i in range(GraphBuilderPhase_Scope[0], GraphBuilderPhase_Scope[1]):
-        line = lines[i]
-        re_inst = ir.instruction_splitter(line)
+    for line in TR.get_lines(lines, GraphBuilderPhase_Scope[0], GraphBuilderPhase_Scope[1]):
+        re_inst = IP.instruction_splitter(line)
+        if not scanner.scan(re_inst):
+            break
+        line_number += 1
+    #bytecode_info = bytecode_info_verifier(bytecode_info, base_counter)
+
+    return scanner.bytecode_info, line_number
+
+class BytecodeScanner:
+    """State of the bytecode identification over the lines of the
+    GraphBuilderPhase scanned so far. Only the lines of the functions
+    reading the bytecode array (IP.BYTECODE_ACCESS) change the state.
+    """
+    def __init__(self, bytecode_dict: dict):
+        # The opcodes are read from the trace as integers.
+        self.bytecode_dict = {IP.hex_value(opcode): name for opcode, name in bytecode_dict.items()}
+        # Found and collected bytecode info. stored in this dictionary.
+        self.bytecode_info = {}
+        #base_counter = {}
+        self.is_return = False
+
+    def scan(self, re_inst: list):
+        """This function scans a single restructured instruction.
+
+        args:
+            re_inst (list): restructured instruction.
+
+        returns:
+            (bool) False, if the bytecodes of the target function
+            are all identified, so the scan must stop.
+        """
+
+        bytecode_dict = self.bytecode_dict
 
         # If function name is "OnHeadpBytecodeArray::get",
         # assembly operation is "mov", and destination register
         # is accumulator (al - RAX),
-        if (
-                re_inst[2] == FL.VERSION_GET
-                or re_inst[2] == FL.VERSION_BYTECODESIZE
-                or FL.VERSION_READFIELD in re_inst[2]
-        ):
+        if re_inst.category & IP.BYTECODE_ACCESS:
             # then check if MR operation exists and return, if it does.
             address, value = get_mr_info(re_inst[5:])
-            
+
             # If address and value exists and value is an opcode,
-            if address and (value in bytecode_dict):
-                if is_return and bytecode_dict[value] != "Return":
-                    break
+            if address is not None and (value in bytecode_dict):
+                if self.is_return and bytecode_dict[value] != "Return":
+                    return False
 
                 if bytecode_dict[value] == "Return":
-                    is_return = True
-                
+                    self.is_return = True
+
                 # then add to bytecode_info dict.
-                bytecode_info[address] = [value, bytecode_dict[value]]
+                self.bytecode_info[address] = [value, bytecode_dict[value]]
                 #if address[0] not in base_counter:
                 #    base_counter[address[0]] = 1
                 #else:
                 #    base_counter[address[0]] += 1
 
-        line_number += 1
-    #bytecode_info = bytecode_info_verifier(bytecode_info, base_counter)
-
-    return bytecode_info, line_number
+        return True
 
 def bytecode_info_verifier(bytecode_info: dict, base_counter: dict):
     """This function scans through the collected bytecode
@@ -131,8 +152,8 @@ def get_mr_info(mem_reg_accesses: list):
         operations.
 
     returns:
-        (str) memory address.
-        (str) stored value.
+        (int) memory address.
+        (int) stored value.
     """
 
     address = None
@@ -193,7 +214,7 @@ def read_file(filename: str) -> list:
     """
 
     try:
-        with open(filename) as f:
+        with TR.open_file(filename) as f:
             return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
@@ -0,0 +1,352 @@
+"""
+    This program holds the graph data of graph_former as arrays.
+
+    The graph data of graph_former are eleven dictionaries keyed by the
+    node addresses (the views of EventLog). CSRGraph gives each node a
+    dense integer id instead, in the order of node_and_inputs, and keeps
+    the per-node data as parallel NumPy arrays indexed by the node id:
+    the opcode, phase, phase id, generation line, and the phase where the
+    node was killed or its usage was removed. The input nodes, the
+    appended and replaced inputs, and the nodes of each phase are stored
+    as CSR arrays (offsets and indices), so the inputs of node i are
+    indices[offsets[i]:offsets[i+1]].
+
+    Addresses are stored once in an address table of 64-bit integers,
+    where the first ids are the nodes and the rest are the addresses
+    that are only referred to, e.g., the opcode addresses. The phase
+    names are stored once in their own table. A missing value is NONE.
+
+    The graph is converted from and back to the dictionaries without
+    loss, and it takes an order of magnitude less memory than them.
+    The addresses and opcodes of the dictionaries are integers, as
+    parsed by InstructionParser. The graphs of the earlier runs hold
+    them as hex strings, and they are converted to integers.
+
+    Example,
+        $python3 CSRGraph.py -f <Graphs_*.pkl>
+"""
+
+import os, sys
+import pickle
+import argparse
+import numpy as np
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+# Id or index of a missing value.
+NONE = -1
+
+class CSRGraph:
+    """Array-backed graph of graph_former with dense integer node ids."""
+    def __init__(self, graph: tuple):
+        """
+        args:
+            graph (tuple): graph data dictionaries (GraphFormer.result).
+        """
+
+        (
+            node_and_inputs, append_input_phase, replace_input_phase,
+            killed_nodes, removed_usage_nodes, phase_to_nodes, node_to_phase,
+            NodeToOpcode, node_gen_line, id_to_phase, node_to_phase_id
+        ) = graph
+
+        self.n_nodes = len(node_and_inputs)
+        # Address-to-id. The nodes are added first, so the id of a node is
+        # the same as its address id.
+        ids = {int_value(address): i for i, address in enumerate(node_and_inputs)}
+        # Phase name-to-index.
+        phases = {}
+
+        def address_id(address):
+            if address is None:
+                return NONE
+            address = int_value(address)
+            if address not in ids:
+                ids[address] = len(ids)
+            return ids[address]
+
+        def node_id(address):
+            address = int_value(address)
+            assert (
+                    ids.get(address, self.n_nodes) < self.n_nodes
+            ), f"ERROR: Address {address:x} is not a node of the graph."
+            return ids[address]
+
+        def index(table, name):
+            if name not in table:
+                table[name] = len(table)
+            return table[name]
+
+        def node_array(values: dict, convert):
+            array = np.full(self.n_nodes, NONE, dtype=np.int64)
+            for address, value in values.items():
+                array[node_id(address)] = convert(value)
+            return narrow(array)
+
+        def node_rows(values: dict):
+            rows = [()] * self.n_nodes
+            for address, value in values.items():
+                rows[node_id(address)] = value
+            return rows
+
+        # Input nodes of each node.
+        rows = list(node_and_inputs.values())
+        self.input_offsets = offsets(rows)
+        self.input_indices = narrow(
+                [address_id(address) for inputs in rows for address in inputs]
+        )
+
+        # Parallel arrays of the node data.
+        self.node_phase = node_array(node_to_phase, lambda phase: index(phases, phase))
+        self.node_phase_id = node_array(node_to_phase_id, int)
+        self.gen_line = node_array(node_gen_line, int)
+        self.opcode = node_array(NodeToOpcode, lambda value: int_value(value[0]))
+        self.opcode_address = node_array(NodeToOpcode, lambda value: address_id(value[1]))
+        self.killed_phase = node_array(killed_nodes, lambda value: index(phases, value[0]))
+        self.killed_phase_id = node_array(killed_nodes, lambda value: value[1])
+        self.removed_phase = node_array(removed_usage_nodes, lambda value: index(phases, value[0]))
+        self.removed_phase_id = node_array(removed_usage_nodes, lambda value: value[1])
+
+        # Appended inputs of each node, [phase, input, phase id].
+        rows = node_rows(append_input_phase)
+        self.append_offsets = offsets(rows)
+        entries = [entry for row in rows for entry in row]
+        self.append_phase = narrow([index(phases, entry[0]) for entry in entries])
+        self.append_input = narrow([address_id(entry[1]) for entry in entries])
+        self.append_phase_id = narrow([entry[2] for entry in entries])
+
+        # Replaced inputs of each node, [phase, from input, to input, phase id].
+        rows = node_rows(replace_input_phase)
+        self.replace_offsets = offsets(rows)
+        entries = [entry for row in rows for entry in row]
+        self.replace_phase = narrow([index(phases, entry[0]) for entry in entries])
+        self.replace_from = narrow([address_id(entry[1]) for entry in entries])
+        self.replace_to = narrow([address_id(entry[2]) for entry in entries])
+        self.replace_phase_id = narrow([entry[3] for entry in entries])
+
+        # Nodes of each phase, in the order of phase_to_nodes. A node may
+        # be listed more than once.
+        self.phase_order = narrow([index(phases, phase) for phase in phase_to_nodes])
+        rows = list(phase_to_nodes.values())
+        self.phase_offsets = offsets(rows)
+        self.phase_indices = narrow(
+                [address_id(address) for nodes in rows for address in nodes]
+        )
+
+        # Phase of each phase id.
+        self.phase_ids = narrow(list(id_to_phase))
+        self.phase_id_phase = narrow(
+                [index(phases, phase) for phase in id_to_phase.values()]
+        )
+
+        self.addresses = np.array(list(ids), dtype=np.uint64)
+        self.phases = list(phases)
+
+    def __len__(self):
+        return self.n_nodes
+
+    def address(self, i: int):
+        """This function returns the address of the id.
+
+        args:
+            i (int): address id.
+
+        returns:
+            (int) address.
+            (None) if the id is NONE.
+        """
+
+        if i == NONE:
+            return None
+        return int(self.addresses[i])
+
+    def inputs(self, i: int):
+        """This function returns the address ids of the input nodes.
+
+        args:
+            i (int): node id.
+
+        returns:
+            (numpy.ndarray) address ids of the inputs.
+        """
+
+        return self.input_indices[self.input_offsets[i]:self.input_offsets[i+1]]
+
+    def nbytes(self):
+        """This function returns the size of the arrays in bytes.
+
+        returns:
+            (int) size in bytes.
+        """
+
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+    def to_legacy(self):
+        """This function converts the graph back to the graph data
+        dictionaries of graph_former. The dictionaries keyed by the nodes
+        are ordered by the node ids.
+
+        returns:
+            (tuple) graph data dictionaries.
+        """
+
+        addresses = self.addresses.tolist()
+        addresses.append(None)      # addresses[NONE]
+        nodes = addresses[:self.n_nodes]
+        phases = self.phases
+
+        def rows(offsets, *columns):
+            columns = [column.tolist() for column in columns]
+            bounds = offsets.tolist()
+            return [
+                list(zip(*[column[bounds[i]:bounds[i+1]] for column in columns]))
+                for i in range(len(bounds) - 1)
+            ]
+
+        def node_dict(array, convert):
+            return {
+                nodes[i]: convert(value)
+                for i, value in enumerate(array.tolist()) if value != NONE
+            }
+
+        node_and_inputs = {
+            nodes[i]: [addresses[j] for (j,) in row]
+            for i, row in enumerate(rows(self.input_offsets, self.input_indices))
+        }
+        append_input_phase = {
+            nodes[i]: [[phases[p], addresses[a], pid] for p, a, pid in row]
+            for i, row in enumerate(rows(
+                self.append_offsets, self.append_phase, self.append_input, self.append_phase_id
+            )) if row
+        }
+        replace_input_phase = {
+            nodes[i]: [[phases[p], addresses[f], addresses[t], pid] for p, f, t, pid in row]
+            for i, row in enumerate(rows(
+                self.replace_offsets, self.replace_phase,
+                self.replace_from, self.replace_to, self.replace_phase_id
+            )) if row
+        }
+        killed_phase_id = self.killed_phase_id.tolist()
+        killed_nodes = {
+            nodes[i]: [phases[p], killed_phase_id[i]]
+            for i, p in enumerate(self.killed_phase.tolist()) if p != NONE
+        }
+        removed_phase_id = self.removed_phase_id.tolist()
+        removed_usage_nodes = {
+            nodes[i]: [phases[p], removed_phase_id[i]]
+            for i, p in enumerate(self.removed_phase.tolist()) if p != NONE
+        }
+        phase_to_nodes = {
+            phases[p]: [addresses[j] for (j,) in row]
+            for p, row in zip(self.phase_order.tolist(), rows(self.phase_offsets, self.phase_indices))
+        }
+        node_to_phase = node_dict(self.node_phase, lambda p: phases[p])
+        opcode_address = self.opcode_address.tolist()
+        NodeToOpcode = {
+            nodes[i]: [o, addresses[opcode_address[i]]]
+            for i, o in enumerate(self.opcode.tolist()) if o != NONE
+        }
+        node_gen_line = node_dict(self.gen_line, int)
+        id_to_phase = {
+            pid: phases[p] for pid, p in zip(self.phase_ids.tolist(), self.phase_id_phase.tolist())
+        }
+        node_to_phase_id = node_dict(self.node_phase_id, int)
+
+        return (
+                node_and_inputs, append_input_phase, replace_input_phase,
+                killed_nodes, removed_usage_nodes, phase_to_nodes, node_to_phase,
+                NodeToOpcode, node_gen_line, id_to_phase, node_to_phase_id
+        )
+
+def int_value(value):
+    """This function converts the hex string of an address or opcode in
+    the graphs of the earlier runs into an integer.
+
+    args:
+        value (int or str): address or opcode.
+
+    returns:
+        (int) address or opcode.
+    """
+
+    if isinstance(value, str):
+        return int(value, 16)
+
+    return value
+
+def offsets(rows: list):
+    """This function computes the CSR offsets of the rows.
+
+    args:
+        rows (list): rows of entries.
+
+    returns:
+        (numpy.ndarray) offsets, where row i is [offsets[i], offsets[i+1]).
+    """
+
+    bounds = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=bounds[1:])
+
+    return narrow(bounds)
+
+def narrow(values):
+    """This function stores the integers in the smallest signed integer
+    type that holds all of them, so that the arrays of small graphs, e.g.,
+    phase indices and opcodes, take one or two bytes per value.
+
+    args:
+        values (list or numpy.ndarray): integers.
+
+    returns:
+        (numpy.ndarray) integer array.
+    """
+
+    array = np.asarray(values, dtype=np.int64)
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if array.size == 0 or (array.min() >= info.min and array.max() <= info.max):
+            return array.astype(dtype)
+
+    return array
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the graph file.
+
+    returns:
+        (str) graph file.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="A graph file with all graphs in a single file (Graphs_*.pkl)."
+    )
+    args = parser.parse_args()
+
+    return args.file
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename = argument_parser()
+    with open(filename, "rb") as bin_file:
+        graphs = pickle.load(bin_file)
+    for filenumber, graph in graphs.items():
+        csr = CSRGraph(graph)
+        legacy = csr.to_legacy()
+        assert (
+                CSRGraph(legacy).to_legacy() == legacy
+        ), f"ERROR: Graph {filenumber} changed in the conversion."
+        print (
+            filenumber, ":", len(csr), "nodes,",
+            len(pickle.dumps(graph)), "->", len(pickle.dumps(csr)), "pickled bytes"
+        )
@@ -0,0 +1,122 @@
+"""
+    This program generates the JS code of the modified PoC syntax trees
+    through a long-lived node worker (JSCodeWorker.js).
+
+    Starting a new node process for each PoC dominates the PoC
+    generation for a large number of PoCs. CodeGenerator starts the
+    worker once and sends each syntax tree as a line of JSON to its
+    stdin, so each PoC costs a message instead of a process. The syntax
+    trees do not need to be written to JSON files first.
+
+    Example,
+        $python3 CodeGenerator.py -f <AST JSON files>
+"""
+
+import os, sys
+import json
+import argparse
+import threading
+import subprocess
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+JSCODEWORKER = currentdir + "/JSCodeWorker.js"
+
+class CodeGenerator:
+    """JS code generator over a running node worker. The requests are
+    answered one at a time in order, so the generator can be shared by
+    multiple threads.
+    """
+    def __init__(self, worker: str = JSCODEWORKER):
+        """
+        args:
+            worker (str): JS code generation worker script.
+        """
+
+        self.worker = worker
+        self.process = subprocess.Popen(
+                ["node", worker],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True
+        )
+        self.lock = threading.Lock()
+
+    def generate(self, ast: dict, output_file: str):
+        """This function generates the JS code of the syntax tree and
+        writes it to the output file.
+
+        args:
+            ast (dict): syntax tree.
+            output_file (str): JS file path.
+
+        returns:
+            (str) JS file path.
+        """
+
+        request = json.dumps({"ast": ast, "output": output_file})
+        with self.lock:
+            self.process.stdin.write(request + "\n")
+            self.process.stdin.flush()
+            reply = self.process.stdout.readline()
+
+        assert (
+                reply
+        ), f"ERROR: Code generation worker {self.worker} exited with {self.process.poll()}."
+        reply = json.loads(reply)
+        assert (
+                "error" not in reply
+        ), f"ERROR: Failed to generate '{output_file}' - {reply.get('error')}."
+
+        return output_file
+
+    def close(self):
+        """This function stops the worker after the requests sent so far.
+
+        returns:
+            None.
+        """
+
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+        assert (
+                self.process.returncode == 0
+        ), f"ERROR: Code generation worker {self.worker} exited with {self.process.returncode}."
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the syntax tree JSON files.
+
+    returns:
+        (list) syntax tree JSON files.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--files",
+        type=str,
+        nargs="+",
+        help="Syntax tree JSON files. Each JS file is written next to its JSON file."
+    )
+    args = parser.parse_args()
+
+    return args.files
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    files = argument_parser()
+    generator = CodeGenerator()
+    for json_f in files:
+        with open(json_f) as f:
+            ast = json.load(f)
+        print (generator.generate(ast, os.path.splitext(json_f)[0] + ".js"))
+    generator.close()
@@ -0,0 +1,423 @@
+"""
+    This program holds the graph of graph_former as an append-only log
+    of the IR events found in the trace.
+
+    graph_former records every change of the graph as an event, in the
+    order the trace made them: a phase was entered, a node was created
+    with its inputs (Node::New), the opcode of a node was found, an input
+    was appended (AppendInput) or replaced (ReplaceInput), a node was
+    killed (Kill), or its usage was removed (RemoveUse). The events are
+    kept in a NumPy record array of (line, phase_id, kind, node, arg1,
+    arg2), where the nodes and the addresses in the arguments are ids in
+    an address table of 64-bit integers, and a missing value is NONE.
+
+    The graph data dictionaries of graph_former are views of the log.
+    Each view is computed by replaying the events it needs when it is
+    requested for the first time, and the log can be indexed and
+    unpacked as the tuple of the dictionaries. The views are shared, so
+    they must not be changed. The log is smaller than the dictionaries,
+    so the graph store keeps the logs, and the order of the events
+    answers the questions that the dictionaries lost, e.g., the changes
+    of a node in order (node_events), without reading the trace again.
+
+    Example,
+        $python3 EventLog.py -f <graph_*.pkl> -n <node address>
+"""
+
+import os, sys
+import pickle
+import argparse
+import collections.abc
+import numpy as np
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import InstructionParser as IP
+import CSRGraph as CSR
+
+# Id or index of a missing value.
+NONE = -1
+
+# Event kinds, and their node and arguments.
+PHASE = 0           # -, phase index (NONE if outside of any phase), -
+NEW = 1             # created node, number of inputs, -
+INPUT = 2           # created node, input node, -
+OPCODE = 3          # node, opcode, opcode address
+APPEND = 4          # node, appended input node, -
+REPLACE = 5         # node, removed input node, added input node
+KILL = 6            # killed node, -, -
+REMOVE_USE = 7      # node, -, -
+
+KIND_NAMES = {
+    PHASE: "Phase",
+    NEW: "New",
+    INPUT: "Input",
+    OPCODE: "Opcode",
+    APPEND: "AppendInput",
+    REPLACE: "ReplaceInput",
+    KILL: "Kill",
+    REMOVE_USE: "RemoveUse",
+}
+
+EVENT_DTYPE = np.dtype([
+    ("line", np.int64),
+    ("phase_id", np.int32),
+    ("kind", np.int8),
+    ("node", np.int32),
+    ("arg1", np.int32),
+    ("arg2", np.int32),
+])
+
+# Graph data dictionaries of graph_former in the order of the tuple.
+VIEWS = (
+    "node_and_inputs", "append_input_phase", "replace_input_phase",
+    "killed_nodes", "removed_usage_nodes", "phase_to_nodes", "node_to_phase",
+    "NodeToOpcode", "node_gen_line", "id_to_phase", "node_to_phase_id",
+)
+
+class EventRecorder:
+    """Recorder of the events of graph_former. The line, phase, and
+    phase id of the following events are set by the scanner.
+    """
+    def __init__(self):
+        self.columns = tuple([] for _ in EVENT_DTYPE.names)
+        # Address-to-id and phase name-to-index.
+        self.ids = {}
+        self.phase_index = {}
+        self.line = NONE
+        self.phase_id = 0
+
+    def address_id(self, address: int):
+        if address is None:
+            return NONE
+        if address not in self.ids:
+            self.ids[address] = len(self.ids)
+        return self.ids[address]
+
+    def add(self, kind: int, node: int, arg1: int = NONE, arg2: int = NONE):
+        line, phase_id, kinds, nodes, args1, args2 = self.columns
+        line.append(self.line)
+        phase_id.append(self.phase_id)
+        kinds.append(kind)
+        nodes.append(self.address_id(node))
+        args1.append(arg1)
+        args2.append(arg2)
+
+    def enter_phase(self, line_number: int, phase: str, phase_id: int):
+        self.line = line_number
+        self.phase_id = phase_id
+        if phase is not None and phase not in self.phase_index:
+            self.phase_index[phase] = len(self.phase_index)
+        self.add(PHASE, None, self.phase_index[phase] if phase is not None else NONE)
+
+    def new_node(self, node: int, inputs: list):
+        self.add(NEW, node, len(inputs))
+        for input_node in inputs:
+            self.add(INPUT, node, self.address_id(input_node))
+
+    def opcode(self, node: int, opcode: int, op_address: int):
+        self.add(OPCODE, node, NONE if opcode is None else opcode, self.address_id(op_address))
+
+    def append_input(self, node: int, input_node: int):
+        self.add(APPEND, node, self.address_id(input_node))
+
+    def replace_input(self, node: int, from_node: int, to_node: int):
+        self.add(REPLACE, node, self.address_id(from_node), self.address_id(to_node))
+
+    def kill(self, node: int):
+        self.add(KILL, node)
+
+    def remove_use(self, node: int):
+        self.add(REMOVE_USE, node)
+
+    def log(self):
+        """This function returns the recorded events as an event log.
+
+        returns:
+            (EventLog) event log.
+        """
+
+        events = np.empty(len(self.columns[0]), dtype=EVENT_DTYPE)
+        for name, column in zip(EVENT_DTYPE.names, self.columns):
+            events[name] = column
+
+        return EventLog(events, np.array(list(self.ids), dtype=np.uint64), list(self.phase_index))
+
+class EventLog(collections.abc.Sequence):
+    """Event log of a graph. As a sequence, it holds the graph data
+    dictionaries of graph_former (VIEWS), computed on demand.
+    """
+    def __init__(self, events: np.ndarray, addresses: np.ndarray, phases: list):
+        """
+        args:
+            events (numpy.ndarray): events in the order they were found (EVENT_DTYPE).
+            addresses (numpy.ndarray): address of each address id.
+            phases (list): name of each phase index.
+        """
+
+        self.events = events
+        self.addresses = addresses
+        self.phases = phases
+        # View name-to-computed view.
+        self.views = {}
+        # Phase index of each event.
+        self.event_phases = None
+
+    def __getstate__(self):
+        # The views are computed again from the events, and each column
+        # is stored in the smallest integer type that holds it.
+        state = dict(vars(self))
+        state["events"] = {name: CSR.narrow(self.events[name]) for name in EVENT_DTYPE.names}
+        state["views"] = {}
+        state["event_phases"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        columns = state["events"]
+        state["events"] = np.empty(len(columns["line"]), dtype=EVENT_DTYPE)
+        for name, column in columns.items():
+            state["events"][name] = column
+        vars(self).update(state)
+
+    def __len__(self):
+        return len(VIEWS)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        name = VIEWS[index]
+        if name not in self.views:
+            self.views[name] = getattr(self, "view_" + name)()
+        return self.views[name]
+
+    def to_legacy(self):
+        """This function returns the graph data dictionaries.
+
+        returns:
+            (tuple) graph data dictionaries.
+        """
+
+        return tuple(self)
+
+    def address(self, i: int):
+        """This function returns the address of the id.
+
+        args:
+            i (int): address id.
+
+        returns:
+            (int) address.
+            (None) if the id is NONE.
+        """
+
+        if i == NONE:
+            return None
+        return int(self.addresses[i])
+
+    def nbytes(self):
+        """This function returns the size of the arrays in bytes.
+
+        returns:
+            (int) size in bytes.
+        """
+
+        return self.events.nbytes + self.addresses.nbytes
+
+    def select(self, *kinds):
+        """This function returns the columns of the events of the kinds,
+        in order, with the phase name of each event.
+
+        args:
+            kinds (int): event kinds.
+
+        returns:
+            (list) address of each address id, where addresses[NONE] is None.
+            (zip) phase, phase id, line, kind, node id, arg1, and arg2 of
+            each event.
+        """
+
+        if self.event_phases is None:
+            # Each event is in the phase of the last phase event before it.
+            is_phase = self.events["kind"] == PHASE
+            last = np.maximum.accumulate(np.where(is_phase, np.arange(len(self.events)), NONE))
+            self.event_phases = np.where(
+                    last != NONE, self.events["arg1"][np.maximum(last, 0)], NONE
+            )
+        selected = np.isin(self.events["kind"], kinds)
+        events = self.events[selected]
+        names = self.phases + [None]        # names[NONE]
+        addresses = self.addresses.tolist()
+        addresses.append(None)              # addresses[NONE]
+
+        return addresses, zip(
+                [names[p] for p in self.event_phases[selected].tolist()],
+                events["phase_id"].tolist(), events["line"].tolist(), events["kind"].tolist(),
+                events["node"].tolist(), events["arg1"].tolist(), events["arg2"].tolist()
+        )
+
+    def view_node_and_inputs(self):
+        node_and_inputs = {}
+        addresses, events = self.select(NEW, INPUT, APPEND, REPLACE)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            node = addresses[node]
+            if kind == NEW:
+                # A node created again only has the inputs of the last creation.
+                node_and_inputs[node] = []
+            elif kind == REPLACE:
+                if arg1 != NONE:
+                    node_and_inputs[node].remove(addresses[arg1])
+                if arg2 != NONE:
+                    node_and_inputs[node].append(addresses[arg2])
+            else:
+                node_and_inputs[node].append(addresses[arg1])
+        return node_and_inputs
+
+    def view_append_input_phase(self):
+        append_input_phase = {}
+        addresses, events = self.select(APPEND)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            append_input_phase.setdefault(addresses[node], []).append(
+                    [phase, addresses[arg1], phase_id]
+            )
+        return append_input_phase
+
+    def view_replace_input_phase(self):
+        replace_input_phase = {}
+        addresses, events = self.select(REPLACE)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            # The replacement is kept only if the new input was added.
+            if arg2 != NONE:
+                replace_input_phase.setdefault(addresses[node], []).append(
+                        [phase, addresses[arg1], addresses[arg2], phase_id]
+                )
+        return replace_input_phase
+
+    def view_killed_nodes(self):
+        addresses, events = self.select(KILL)
+        return {
+            addresses[node]: [phase, phase_id] for phase, phase_id, line, kind, node, _, _ in events
+        }
+
+    def view_removed_usage_nodes(self):
+        addresses, events = self.select(REMOVE_USE)
+        return {
+            addresses[node]: [phase, phase_id] for phase, phase_id, line, kind, node, _, _ in events
+        }
+
+    def view_phase_to_nodes(self):
+        phase_to_nodes = {}
+        addresses, events = self.select(NEW)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            phase_to_nodes.setdefault(phase, []).append(addresses[node])
+        return phase_to_nodes
+
+    def view_node_to_phase(self):
+        node_to_phase = {}
+        addresses, events = self.select(NEW)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            node_to_phase.setdefault(addresses[node], phase)
+        return node_to_phase
+
+    def view_NodeToOpcode(self):
+        addresses, events = self.select(OPCODE)
+        return {
+            addresses[node]: [None if opcode == NONE else opcode, addresses[op_address]]
+            for phase, phase_id, line, kind, node, opcode, op_address in events
+        }
+
+    def view_node_gen_line(self):
+        node_gen_line = {}
+        addresses, events = self.select(NEW)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            node_gen_line.setdefault(addresses[node], line)
+        return node_gen_line
+
+    def view_id_to_phase(self):
+        addresses, events = self.select(PHASE)
+        return {phase_id: phase for phase, phase_id, _, _, _, _, _ in events if phase is not None}
+
+    def view_node_to_phase_id(self):
+        node_to_phase_id = {}
+        addresses, events = self.select(NEW)
+        for phase, phase_id, line, kind, node, arg1, arg2 in events:
+            node_to_phase_id.setdefault(addresses[node], phase_id)
+        return node_to_phase_id
+
+    def node_events(self, address: int):
+        """This function returns the events of the node, in order.
+
+        args:
+            address (int): node address.
+
+        returns:
+            (numpy.ndarray) events of the node (EVENT_DTYPE).
+        """
+
+        ids = np.flatnonzero(self.addresses == np.uint64(address))
+        if ids.size == 0:
+            return self.events[:0]
+
+        return self.events[self.events["node"] == ids[0]]
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the graph shard file.
+
+    returns:
+        (str) graph shard file.
+        (str) node address.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="A graph shard file of the graph store (graph_*.pkl)."
+    )
+    parser.add_argument(
+        "-n",
+        "--node",
+        type=str,
+        default=None,
+        help="A node address to print the events of."
+    )
+    args = parser.parse_args()
+
+    return args.file, args.node
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename, node = argument_parser()
+    # The shards refer to the class of this module by the module name.
+    import EventLog as EL
+    with open(filename, "rb") as bin_file:
+        log = pickle.load(bin_file)
+    assert (
+            isinstance(log, EL.EventLog)
+    ), f"ERROR: {filename} does not hold an event log."
+    kinds, counts = np.unique(log.events["kind"], return_counts=True)
+    for kind, count in zip(kinds.tolist(), counts.tolist()):
+        print (f"{KIND_NAMES[kind]}: {count}")
+    print (
+        len(log.events), "events,", log.nbytes(), "bytes,",
+        len(pickle.dumps(log.to_legacy())), "pickled bytes of the dictionaries"
+    )
+    if node:
+        address_text = lambda i: IP.address_text(log.address(i)) if i != NONE else None
+        print ("line, phase id, event, arguments")
+        for line, phase_id, kind, _, arg1, arg2 in log.node_events(IP.hex_value(node)).tolist():
+            if kind == OPCODE:
+                args = [IP.opcode_text(arg1), address_text(arg2)]
+            elif kind in (INPUT, APPEND, REPLACE):
+                args = [address_text(arg1), address_text(arg2)]
+            else:
+                args = [arg1]
+            print (line, phase_id, KIND_NAMES[kind], args)
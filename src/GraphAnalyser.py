@@ -25,7 +25,6 @@ Author: Terrence J. Lim
 import os, sys
 import json
 import argparse
-import pickle
 import numpy as np
 
 # Code to import modules from other directories.
@@ -35,7 +34,9 @@ parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
 import FunctionLists as FL
-import GraphCreator as GC
+import GraphStore as GS
+import GraphModel as GMD
+import InstructionParser as IP
 
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -68,108 +69,7 @@ ISSUES = {
         "NodeListSize": 6
 }
 
-class Graph:
-    def __init__(self):
-        self.nodes = []
-        self.size = 0
-        self.phase_to_nodes = {}
-        self.id_to_nodes = {}
-        self.id_to_phase = {}
-        self.grouped_phases = {}
-
-class Node:
-    def __init__(self):
-        self.id = -1
-        self.address = None
-        self.phase = None
-        self.phase_id = -1
-        self.inputs = []
-        self.input_length = 0
-        self.replaced_inputs = {}
-        self.killed_at = None
-        self.removed_usage_at = None
-        self.append_inputs = {}
-        self.opcode = []
-
-
-
-def RestructureGraph(Org_Graph: list):
-    """This function receives a list of multiple data structures, which
-    represent a graph, and restructure them to a class object graph.
-
-    args:
-        Org_Graph (list): a list of multiple data structures representing
-        a graph.
-
-        NodeInputs    = Org_Graph[0]
-        AppendInputs  = Org_Graph[1]
-        ReplaceInputs = Org_Graph[2]
-        KilledNodes   = Org_Graph[3]
-        RemovedUsage  = Org_Graph[4]
-        PhaseToNodes  = Org_Graph[5]
-        NodeToPhase   = Org_Graph[6]
-        NodeToOpcode  = Org_Graph[7]
-        NodeToLine    = Org_Graph[8]
-        IdToPhase     = Org_Graph[9]
-        NodeToPhaseId = Org_Graph[10]
-
-    returns:
-        (Graph) restructured graph object. 
-    """
-
-    Re_Graph = Graph()
-    Re_Graph.phase_to_nodes = Org_Graph[5]
-    Re_Graph.id_to_phase = Org_Graph[9]
-
-    Re_Graph.grouped_phases = GC.group_phases(Org_Graph[9])
-
-    AddressToNode = {}
-    
-    for node_addr, inputs in Org_Graph[0].items():
-        # Generate a new node object and populate data.
-        node = Node()
-        node.id = Re_Graph.size
-        node.address = node_addr
-        node.inputs = inputs
-        node.input_length = len(inputs)
-        if node_addr in Org_Graph[1]:
-            node.append_inputs = Org_Graph[1][node_addr]
-        if node_addr in Org_Graph[2]:
-            node.replaced_inputs = Org_Graph[2][node_addr]
-        if node_addr in Org_Graph[3]:
-            node.killed_at = Org_Graph[3][node_addr]
-        if node_addr in Org_Graph[4]:
-            node.removed_usage_at = Org_Graph[4][node_addr]
-        node.phase = Org_Graph[6][node_addr]
-        node.opcode = Org_Graph[7][node_addr]
-        node.phase_id = Org_Graph[10][node_addr]
-        # Add constructed node to graph object.
-        Re_Graph.nodes.append(node)
-        Re_Graph.size += 1
-        # Populate AddressToNode dictionary.
-        AddressToNode[node_addr] = node
-
-        if node.phase_id not in Re_Graph.id_to_nodes:
-            Re_Graph.id_to_nodes[node.phase_id] = [node]
-        else:
-            Re_Graph.id_to_nodes[node.phase_id].append(node)
-    
-    for node in Re_Graph.nodes:
-        # If the node has input nodes, replace the list content from
-        # only addresses in string to actual node objects.
-        if node.inputs:
-            _inputs = []
-            for input_addr in node.inputs:
-                assert (
-                        type(input_addr) == str
-                ), f"ERROR: input_addr = {input_addr.address}"
-                ipt_node = AddressToNode[input_addr]
-                _inputs.append(ipt_node)
-            node.inputs = _inputs
-
-    return Re_Graph
-
-def GraphAnalyser(G1: Graph, G2: Graph):
+def GraphAnalyser(G1: GMD.Graph, G2: GMD.Graph):
     """This function analyse two graphs namely G and G'
     and compute the differences between two.
 
@@ -194,7 +94,7 @@ def GraphAnalyser(G1: Graph, G2: Graph):
 
 ## GRAPH COMPARING FUNCTIONS==============================================
 
-def CompareGraph(G1: Graph, G2: Graph):
+def CompareGraph(G1: GMD.Graph, G2: GMD.Graph):
     """This function will compare two passed graphs (G and G').
 
     args:
@@ -218,7 +118,7 @@ def CompareGraph(G1: Graph, G2: Graph):
 
     return CommonPhaseIDs
 
-def CompareGraphBuilderPhase(G1: Graph, G2: Graph):
+def CompareGraphBuilderPhase(G1: GMD.Graph, G2: GMD.Graph):
     """This function compares nodes those were generated at
     the GraphBuilderPhase in both graphs to find the differences
 
@@ -285,7 +185,7 @@ def FindDiffNodesByPhase(
         if not is_equal:
             DiffNodes.append(v1_i)
 
-def CompareRemainingNodes(G1: Graph, G2: Graph, SkipNodes: dict):
+def CompareRemainingNodes(G1: GMD.Graph, G2: GMD.Graph, SkipNodes: dict):
     """
     """
 
@@ -295,7 +195,7 @@ def CompareRemainingNodes(G1: Graph, G2: Graph, SkipNodes: dict):
 
     return DiffNodes
 
-def FindDiffNodes(G1: Graph, G2: Graph, SkipNodes: list):
+def FindDiffNodes(G1: GMD.Graph, G2: GMD.Graph, SkipNodes: list):
     """This function compares two graphs node-to-node by phase. Here
     are some assumptions made.
 
@@ -364,7 +264,7 @@ def CompareNodeLists(V1: list, V2: list, SkipNodes: list):
     
     return DiffNodes
 
-def CompareTwoNodes(v1: Node, v2: Node, SkipNodes: list):
+def CompareTwoNodes(v1: GMD.Node, v2: GMD.Node, SkipNodes: list):
     """This function compares two nodes' properties. If they are equal
     nodes, it returns True; otherwise, False.
 
@@ -383,12 +283,14 @@ def CompareTwoNodes(v1: Node, v2: Node, SkipNodes: list):
     # 2. Compare input nodes.
     if v1.input_length == v2.input_length:
         for i in range(0, v1.input_length):
-            if v1.inputs[i].address in SkipNodes:
+            v1_input = v1.input_node(i)
+            v2_input = v2.input_node(i)
+            if v1_input.address in SkipNodes:
                 return False, 6
-            elif v2.inputs[i].address in SkipNodes:
+            elif v2_input.address in SkipNodes:
                 return False, 7
             # Compare the opcode of input nodes.
-            if v1.inputs[i].opcode[0] != v2.inputs[i].opcode[0]:
+            if v1_input.opcode[0] != v2_input.opcode[0]:
                 return False, 2
     else:
         return False, 2
@@ -452,7 +354,7 @@ def ComputeEqualIndices(DiffIdxToPhase: dict, IdxToPhase: dict):
 
     return IdxToPhase
 
-def CompareGraphByPhaseId(G1: Graph, G2: Graph, TargetPhaseIDs: list):
+def CompareGraphByPhaseId(G1: GMD.Graph, G2: GMD.Graph, TargetPhaseIDs: list):
     """
     """
 
@@ -484,9 +386,10 @@ def get_nodes(Nodes: list, PhaseToNodes: dict, Phase: str):
     """
 
     CollectedNodes = []
+    PhaseNodes = set(PhaseToNodes[Phase])
 
     for node in Nodes:
-        if node.address in PhaseToNodes[Phase]:
+        if node.address in PhaseNodes:
             CollectedNodes.append(node)
         else:
             break
@@ -534,7 +437,7 @@ def get_last_node_id(AllPhases: list, MainPhases: list, LastNodeId: int, TargetN
 
     return last_node_id
 
-def is_skip(v: Node, SkipNodes: list):
+def is_skip(v: GMD.Node, SkipNodes: list):
     """This function decides either to skip the node for comparison or not.
 
     args:
@@ -638,7 +541,7 @@ def GroupGraphs(Graphs: dict, Correctness: dict):
 
     return groupedGraphs
 
-def FilterGraphs(GroupedGraphs: list, Original: Graph):
+def FilterGraphs(GroupedGraphs: list, Original: GMD.Graph):
     """This function filters out graphs that are different from
     the original graph.
 
@@ -735,7 +638,7 @@ def GetMaxPhase(Graphs: dict):
 
 ## ========================================================================
 
-def PrintGraph(graph: Graph):
+def PrintGraph(graph: GMD.Graph):
     """This function prints the graph.
     
     args:
@@ -748,10 +651,11 @@ def PrintGraph(graph: Graph):
     print ("ID|Opcode|Address|Phase")
     print ('----------------------------------')
     for node in graph.nodes:
-        print (f"{node.id}|{node.opcode[0]}|0x{node.address.lstrip('0')}|{node.phase}")
+        print (f"{node.id}|{IP.opcode_text(node.opcode[0])}|{IP.address_text(node.address)}|{node.phase}")
         inputs = []
-        for input in node.inputs:
-            inputs.append(f"{input.id}|{input.opcode[0]}")
+        for i in range(node.input_length):
+            input = node.input_node(i)
+            inputs.append(f"{input.id}|{IP.opcode_text(input.opcode[0])}")
         print ('Input Nodes: ', inputs)
         if node.removed_usage_at:
             print ('Usage removed at', node.removed_usage_at[0])
@@ -761,7 +665,7 @@ def PrintGraph(graph: Graph):
 
     print ("========================================================================")
 
-def PrintPhaseOrder(graph: Graph):
+def PrintPhaseOrder(graph: GMD.Graph):
     """
     """
 
@@ -774,7 +678,7 @@ def PrintPhaseOrder(graph: Graph):
             print (current)
     print ('----------------------------------')
 
-def PrintGraphByPhaseId(graph: Graph):
+def PrintGraphByPhaseId(graph: GMD.Graph):
     """
     """
 
@@ -784,7 +688,7 @@ def PrintGraphByPhaseId(graph: Graph):
         print (f"Phase - ID: {id} - Name: {graph.id_to_phase[id]}")
         opcodes = []
         for node in nodes:
-            opcodes.append(node.opcode[0])
+            opcodes.append(IP.opcode_text(node.opcode[0]))
         print (opcodes)
 
 ## ========================================================================
@@ -830,11 +734,11 @@ def load_data(directory: str):
 if __name__ == "__main__":
     directory = argument_parser()
 
-    Graphs = {}
-    with open(f"{directory}/Graphs.pkl", "rb") as gf:
-        Graphs = pickle.load(gf)
+    # Only the graphs compared below are loaded from their shards, and
+    # each of them is restructured once.
+    Graphs = GS.GraphStore(directory)
 
-    CommonPhases, CommonIndicies = GraphAnalyser(Graphs['8'], Graphs['1'])
+    CommonPhases, CommonIndicies = GraphAnalyser(Graphs.graph('8'), Graphs.graph('1'))
     #sys.exit()
 
     TESTS1 = ['0', '1', '3', '8', '5', '13', '14', '15', '16', '17']
@@ -845,7 +749,7 @@ if __name__ == "__main__":
             if j != i:
                 (
                     CommonPhases, CommonIndicies 
-                ) = GraphAnalyser(Graphs[i], Graphs[j])
+                ) = GraphAnalyser(Graphs.graph(i), Graphs.graph(j))
                 Result.append(set(CommonPhases))
                 ResultIdx.append(set(CommonIndicies.keys()))
 
@@ -858,7 +762,7 @@ if __name__ == "__main__":
     for i in TESTS2:
         for j in TESTS2:
             if j != i:
-                CommonPhases, CommonIndicies = GraphAnalyser(Graphs[i], Graphs[j])
+                CommonPhases, CommonIndicies = GraphAnalyser(Graphs.graph(i), Graphs.graph(j))
                 Result.append(set(CommonPhases))
                 ResultIdx.append(set(CommonIndicies.keys()))
 
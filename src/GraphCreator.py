@@ -8,6 +8,7 @@
 import os, sys
 import json
 import argparse
+import itertools
 
 # Code to import modules from other directories.
 # Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
@@ -17,11 +18,13 @@ sys.path.append(parentdir)
 
 import X86ASM as X86
 import FunctionLists as FL
+import InstructionParser as IP
 import PhaseIdentifier as PI
 import OptimisationTracker as OT
 import NodeToOpcode as NTO
-
-import x86Tracer.backTracer.instruction_restructor as IREST
+import TraceReader as TR
+import PhaseTimeline as PT
+import EventLog as EL
 
 # List of X86 operations.
 ATTACH_INPUT_NODE = "49 89 1c b8"
@@ -40,164 +43,212 @@ def graph_former(lines: list, start_from: int, end_at: int, initial_nodes: list,
     information to generate a graph.
 
     args:
-        lines (list): list of raw trace lines.
+        lines (TraceSource or list): raw trace lines.
         start_from (int): trace line number to start scanning.
         end_at (int): trace line number to stop scanning.
         initial_nodes (list): list of initial bytecode node addresses.
 
     returns:
-        (dict) generated node and its input nodes map.
-        (dict) generated node and its direct parent node map.
+        (EventLog) event log of the graph, whose views are the graph
+        data dictionaries.
     """
 
-    # Data structure to hold each node to its inputs.
-    # There may be no input nodes to generate the new node,
-    # so some node might have an empty list mapped to it.
-    node_and_inputs = {}
-    # Dict. to hold generated node-to-phase data.
-    node_to_phase = {}
-    # Dict. to hold phase-to-nodes data.
-    phase_to_nodes = {}
-    # Dict. to hold the both read and write values if two differ.
-    new_node_map = {}
-    # Dict. to hold the node input phases for each node, if exists.
-    append_input_phase = {}
-    # Dict. to hold the node replacement phases for each node, if exists.
-    replace_input_phase = {}
-    # Dict. to hold the nodes that were killed.
-    killed_nodes = {}
-    # Dict. to hold the node to generate instruction line number.
-    node_gen_line = {}
-    # Dict. to hold the node to usage removed phase.
-    removed_usage_nodes = {}
-    # Dict. to hold the node to opcode.
-    NodeToOpcode = {}
-    # Dict. to hold the opcode address to opcode.
-    OpAddressToOpcode = {}
-
-    # List to hold the input nodes.
-    input_nodes = []
-    # Temporary holder for initial bytecode nodes.
-    bytecode_nodes = []
-
-    # Flag list for AppendInput - If both are True, then both nodes are collected.
-    append_completed = [False,False]
-    # Flag list for ReplaceInput - If all three are True, then all nodes are collected.
-    replace_completed = [False,False,False,False]
-    # Flag to indicate whether node kill has completed or not.
-    node_kill_completed = [False]
-    # Flag to indicate whether node's usage was removed or not.
-    remove_use_completed = [False]
-
-    # Variable to hold currently handling node address.
-    current_node = [None]
-    # Variable to hold the target node that a new input will be added.
-    target_node = [None]
-    # Variable to hold the node that will be appended to the target node.
-    append_node = [None]
-    # Variable to hold the node that will have input node replacement.
-    main_node = [None]
-    # Variable to hold the node in the input list to be replaced.
-    from_node = [None]
-    # Variable to hold the node that will replace the from_node.
-    to_node = [None]
-    # instruction line holders for assert.
-    target_line = [None]
-    # Previous function name holder
-    prev_function = [None]
-    append_line = [None]
-    from_node_line = [None]
-    main_node_line = [None]
-    to_node_line = [None]
-    
-    # Variable to hold the current opcode.
-    current_op = None
-    # Variable to hold the current opcode address.
-    current_addr = None
-
-    # A unique id tracker assigned to each phase.
-    phase_id = 0
-    id_to_phase = {}
-    node_to_phase_id = {}
-
-    line_number = start_from
-    for line in lines[start_from:end_at]:
-        re_inst = IREST.instruction_splitter(line)
-
-        # Get current phase.
-        phase = get_current_phase(line_number, phase_scopes)
-        
-        # Assign id numbers to each phases in a sequential order.
-        if phase:
-            if phase_id not in id_to_phase:
-                id_to_phase[phase_id] = phase
-            elif phase_id in id_to_phase and id_to_phase[phase_id] != phase:
-                phase_id += 1
-                id_to_phase[phase_id] = phase
-        else:
-            pass
-
+    former = GraphFormer(initial_nodes)
+    timeline = PT.PhaseTimeline(phase_scopes)
+    line_iter = iter(TR.get_lines(lines, start_from, end_at))
+    # Every line in a segment has the same phase and phase id.
+    for first, last, phase, phase_id in timeline.id_segments(start_from, end_at):
+        numbers = range(first, last) if last is not None else itertools.count(first)
+        for line_number, line in zip(numbers, line_iter):
+            # The phase id is assigned only if the segment has a line.
+            if line_number == first:
+                former.enter_phase(first, phase, phase_id)
+            former.scan(line_number, phase, IP.instruction_splitter(line), line)
+
+    return former.result()
+
+class GraphFormer:
+    """State of graph_former over the trace lines scanned so far.
+    Only the instructions of the functions in FUNCTIONS change the
+    graph, and they are dispatched through HANDLERS indexed by the
+    function id. The phase and phase id (PhaseTimeline.id_segments) of
+    the lines must be set with enter_phase before scanning them.
+
+    Every change of the graph is recorded as an event (EventLog), and
+    only the state that the scan depends on is kept here.
+    """
+    def __init__(self, initial_nodes: list):
+        self.initial_nodes = initial_nodes
+
+        # Recorder of the graph events.
+        self.events = EL.EventRecorder()
+        # Data structure to hold each node to its inputs.
+        # There may be no input nodes to generate the new node,
+        # so some node might have an empty list mapped to it.
+        self.node_and_inputs = {}
+        # Dict. to hold the both read and write values if two differ.
+        self.new_node_map = {}
+        # Dict. to hold the node to opcode.
+        self.NodeToOpcode = {}
+        # Dict. to hold the opcode address to opcode.
+        self.OpAddressToOpcode = {}
+
+        # List to hold the input nodes.
+        self.input_nodes = []
+        # Temporary holder for initial bytecode nodes.
+        self.bytecode_nodes = []
+
+        # Flag list for AppendInput - If both are True, then both nodes are collected.
+        self.append_completed = [False,False]
+        # Flag list for ReplaceInput - If all three are True, then all nodes are collected.
+        self.replace_completed = [False,False,False,False]
+        # Flag to indicate whether node kill has completed or not.
+        self.node_kill_completed = [False]
+        # Flag to indicate whether node's usage was removed or not.
+        self.remove_use_completed = [False]
+
+        # Variable to hold currently handling node address.
+        self.current_node = [None]
+        # Variable to hold the target node that a new input will be added.
+        self.target_node = [None]
+        # Variable to hold the node that will be appended to the target node.
+        self.append_node = [None]
+        # Variable to hold the node that will have input node replacement.
+        self.main_node = [None]
+        # Variable to hold the node in the input list to be replaced.
+        self.from_node = [None]
+        # Variable to hold the node that will replace the from_node.
+        self.to_node = [None]
+        # instruction line holders for assert.
+        self.target_line = [None]
+        self.append_line = [None]
+        self.from_node_line = [None]
+        self.main_node_line = [None]
+        self.to_node_line = [None]
+
+        # Variable to hold the current opcode.
+        self.current_op = None
+        # Variable to hold the current opcode address.
+        self.current_addr = None
+
+    def enter_phase(self, line_number: int, phase: str, phase_id: int):
+        """This function sets the phase and phase id of the following
+        lines and records them.
+
+        args:
+            line_number (int): trace line number of the first line.
+            phase (str): phase of the following lines.
+            phase_id (int): sequential id of the phase.
+
+        returns:
+            None.
+        """
+
+        self.events.enter_phase(line_number, phase, phase_id)
+
+    def scan(self, line_number: int, phase: str, re_inst: list, line: str):
+        """This function scans a single trace line. The line is handled
+        by the handler of its function looked up by the function id.
+
+        args:
+            line_number (int): trace line number of the line.
+            phase (str): phase of the line.
+            re_inst (Instruction): restructured instruction.
+            line (str): raw trace line.
+
+        returns:
+            None.
+        """
+
+        if re_inst.function_id is None:
+            return
+        handler = self.HANDLERS[re_inst.function_id]
+        if handler:
+            self.events.line = line_number
+            handler(self, line_number, phase, re_inst, line)
+
+    def handle_operator(self, line_number: int, phase: str, re_inst: list, line: str):
         # Populate OpAddressToOpcode dictionary.
-        NTO.address_to_opcode(re_inst, OpAddressToOpcode)
-
-        function = re_inst[2]
-        if function == FL.NEWNODE_STR or function == FL.NEWNODEUNCHECKED_STR:
-            new_op, new_addr = NTO.get_opcode(re_inst, line, OpAddressToOpcode)
-            if new_op:
-                # If current_op already exists, we replace the value of current_op with the new_op.
-                # This is because of the assumption that the last opcode appeared is the opcode
-                # for currently generating node.
-                current_op = new_op
-                current_addr = new_addr
-        elif function == FL.CLONENODE_STR:
-            org_node = NTO.get_clone_node(re_inst, line, NodeToOpcode)
-            if org_node:
-                current_op = NodeToOpcode[org_node][0]
-                current_addr = NodeToOpcode[org_node][1]
-        elif function == FL.NEW_STR:
-            assert current_op, f"ERROR: current_op is None - {line}"
-            input_nodes, bytecode_nodes = new_node_gen(
-                                            re_inst, line, input_nodes, initial_nodes, bytecode_nodes,
-                                            node_and_inputs, current_node, new_node_map, phase,
-                                            node_to_phase, phase_to_nodes, line_number, node_gen_line,
-                                            node_to_phase_id, phase_id
-            )
-            if re_inst[4]['asm_inst'][0] == "ret":
-                assert current_node[0], f"ERROR: current_node[0] is None - {line}"
-                NodeToOpcode[current_node[0]] = [current_op, current_addr]
-                current_op = None
-                current_addr = None
-        elif function == FL.APPENDINPUT:
-            append_input(
-                re_inst, line, append_completed, target_node,
-                append_node, target_line, append_line, node_and_inputs,
-                phase, append_input_phase, phase_id
-            )
-        elif function == FL.REPLACEINPUT:
-            replace_input(
-                re_inst, line, replace_completed, main_node, main_node_line, to_node,
-                to_node_line, from_node, from_node_line, new_node_map, node_and_inputs,
-                phase, replace_input_phase, phase_id
-            )
-        elif function == FL.NODEKILL:
-            node_kill(re_inst, killed_nodes, node_kill_completed, node_and_inputs, phase, phase_id)
-        elif function == FL.REMOVEUSE:
-            removeuse(re_inst, removed_usage_nodes, remove_use_completed, node_and_inputs, phase, phase_id)
-        elif function == FL.APPENDUSE:
-            pass
-
-        line_number += 1
-        prev_function[0] = function
-
-    return (
-            node_and_inputs, append_input_phase, replace_input_phase,
-            killed_nodes, removed_usage_nodes, phase_to_nodes, node_to_phase,
-            NodeToOpcode, node_gen_line, id_to_phase, node_to_phase_id
-    )
+        NTO.address_to_opcode(re_inst, self.OpAddressToOpcode)
+
+    def handle_new_node(self, line_number: int, phase: str, re_inst: list, line: str):
+        new_op, new_addr = NTO.get_opcode(re_inst, line, self.OpAddressToOpcode)
+        if new_op is not None:
+            # If current_op already exists, we replace the value of current_op with the new_op.
+            # This is because of the assumption that the last opcode appeared is the opcode
+            # for currently generating node.
+            self.current_op = new_op
+            self.current_addr = new_addr
+
+    def handle_clone_node(self, line_number: int, phase: str, re_inst: list, line: str):
+        org_node = NTO.get_clone_node(re_inst, line, self.NodeToOpcode)
+        if org_node is not None:
+            self.current_op = self.NodeToOpcode[org_node][0]
+            self.current_addr = self.NodeToOpcode[org_node][1]
+
+    def handle_node_new(self, line_number: int, phase: str, re_inst: list, line: str):
+        assert self.current_op is not None, f"ERROR: current_op is None - {line}"
+        self.input_nodes, self.bytecode_nodes = new_node_gen(
+                                        re_inst, line, self.input_nodes, self.initial_nodes,
+                                        self.bytecode_nodes, self.node_and_inputs, self.current_node,
+                                        self.new_node_map, phase, line_number, self.events
+        )
+        if re_inst[4]['asm_inst'][0] == "ret":
+            assert self.current_node[0] is not None, f"ERROR: current_node[0] is None - {line}"
+            self.NodeToOpcode[self.current_node[0]] = [self.current_op, self.current_addr]
+            self.events.opcode(self.current_node[0], self.current_op, self.current_addr)
+            self.current_op = None
+            self.current_addr = None
+
+    def handle_append_input(self, line_number: int, phase: str, re_inst: list, line: str):
+        append_input(
+            re_inst, line, self.append_completed, self.target_node,
+            self.append_node, self.target_line, self.append_line, self.node_and_inputs,
+            self.events
+        )
+
+    def handle_replace_input(self, line_number: int, phase: str, re_inst: list, line: str):
+        replace_input(
+            re_inst, line, self.replace_completed, self.main_node, self.main_node_line,
+            self.to_node, self.to_node_line, self.from_node, self.from_node_line,
+            self.new_node_map, self.node_and_inputs, self.events
+        )
+
+    def handle_node_kill(self, line_number: int, phase: str, re_inst: list, line: str):
+        node_kill(re_inst, self.events, self.node_kill_completed, self.node_and_inputs)
+
+    def handle_remove_use(self, line_number: int, phase: str, re_inst: list, line: str):
+        removeuse(re_inst, self.events, self.remove_use_completed, self.node_and_inputs)
+
+    # Handler of each function. Lines of the other functions only
+    # count for the phase ids.
+    HANDLER_OF = {
+        FL.OPERATOR: handle_operator,
+        FL.NEWNODE_STR: handle_new_node,
+        FL.NEWNODEUNCHECKED_STR: handle_new_node,
+        FL.CLONENODE_STR: handle_clone_node,
+        FL.NEW_STR: handle_node_new,
+        FL.APPENDINPUT: handle_append_input,
+        FL.REPLACEINPUT: handle_replace_input,
+        FL.NODEKILL: handle_node_kill,
+        FL.REMOVEUSE: handle_remove_use,
+    }
+    FUNCTIONS = tuple(HANDLER_OF)
+    HANDLERS = IP.dispatch_table(HANDLER_OF)
+
+    def result(self):
+        """This function returns the formed graph data.
+
+        returns:
+            (EventLog) event log of the graph, whose views are the graph
+            data dictionaries.
+        """
+
+        return self.events.log()
 
 def removeuse(
-        re_inst: list, removed_usage_nodes: dict, remove_use_completed: list,
-        node_and_inputs: dict, phase: str, phase_id: int
+        re_inst: list, events: EL.EventRecorder, remove_use_completed: list,
+        node_and_inputs: dict
 ):
     """This function identifies an instruction that node is still alive,
     but the usage of it has been removed that the node will not be
@@ -205,10 +256,9 @@ def removeuse(
 
     args:
         re_inst (list): restructured trace line.
-        removed_usage_nodes (dict): holder for nodes that was removed with the usage.
+        events (EventRecorder): recorder of the graph events.
         remove_use_completed (list): boolean holder list.
         node_and_inputs (dict): dictionary of node and its input node list.
-        phase (str): current phase.
 
     returns:
         None.
@@ -221,23 +271,22 @@ def removeuse(
     if asm_inst[0] == "add" and asm_inst[1][0] == "rdi" and not remove_use_completed[0]:
         value = get_value(rw_insts, "r", "rdi")
         if value in node_and_inputs:
-            removed_usage_nodes[value] = [phase, phase_id]
+            events.remove_use(value)
         remove_use_completed[0] = True
     elif X86Op == X86.RET[1]:
         remove_use_completed[0] = False
 
 def node_kill(
-        re_inst: list, killed_nodes: dict, node_kill_completed: list,
-        node_and_inputs: dict, phase: str, phase_id: int
+        re_inst: list, events: EL.EventRecorder, node_kill_completed: list,
+        node_and_inputs: dict
 ):
     """This function handles node kill instructions.
 
     args:
         re_inst (list): restructured instruction.
-        killed_nodes (dict): dictionary of killed nodes mapped with phase that it was killed.
+        events (EventRecorder): recorder of the graph events.
         node_kill_completed (list): flag holder.
         node_and_inputs (dict): dictionary of node and its input node list.
-        phase (str): current phase.
 
     returns:
         None.
@@ -250,7 +299,7 @@ def node_kill(
     if asm_inst[0] == "mov" and "rdi" in asm_inst[1][1] and not node_kill_completed[0]:
         value = get_value(rw_insts, "r", "rdi")
         if value in node_and_inputs:
-            killed_nodes[value] = [phase, phase_id]
+            events.kill(value)
         node_kill_completed[0] = True
     elif X86Op == X86.RET[1]:
         node_kill_completed[0] = False
@@ -259,8 +308,7 @@ def node_kill(
 def new_node_gen(
                     re_inst: list, line: str, input_nodes: list, initial_nodes: list, bytecode_nodes: list,
                     node_and_inputs: dict, current_node: list, new_node_map: dict, phase: str,
-                    node_to_phase: dict, phase_to_nodes: dict, line_number: int, node_gen_line: dict,
-                    node_to_phase_id: dict, phase_id: int
+                    line_number: int, events: EL.EventRecorder
 ):
     """This function handles new node generation instructions.
 
@@ -273,7 +321,8 @@ def new_node_gen(
         current_node (list): current new node.
         new_node_map (dict): dictionary holding weired instruction's node adddresses.
         phase (str): current phase name.
-        node_to_phase (dict): generated node-to-phase dictionary.
+        line_number (int): trace line number of the instruction.
+        events (EventRecorder): recorder of the graph events.
 
     returns:
         (list, list) list of input nodes and list of bytecode nodes in input nodes list.
@@ -299,9 +348,8 @@ def new_node_gen(
     elif X86Op in X86.RET:
         input_nodes, bytecode_nodes = complete_node_gen(
                                         current_node, initial_nodes, bytecode_nodes,
-                                        input_nodes, node_and_inputs, node_to_phase,
-                                        phase_to_nodes, phase, line_number, node_gen_line,
-                                        node_to_phase_id, phase_id
+                                        input_nodes, node_and_inputs, phase, line_number,
+                                        events
         )
     return input_nodes, bytecode_nodes
 
@@ -419,9 +467,9 @@ def get_new_node(current_node: list, re_inst: list, line: str, new_node_map: dic
 
     w_value = get_value(rw_insts, "w", "rax")
     current_node[0] = w_value
-    if w_value and r_value != w_value:
+    if w_value is not None and r_value != w_value:
        new_node_map[r_value] = w_value
-    if not current_node[0] and asm_inst[0] == "push":
+    if current_node[0] is None and asm_inst[0] == "push":
         current_node[0] = r_value
     # BELOW EXPLANATION DOES NOT APPLY IF WE RUN D8 WITH --single-threaded flag on.
     # I suspect there is a tracing tool issues that read and write values differ
@@ -432,13 +480,12 @@ def get_new_node(current_node: list, re_inst: list, line: str, new_node_map: dic
     # if r_value != w_value:
     #    new_node_map[w_value] = r_value
 
-    assert (current_node[0]), f"ERROR: current_node is empty - {line} - {read_from}"
+    assert (current_node[0] is not None), f"ERROR: current_node is empty - {line} - {read_from}"
 
 def complete_node_gen(
                         current_node: list, initial_nodes: list, bytecode_nodes: list,
-                        input_nodes: list, node_and_inputs: dict, node_to_phase: dict,
-                        phase_to_nodes: dict, phase: str, line_number: int, node_gen_line: dict,
-                        node_to_phase_id: dict, phase_id: int
+                        input_nodes: list, node_and_inputs: dict, phase: str, line_number: int,
+                        events: EL.EventRecorder
 ):
     """This function add new node to node_and_inputs dict as key and input_nodes
     as key's value.
@@ -449,8 +496,9 @@ def complete_node_gen(
         bytecode_nodes (list): initial bytecode node in the input nodes.
         input_nodes (list): input nodes to the new node.
         node_and_inputs(dict): dictionary of node and its input node list.
-        node_to_phase (dict): generated node-to-phase dictionary.
         phase (str): current phase name.
+        line_number (int): trace line number of the instruction.
+        events (EventRecorder): recorder of the graph events.
 
     returns:
         (list, list) empty lists.
@@ -471,19 +519,8 @@ def complete_node_gen(
                 \nnew node is being generated.\
                 \nline number: {line_number}"
 
-    # Populate phase_to_nodes dictionary.
-    if phase not in phase_to_nodes:
-        phase_to_nodes[phase] = [current_node[0]]
-    else:
-        phase_to_nodes[phase].append(current_node[0])
-    # Populate node_to_phase dictionary.
-    if current_node[0] not in node_to_phase:
-        node_to_phase[current_node[0]] = phase
-    # Populate node_gen_line dictionary
-    if current_node[0] not in node_gen_line:
-        node_gen_line[current_node[0]] = line_number
-    if current_node[0] not in node_to_phase_id:
-        node_to_phase_id[current_node[0]] = phase_id
+    # The phase, phase id, and line of the node are those of the event.
+    events.new_node(current_node[0], input_nodes)
 
     # Reset temporary holders to their default.
     # current_node[0] = None
@@ -494,7 +531,7 @@ def append_input(
                 re_inst: list, line: str, append_completed: list,
                 target_node: list, append_node: list, target_line: str,
                 append_line: str, node_and_inputs: dict,
-                phase: str, append_input_phase: dict, phase_id: int
+                events: EL.EventRecorder
 ):
     """This function handled input appending instructions and update
     node_and_inputs dictionary.
@@ -508,8 +545,7 @@ def append_input(
         target_line (str): line that target node was collected.
         append_node (str): line that append node was collected.
         node_and_inputs(dict): dictionary of node and its input node list.
-        phase (str): current phase name.
-        append_input_phase (dict): append input occured phase dictionary.
+        events (EventRecorder): recorder of the graph events.
 
     returns:
         None.
@@ -545,13 +581,13 @@ def append_input(
         append_line[0] = line
     elif X86Op == X86.RET[1]:
         assert (
-                target_node[0]
+                target_node[0] is not None
                 and target_node[0] in node_and_inputs
         ), f"ERROR: target_node [{target_node[0]}] is not in\
              \nnode_and_inputs dictionary - {target_line[0]}\
              \n{list(node_and_inputs.keys())}"
         assert (
-                append_node[0]
+                append_node[0] is not None
                 and append_node[0] in node_and_inputs
         ), f"ERROR: append_node [{append_node[0]}] is not in\
              \nnode_and_inputs dictionary - {append_line[0]}"
@@ -560,11 +596,7 @@ def append_input(
         if append_node[0] not in node_and_inputs[target_node[0]]:
             node_and_inputs[target_node[0]].append(append_node[0])
             # Keep track at which phase a new input was appended.
-            info = [phase, append_node[0], phase_id]
-            if target_node[0] in append_input_phase:
-                append_input_phase[target_node[0]].append(info)
-            else:
-                append_input_phase[target_node[0]] = [info]
+            events.append_input(target_node[0], append_node[0])
 
         # Reset flag list.
         append_completed[0] = False
@@ -575,8 +607,7 @@ def replace_input(
                  main_node: list, main_node_line: list, to_node: list,
                  to_node_line: list, from_node: list,
                  from_node_line: list, new_node_map: list,
-                 node_and_inputs: list, phase: str,
-                 replace_input_phase: dict, phase_id: int
+                 node_and_inputs: list, events: EL.EventRecorder
 ):
     """This function handles replace input instructions.
 
@@ -592,8 +623,7 @@ def replace_input(
         from_node_line (list): line where node to be replaced was collected.
         new_node_map (dict): dictionary holding weired instruction's node adddresses.
         node_and_inputs (dict): dictionary of node and its input node list.
-        phase (str): current phase name.
-        replace_input_phase (dict): phase where input node was replaced.
+        events (EventRecorder): recorder of the graph events.
 
     returns:
         None.
@@ -612,8 +642,7 @@ def replace_input(
         ):
             finalise_replace(
                     main_node, from_node, to_node,
-                    new_node_map, node_and_inputs, replace_input_phase,
-                    phase, phase_id
+                    new_node_map, node_and_inputs, events
             )
             replace_completed[3] = True
         # Reset flag list.
@@ -636,15 +665,13 @@ def replace_input(
     elif X86Op == X86.RET[1]:
         finalise_replace(
                 main_node, from_node, to_node, new_node_map,
-                node_and_inputs, replace_input_phase, phase,
-                phase_id
+                node_and_inputs, events
         )
         replace_completed[3] = True
 
 def finalise_replace(
         main_node: list, from_node: list, to_node: list,
-        new_node_map: dict, node_and_inputs: dict, replace_input_phase: dict,
-        phase: str, phase_id: int
+        new_node_map: dict, node_and_inputs: dict, events: EL.EventRecorder
 ):
     """This function finalises replacing input nodes.
 
@@ -654,19 +681,18 @@ def finalise_replace(
         to_node (list): node to replace.
         new_node_map (dict): dictionary holding weired instruction's node adddresses.
         node_and_inputs (dict): dictionary of node and its input node list.
-        replace_input_phase (dict): phase where input node was replaced.
-        phase (str): current phase name.
+        events (EventRecorder): recorder of the graph events.
     
     returns:
         None.
     """
     assert (
-            main_node[0]
+            main_node[0] is not None
             and main_node[0] in node_and_inputs
     ), f"ERROR: main_node [{main_node[0]}] is not in node_and_inputs dictionary - {main_node_line}"
 
     assert (
-            from_node[0]
+            from_node[0] is not None
             and from_node[0] in node_and_inputs
     ), f"ERROR: from_node [{from_node[0]}] is not in node_and_inputs\
             \n- {from_node_line[0]}"
@@ -679,23 +705,22 @@ def finalise_replace(
         ), f"ERROR: to_noed is neither in node_and_inputs and new_node_map - {to_node_line[0]}"
         to_node[0] = new_node_map[to_node]
     assert (
-            to_node[0]
+            to_node[0] is not None
             and to_node[0] in node_and_inputs
     ), f"ERROR: to_node [{to_node[0]}] is not in node_and_inputs dictionary - {to_node_line[0]}"
 
-    info = [phase, None, None, phase_id]
+    removed, added = None, None
     # Not all nodes are part of the input nodes. Thus, remove them
     # only if they exist in the list.
     if from_node[0] in node_and_inputs[main_node[0]]:
         node_and_inputs[main_node[0]].remove(from_node[0])
-        info[1] = from_node[0]
+        removed = from_node[0]
     if to_node[0] not in node_and_inputs[main_node[0]]:
         node_and_inputs[main_node[0]].append(to_node[0])
-        info[2] = to_node[0]
-        if main_node[0] in replace_input_phase:
-            replace_input_phase[main_node[0]].append(info)
-        else:
-            replace_input_phase[main_node[0]] = [info]
+        added = to_node[0]
+    # The replacement is kept in replace_input_phase only if to_node was added.
+    if removed is not None or added is not None:
+        events.replace_input(main_node[0], removed, added)
 
 def get_value(rw_insts: list, op: str, reg: str):
     """This function finds the requested value from
@@ -706,7 +731,7 @@ def get_value(rw_insts: list, op: str, reg: str):
         reg (str): name of register to seek.
 
     returns:
-        (str) found address.
+        (int) found address or value.
     """
 
     value = None
@@ -741,13 +766,13 @@ def compose_all_paths(node_and_inputs: dict):
     
     return AllPaths
 
-def get_node_paths(input_nodes: list, node: str, node_and_inputs: dict, paths: dict):
+def get_node_paths(input_nodes: list, node: int, node_and_inputs: dict, paths: dict):
     """This function recursively scans and find paths of main node and its input
     nodes.
 
     args:
         input_nodes (list): list of input nodes of node.
-        node (str): Address of node.
+        node (int): Address of node.
         node_and_inputs (dict): dictionary of all nodes and their input nodes.
         paths (dict): dictionary of node and paths.
 
@@ -863,19 +888,28 @@ def restructure_dict(node_and_inputs: dict):
     for node, inputs in node_and_inputs.items():
         if inputs:
             for inode in inputs:
-                src = inode.lstrip('0')
-                des = node.lstrip('0')
-                if src and des:
-                    linked_nodes = [f"0x{src}", f"0x{des}"]
+                if inode and node:
+                    linked_nodes = [IP.address_text(inode), IP.address_text(node)]
                     restructured_dict["nodes"].append(linked_nodes)
 
     return restructured_dict
 
+def address_texts(addresses: list):
+    """This function converts the addresses to the hex form written out.
+
+    args:
+        addresses (list): addresses, or None.
+
+    returns:
+        (list) addresses in hex, or None.
+    """
+
+    return [IP.address_text(address) if address is not None else None for address in addresses]
 
 def read_file(filename: str) -> list:
 
     try:
-        with open(filename) as f:
+        with TR.open_file(filename) as f:
             return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
@@ -919,6 +953,7 @@ if __name__ == "__main__":
     initial_nodes = None
     with open ("initial_nodes.json") as json_f:
         initial_nodes = json.load(json_f)
+    initial_nodes["nodes"] = [IP.hex_value(node) for node in initial_nodes["nodes"]]
     print ("Initial Nodes============")
     print (initial_nodes)
     print ("=========================\n")
@@ -959,13 +994,13 @@ if __name__ == "__main__":
     print ("All Nodes and Inputs=====")
     print ("Total number of generated nodes: ", len(node_and_inputs))
     for node in node_and_inputs:
-        print (node.lstrip('0'))
+        print (IP.address_text(node))
     print ("=========================\n")
     phase_id_to_phase = {}
     for node, input_nodes in node_and_inputs.items():
         phase = node_to_phase[node]
         phase_id = node_to_phase_id[node]
-        print ("Node: ", node, ", Inputs: ", input_nodes,
+        print ("Node: ", IP.address_text(node), ", Inputs: ", address_texts(input_nodes),
                ", Phase: ", phase,
                ", Phase ID: ", phase_id
         )
@@ -983,7 +1018,7 @@ if __name__ == "__main__":
     print ("=========================\n")
     print ("Killed Nodes=============")
     for node, phase in killed_nodes.items():
-        print (f"Node: {node} Killed at Phase {phase}")
+        print (f"Node: {IP.address_text(node)} Killed at Phase {phase}")
     print ("=========================\n")
     print ("Removed Use Nodes=============")
     for node, phase in removed_usage_nodes.items():
@@ -994,30 +1029,44 @@ if __name__ == "__main__":
     final_to_init = {}
     AllPaths = compose_all_paths(node_and_inputs)
     for node, paths in AllPaths.items():
-        print ("Node: ", node)
+        print ("Node: ", IP.address_text(node))
         for input_node, path in paths.items():
-            print (input_node, path)
+            print (IP.address_text(input_node), address_texts(path))
     print ("=========================")
 
     # Write and save data to files.
     restructured_dict = restructure_dict(node_and_inputs)
+    # The addresses are written in their hex form.
+    text = IP.address_text
     with open(f"{directory}/Graph.json", "w") as json_file:
-        json.dump(node_and_inputs, json_file)
+        json.dump({text(node): address_texts(inputs) for node, inputs in node_and_inputs.items()}, json_file)
     with open(f"{directory}/PhaseToNodes.json", "w") as json_file:
-        json.dump(phase_to_nodes, json_file)
+        json.dump({phase: address_texts(nodes) for phase, nodes in phase_to_nodes.items()}, json_file)
     with open(f"{directory}/NodeToPhase.json", "w") as json_file:
-        json.dump(node_to_phase, json_file)
+        json.dump({text(node): phase for node, phase in node_to_phase.items()}, json_file)
     with open(f"{directory}/AppendInputs.json", "w") as json_file:
-        json.dump(append_input_phase, json_file)
+        json.dump({
+            text(node): [[phase, text(ipt), phase_id] for phase, ipt, phase_id in infos]
+            for node, infos in append_input_phase.items()
+        }, json_file)
     with open(f"{directory}/ReplaceInputs.json", "w") as json_file:
-        json.dump(replace_input_phase, json_file)
+        json.dump({
+            text(node): [[phase] + address_texts([old, new]) + [phase_id] for phase, old, new, phase_id in infos]
+            for node, infos in replace_input_phase.items()
+        }, json_file)
     with open(f"{directory}/KilledNodes.json", "w") as json_file:
-        json.dump(killed_nodes, json_file)
+        json.dump({text(node): phase for node, phase in killed_nodes.items()}, json_file)
     with open(f"{directory}/RemoveUsage.json", "w") as json_file:
-        json.dump(removed_usage_nodes, json_file)
+        json.dump({text(node): phase for node, phase in removed_usage_nodes.items()}, json_file)
     with open(f"{directory}/Data.json", "w") as json_file:
         json.dump(restructured_dict, json_file)
     with open(f"{directory}/RawData.json", "w") as json_file:
-        json.dump(AllPaths, json_file)
+        json.dump({
+            text(node): {text(ipt): address_texts(path) for ipt, path in paths.items()}
+            for node, paths in AllPaths.items()
+        }, json_file)
     with open(f"{directory}/NodeToOpcode.json", "w") as json_file:
-        json.dump(node_to_opcode, json_file)
+        json.dump({
+            text(node): [IP.opcode_text(opcode), text(op_address)]
+            for node, (opcode, op_address) in node_to_opcode.items()
+        }, json_file)
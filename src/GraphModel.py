@@ -0,0 +1,214 @@
+"""
+    This program holds the graph and node objects that GraphAnalyser and
+    the visualization (GraphMerger and Simplifier) work on.
+
+    A graph of graph_former (GraphCreator.GraphFormer.result) is
+    restructured to a Graph once, and the graph store keeps the
+    restructured graphs of the recently used PoCs (GraphStore.graph), so
+    comparing a graph with many others does not restructure it again.
+    The nodes use __slots__ instead of a per-object dictionary, and the
+    input nodes of a node are held as the ids of the nodes, i.e., their
+    index in Graph.nodes, which are resolved through the graph of the
+    node (Node.input_node).
+
+    The restructured graphs are shared, so they must not be changed.
+    Copy a graph or node before changing it, e.g., GraphMerger.
+
+    Example,
+        $python3 GraphModel.py -f <Graphs_*.pkl>
+"""
+
+import os, sys
+import pickle
+import argparse
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import GraphCreator as GC
+import CSRGraph as CSR
+
+# Shared default of the node data that a node does not have.
+EMPTY = ()
+
+class Graph:
+    """Restructured graph of a PoC."""
+    __slots__ = (
+        "id", "nodes", "phase_to_nodes", "id_to_nodes", "id_to_phase", "grouped_phases"
+    )
+
+    def __init__(self, id: int = -1):
+        """
+        args:
+            id (int): file number of the PoC.
+        """
+
+        self.id = id
+        self.nodes = []
+        self.phase_to_nodes = {}
+        self.id_to_nodes = {}
+        self.id_to_phase = {}
+        self.grouped_phases = {}
+
+    @property
+    def size(self):
+        return len(self.nodes)
+
+class Node:
+    """Node of a restructured graph. The node id is its index in the
+    nodes of its graph.
+    """
+    __slots__ = (
+        "id", "graph", "address", "phase", "phase_id", "opcode", "inputs",
+        "append_inputs", "replaced_inputs", "killed_at", "removed_usage_at"
+    )
+
+    def __init__(
+            self, id: int, graph: Graph, address: int, phase: str, phase_id: int,
+            opcode: list, inputs: tuple, append_inputs=EMPTY, replaced_inputs=EMPTY,
+            killed_at=EMPTY, removed_usage_at=EMPTY
+    ):
+        """
+        args:
+            id (int): node id.
+            graph (Graph): graph of the node.
+            address (int): node address.
+            phase (str): phase where the node was generated.
+            phase_id (int): phase id where the node was generated.
+            opcode (list): opcode and its address.
+            inputs (tuple): node ids of the input nodes.
+            append_inputs (list): [phase, input, phase id] of the appended inputs.
+            replaced_inputs (list): [phase, from input, to input, phase id] of
+            the replaced inputs.
+            killed_at (list): phase and phase id where the node was killed.
+            removed_usage_at (list): phase and phase id where the usage of the
+            node was removed.
+        """
+
+        self.id = id
+        self.graph = graph
+        self.address = address
+        self.phase = phase
+        self.phase_id = phase_id
+        self.opcode = opcode
+        self.inputs = inputs
+        self.append_inputs = append_inputs
+        self.replaced_inputs = replaced_inputs
+        self.killed_at = killed_at
+        self.removed_usage_at = removed_usage_at
+
+    @property
+    def graph_id(self):
+        return self.graph.id
+
+    @property
+    def input_length(self):
+        return len(self.inputs)
+
+    def input_node(self, i: int):
+        """This function returns the i-th input node.
+
+        args:
+            i (int): index of the input.
+
+        returns:
+            (Node) input node.
+        """
+
+        return self.graph.nodes[self.inputs[i]]
+
+def RestructureGraph(Org_Graph: list, filenumber: str = "-1"):
+    """This function receives a list of multiple data structures, which
+    represent a graph, and restructure them to a class object graph.
+
+    args:
+        Org_Graph (list): a list of multiple data structures representing
+        a graph.
+
+        NodeInputs    = Org_Graph[0]
+        AppendInputs  = Org_Graph[1]
+        ReplaceInputs = Org_Graph[2]
+        KilledNodes   = Org_Graph[3]
+        RemovedUsage  = Org_Graph[4]
+        PhaseToNodes  = Org_Graph[5]
+        NodeToPhase   = Org_Graph[6]
+        NodeToOpcode  = Org_Graph[7]
+        NodeToLine    = Org_Graph[8]
+        IdToPhase     = Org_Graph[9]
+        NodeToPhaseId = Org_Graph[10]
+
+        filenumber (str): file number of the PoC.
+
+    returns:
+        (Graph) restructured graph object.
+    """
+
+    Re_Graph = Graph(int(filenumber))
+    Re_Graph.phase_to_nodes = Org_Graph[5]
+    Re_Graph.id_to_phase = Org_Graph[9]
+
+    Re_Graph.grouped_phases = GC.group_phases(Org_Graph[9])
+
+    # The nodes get their ids in the order of NodeInputs.
+    AddressToId = {node_addr: i for i, node_addr in enumerate(Org_Graph[0])}
+
+    for node_addr, inputs in Org_Graph[0].items():
+        for input_addr in inputs:
+            assert (
+                    input_addr in AddressToId
+            ), f"ERROR: Input {input_addr} of {node_addr} is not a node of the graph."
+        # Generate a new node object and populate data.
+        node = Node(
+                AddressToId[node_addr], Re_Graph, node_addr,
+                Org_Graph[6][node_addr], Org_Graph[10][node_addr], Org_Graph[7][node_addr],
+                tuple([AddressToId[input_addr] for input_addr in inputs]),
+                Org_Graph[1].get(node_addr, EMPTY), Org_Graph[2].get(node_addr, EMPTY),
+                Org_Graph[3].get(node_addr, EMPTY), Org_Graph[4].get(node_addr, EMPTY)
+        )
+        # Add constructed node to graph object.
+        Re_Graph.nodes.append(node)
+
+        if node.phase_id not in Re_Graph.id_to_nodes:
+            Re_Graph.id_to_nodes[node.phase_id] = [node]
+        else:
+            Re_Graph.id_to_nodes[node.phase_id].append(node)
+
+    return Re_Graph
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the graph file.
+
+    returns:
+        (str) graph file.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="A graph file with all graphs in a single file (Graphs_*.pkl)."
+    )
+    args = parser.parse_args()
+
+    return args.file
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename = argument_parser()
+    with open(filename, "rb") as bin_file:
+        graphs = pickle.load(bin_file)
+    for filenumber, graph in graphs.items():
+        # The graphs of the earlier runs hold the addresses as hex strings.
+        restructured = RestructureGraph(CSR.CSRGraph(graph).to_legacy(), filenumber)
+        print (
+            filenumber, ":", restructured.size, "nodes,",
+            len(restructured.id_to_nodes), "phase ids"
+        )
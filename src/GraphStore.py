@@ -0,0 +1,394 @@
+"""
+    This program stores the graphs of Main as one shard file per PoC
+    (graph_<file number>.pkl) in the graph directory, plus a small
+    manifest (Graphs.json) with the JIT compilation status, node count,
+    and phase count of each PoC.
+
+    A shard is written as soon as its graph is created, so the graphs
+    created before a run stops are kept. The graphs are loaded only when
+    they are used, and the recently used ones are kept decoded in memory,
+    so analysing a pair of graphs or merging a subset of them only reads
+    those shards instead of the graphs of all PoCs.
+
+    The shards and the decoded graphs are held as the event logs of
+    graph_former (EventLog), and the graph data dictionaries are the
+    views of the log when the graph is read from the store. A graph
+    given as the dictionaries, e.g., an imported graph, cannot be turned
+    back into its events, so it is held as CSRGraph arrays, as are the
+    shards of the earlier runs. The shards of the runs before them hold
+    the dictionaries, and they are converted when loaded. The graphs
+    restructured for the analysis (GraphModel.Graph) are kept the
+    same way, so each graph is restructured once while it is used.
+
+    Graph files with all graphs in a single file, e.g., Graphs.pkl of
+    the earlier runs or Visualization/Data/Graphs_*.pkl, are imported
+    into a store with import_graphs.
+
+    Example,
+        $python3 GraphStore.py -d <graph directory> -i <Graphs_*.pkl>
+"""
+
+import os, sys
+import json
+import pickle
+import argparse
+import threading
+import collections
+import collections.abc
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import CSRGraph as CSR
+import EventLog as EL
+import GraphModel as GMD
+
+MANIFEST = "Graphs.json"
+# Number of decoded graphs kept in memory by default.
+CACHE_SIZE = 16
+# Indices of the graph data dictionaries (GraphCreator.graph_former)
+# counted in the manifest.
+NODE_AND_INPUTS = 0
+PHASE_TO_NODES = 5
+
+def shard_file(directory: str, filenumber: str):
+    """This function returns the shard file path of the file number.
+
+    args:
+        directory (str): graph directory.
+        filenumber (str): file number.
+
+    returns:
+        (str) shard file path.
+    """
+
+    return directory + f"/graph_{str(filenumber)}.pkl"
+
+def write_shard(directory: str, filenumber: str, graph: tuple):
+    """This function writes the graph to its shard file. It does not
+    change the manifest, so it can run in a worker process, while the
+    returned entry is added to the store by the main process.
+
+    args:
+        directory (str): graph directory.
+        filenumber (str): file number.
+        graph (EventLog): event log of the graph, graph data dictionaries,
+        or None if the PoC was not jit compiled.
+
+    returns:
+        (dict) manifest entry of the graph.
+    """
+
+    if graph is None:
+        return {"jitted": False}
+
+    shard = shard_file(directory, filenumber)
+    # The shard is replaced at once, so a stopped run leaves no partial shard.
+    with open(shard + ".tmp", "wb") as bin_file:
+        pickle.dump(
+            graph if isinstance(graph, EL.EventLog) else CSR.CSRGraph(graph),
+            bin_file, protocol=pickle.HIGHEST_PROTOCOL
+        )
+    os.replace(shard + ".tmp", shard)
+
+    return {
+        "jitted": True,
+        "nodes": len(graph[NODE_AND_INPUTS]),
+        "phases": len(graph[PHASE_TO_NODES]),
+    }
+
+def file_number_order(filenumber: str):
+    """This is a helper function to order the file numbers numerically,
+    if they are digits.
+
+    args:
+        filenumber (str): file number.
+
+    returns:
+        (tuple) sort key.
+    """
+
+    if filenumber.isdigit():
+        return (0, int(filenumber), filenumber)
+
+    return (1, 0, filenumber)
+
+class GraphStore(collections.abc.Mapping):
+    """File number-to-graph mapping over the shards of a graph directory.
+    Only the jit compiled PoCs have graphs. The graphs are decoded on
+    demand and the least recently used ones are dropped from memory. The
+    store can be shared by multiple threads of a single process.
+    """
+    def __init__(self, directory: str, cache_size: int = CACHE_SIZE):
+        """
+        args:
+            directory (str): graph directory.
+            cache_size (int): number of decoded graphs kept in memory.
+        """
+
+        self.directory = directory
+        self.filename = directory + "/" + MANIFEST
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        # File number-to-decoded EventLog or CSRGraph, in the order of their last use.
+        self.cache = collections.OrderedDict()
+        # File number-to-restructured Graph, in the order of their last use.
+        self.graphs = collections.OrderedDict()
+        # {__filenumber__: {"jitted": __bool__, "nodes": __int__, "phases": __int__}}.
+        self.entries = {}
+        if os.path.exists(self.filename):
+            with open(self.filename) as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        """This function writes the manifest to the file. The file is
+        replaced at once, so a stopped run leaves a complete manifest.
+
+        returns:
+            None.
+        """
+
+        tmp = self.filename + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp, self.filename)
+
+    def add(self, filenumber: str, entry: dict):
+        """This function adds the entry of a shard written by write_shard.
+
+        args:
+            filenumber (str): file number.
+            entry (dict): manifest entry of the graph.
+
+        returns:
+            None.
+        """
+
+        with self.lock:
+            self.entries[str(filenumber)] = entry
+            self.cache.pop(str(filenumber), None)
+            self.graphs.pop(str(filenumber), None)
+            self.save()
+
+    def put(self, filenumber: str, graph: tuple):
+        """This function writes the graph to its shard and adds it.
+
+        args:
+            filenumber (str): file number.
+            graph (EventLog): event log of the graph, graph data
+            dictionaries, or None if the PoC was not jit compiled.
+
+        returns:
+            None.
+        """
+
+        self.add(filenumber, write_shard(self.directory, filenumber, graph))
+
+    def remove(self, filenumber: str):
+        """This function removes the graph and its shard.
+
+        args:
+            filenumber (str): file number.
+
+        returns:
+            None.
+        """
+
+        with self.lock:
+            self.entries.pop(str(filenumber), None)
+            self.cache.pop(str(filenumber), None)
+            self.graphs.pop(str(filenumber), None)
+            self.save()
+        if os.path.exists(shard_file(self.directory, filenumber)):
+            os.remove(shard_file(self.directory, filenumber))
+
+    def clear(self):
+        """This function removes all graphs and their shards, including
+        the shards that are not in the manifest.
+
+        returns:
+            None.
+        """
+
+        with self.lock:
+            self.entries = {}
+            self.cache.clear()
+            self.graphs.clear()
+            self.save()
+        for filename in os.listdir(self.directory):
+            if filename.startswith("graph_") and filename.endswith((".pkl", ".pkl.tmp")):
+                os.remove(self.directory + "/" + filename)
+
+    def jitted(self):
+        """This function returns the JIT compilation status of the PoCs.
+
+        returns:
+            (dict) file number-to-jitted status.
+        """
+
+        with self.lock:
+            return {
+                filenumber: self.entries[filenumber]["jitted"]
+                for filenumber in sorted(self.entries, key=file_number_order)
+            }
+
+    def shard(self, filenumber: str):
+        """This function returns the graph as it is held in the shard,
+        without converting it to the dictionaries.
+
+        args:
+            filenumber (str): file number.
+
+        returns:
+            (EventLog) event log of the graph.
+            (CSRGraph) graph of the PoC, if it was not stored as events.
+        """
+
+        filenumber = str(filenumber)
+        with self.lock:
+            if filenumber in self.cache:
+                self.cache.move_to_end(filenumber)
+                return self.cache[filenumber]
+            if not self.entries.get(filenumber, {}).get("jitted"):
+                raise KeyError(filenumber)
+
+        with open(shard_file(self.directory, filenumber), "rb") as bin_file:
+            graph = pickle.load(bin_file)
+        # A shard of an earlier run holds the dictionaries.
+        if isinstance(graph, tuple):
+            graph = CSR.CSRGraph(graph)
+
+        with self.lock:
+            self.cache[filenumber] = graph
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return graph
+
+    def graph(self, filenumber: str):
+        """This function returns the graph restructured for the analysis.
+        The graph is shared by the callers, so it must not be changed.
+
+        args:
+            filenumber (str): file number.
+
+        returns:
+            (Graph) restructured graph of the PoC.
+        """
+
+        filenumber = str(filenumber)
+        with self.lock:
+            if filenumber in self.graphs:
+                self.graphs.move_to_end(filenumber)
+                return self.graphs[filenumber]
+
+        graph = GMD.RestructureGraph(self[filenumber], filenumber)
+
+        with self.lock:
+            self.graphs[filenumber] = graph
+            while len(self.graphs) > self.cache_size:
+                self.graphs.popitem(last=False)
+
+        return graph
+
+    def __getitem__(self, filenumber: str):
+        return self.shard(filenumber).to_legacy()
+
+    def __iter__(self):
+        return iter([filenumber for filenumber, jitted in self.jitted().items() if jitted])
+
+    def __len__(self):
+        with self.lock:
+            return sum(1 for entry in self.entries.values() if entry["jitted"])
+
+def load_graphs(filename: str):
+    """This function loads all graphs in a single graph file, e.g.,
+    Graphs_*.pkl. The file is either a pickled file number-to-graph
+    dictionary or a sequence of them appended one after another. A
+    record cut off by a stopped run is ignored.
+
+    args:
+        filename (str): graph file path.
+
+    returns:
+        (dict) file number-to-graphs.
+    """
+
+    graphs = {}
+    with open(filename, "rb") as bin_file:
+        while True:
+            try:
+                graphs.update(pickle.load(bin_file))
+            except EOFError:
+                break
+            except pickle.UnpicklingError:
+                print ("load_graphs: incomplete record at the end of", filename)
+                break
+
+    return graphs
+
+def import_graphs(filename: str, directory: str):
+    """This function imports the graphs in a single graph file into the
+    store of the directory.
+
+    args:
+        filename (str): graph file path, e.g., Visualization/Data/Graphs_5129.pkl.
+        directory (str): graph directory.
+
+    returns:
+        (GraphStore) graph store of the directory.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    store = GraphStore(directory)
+    graphs = load_graphs(filename)
+    for filenumber in sorted(graphs, key=file_number_order):
+        store.put(filenumber, graphs[filenumber])
+
+    return store
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the graph directory.
+
+    returns:
+        (str) graph directory.
+        (list) graph files to import.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-d",
+        "--directory",
+        type=str,
+        help="A graph directory."
+    )
+    parser.add_argument(
+        "-i",
+        "--imports",
+        type=str,
+        nargs="+",
+        default=[],
+        help="Graph files with all graphs in a single file (Graphs_*.pkl) to import."
+    )
+    args = parser.parse_args()
+
+    return args.directory, args.imports
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    directory, imports = argument_parser()
+    for filename in imports:
+        import_graphs(filename, directory)
+    store = GraphStore(directory)
+    for filenumber, entry in store.entries.items():
+        if entry["jitted"]:
+            print (filenumber, ":", entry["nodes"], "nodes,", entry["phases"], "phases")
+        else:
+            print (filenumber, ": not jit compiled")
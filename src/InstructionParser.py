@@ -0,0 +1,622 @@
+"""
+    This program parses the trace lines of the ascii trace files. All
+    analysis stages share the parser in this file.
+
+    The ascii file generated using updated trace2ascii under uacs-lynx
+    conveniently delimited the line with semi-colons (;). Most of the
+    trace lines are rejected by the analysis stages on the function
+    name alone, so only the program and function fields are decoded
+    when a line is parsed. The opcode, assembly instruction, and
+    memory/register accesses are decoded once they are first accessed.
+
+    Each distinct function name is interned once into a small integer
+    id, and the FunctionLists categories of the function, including the
+    regex matches, are computed when the id is assigned. Thus, the
+    stages can look up a table indexed by the id instead of comparing
+    the long C++ names or matching the regexes on every line.
+
+    The instruction address, the memory addresses, and the R/W values
+    are parsed into integers once, so the stages compare, hash, and store
+    integers instead of the 16-digit hex strings. The number of hex
+    digits of each value is kept as its width, since it is the size of
+    the access, e.g., a byte write has a 2-digit value. The addresses are
+    converted back to the hex form only when they are written out.
+
+    Structure of the parsed instruction:
+        [0]: address (int),
+        [1]: program,
+        [2]: function,
+        [3]: opcode and operands,
+        [4]: asm instruction - {"asm_inst": [mnemonic, [operands]]},
+        [5:]: Memory and register access (R/W) - [r/w/mr/mw, register/address, value, width]
+
+    Example,
+        $python3 InstructionParser.py -f <ascii.out> -n <line number>
+"""
+
+import os, sys
+import re
+import argparse
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import TraceReader as TR
+import FunctionLists as FL
+
+# REGEX
+BETWEEN_BRACKET_REGEX = re.compile("\[(.*?)\]")
+OPT_PHASE_RE = re.compile(FL.OPT_PHASE_REGEX)
+PHASE_RE = re.compile(FL.PHASE_REGEX)
+ASSEMBLER_RE = re.compile(FL.ASSEMBLER_REGEX)
+TURBOASSEMBLER_RE = re.compile(FL.TURBOASSEMBLER_REGEX)
+INSTRUCTIONSELECTOR_RE = re.compile(FL.INSTRUCTIONSELECTOR_REGEX)
+
+# Function categories.
+OPT_PHASE           = 1 << 0    # PipelineImpl::Run<XPhase> - OPT_PHASE_REGEX.
+PHASE               = 1 << 1    # XPhase::Run - PHASE_REGEX.
+ASSEMBLER           = 1 << 2    # ASSEMBLER_REGEX.
+TURBOASSEMBLER      = 1 << 3    # TURBOASSEMBLER_REGEX.
+INSTRUCTIONSELECTOR = 1 << 4    # INSTRUCTIONSELECTOR_REGEX.
+BYTECODE_ACCESS     = 1 << 5    # Functions reading the bytecode array.
+
+# Interned functions. Each list is indexed by the function id.
+FUNCTION_IDS        = {}        # function name-to-id.
+RAW_FUNCTION_IDS    = {}        # function field as read in-to-id.
+FUNCTION_NAMES      = []        # function names.
+FUNCTION_CATEGORIES = []        # function categories.
+FUNCTION_PHASES     = []        # phase names of the phase functions.
+# Program field as read in-to-program name.
+PROGRAMS = {}
+
+EXCEPTION = "EXCEPTION"
+EXCEPTION_BYTES = EXCEPTION.encode()
+
+# Number of fields split eagerly: line index, address, program, and function.
+HEAD_FIELDS = 4
+
+class Instruction:
+    """Parsed trace line. It can be indexed in the same way as the
+    list that the instruction splitters used to return.
+    """
+    __slots__ = (
+        "raw", "head", "program", "function", "function_id",
+        "_rest", "_opcode", "_asm_inst", "_accesses",
+    )
+
+    def __init__(self, raw_line):
+        """
+        args:
+            raw_line (bytes or str): A single line of instruction read
+            in from the ascii trace file.
+        """
+
+        self.raw = raw_line
+        sep = b';' if isinstance(raw_line, bytes) else ';'
+        parts = raw_line.split(sep, HEAD_FIELDS)
+        # Everything after the last semi-colon is not a field.
+        if len(parts) > HEAD_FIELDS:
+            self.head = parts[1:HEAD_FIELDS]
+            self._rest = parts[HEAD_FIELDS]
+        else:
+            self.head = parts[1:-1]
+            self._rest = None
+        self.program = program_name(self.head[1]) if len(self.head) > 1 else None
+        if len(self.head) > 2:
+            self.function_id = raw_function_id(self.head[2])
+            self.function = FUNCTION_NAMES[self.function_id]
+        else:
+            self.function_id = None
+            self.function = None
+        self._opcode = None
+        self._asm_inst = None
+        self._accesses = None
+
+    @property
+    def line(self):
+        """(str) raw trace line."""
+        return decode(self.raw)
+
+    @property
+    def category(self):
+        """(int) categories of the function."""
+        if self.function_id is None:
+            return 0
+        return FUNCTION_CATEGORIES[self.function_id]
+
+    @property
+    def address(self):
+        """(int) instruction address."""
+        if not self.head:
+            raise IndexError(f"ERROR: Address does not exist - {self.line}")
+        return hex_value(decode(self.head[0]).strip())
+
+    @property
+    def rest(self):
+        """(list) fields after the function field, without the trailing piece."""
+        if isinstance(self._rest, (bytes, str)):
+            self._rest = decode(self._rest).split(';')[:-1]
+        elif self._rest is None:
+            self._rest = []
+        return self._rest
+
+    @property
+    def opcode(self):
+        """(str) x86 opcode and operands."""
+        if self._opcode is None:
+            rest = self.rest
+            if not rest:
+                raise IndexError(f"ERROR: Opcode does not exist - {self.line}")
+            self._opcode = rest[0].strip()
+        return self._opcode
+
+    @property
+    def operation(self):
+        """(str) assembly instruction text."""
+        rest = self.rest
+        if len(rest) < 2:
+            raise IndexError(f"ERROR: Assembly instruction does not exist - {self.line}")
+        return rest[1].strip()
+
+    @property
+    def asm_inst(self):
+        """(dict) {"asm_inst": [mnemonic, [operands]]}."""
+        if self._asm_inst is None:
+            self._asm_inst = {"asm_inst": split_asm_inst(self.operation)}
+        return self._asm_inst
+
+    @property
+    def accesses(self):
+        """(list) memory and register accesses."""
+        if self._accesses is None:
+            self._accesses = []
+            for elem in self.rest[2:]:
+                self._accesses.extend(split_accesses(elem))
+        return self._accesses
+
+    def __len__(self):
+        length = len(self.head)
+        if length == HEAD_FIELDS - 1:
+            length += min(len(self.rest), 2) + len(self.accesses)
+        return length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.start == 5 and key.stop is None and key.step is None:
+                return list(self.accesses)
+            return self.to_list()[key]
+
+        if key == 2 and self.function is not None:
+            return self.function
+        if key == 1 and self.program is not None:
+            return self.program
+        if key < 0:
+            return self.to_list()[key]
+        if key == 0:
+            return self.address
+        if len(self.head) == HEAD_FIELDS - 1:
+            if key == 3 and len(self.rest) > 0:
+                return self.opcode
+            if key == 4 and len(self.rest) > 1:
+                return self.asm_inst
+            if key >= 5 and key-5 < len(self.accesses):
+                return self.accesses[key-5]
+        raise IndexError(f"ERROR: Field {key} does not exist - {self.line}")
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if isinstance(other, Instruction):
+            other = other.to_list()
+        return self.to_list() == other
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def to_list(self):
+        """This function converts the instruction to the list that
+        the instruction splitters used to return.
+
+        returns:
+            (list) a list holding splitted instruction.
+        """
+
+        splitted_inst = [decode(elem).strip() for elem in self.head]
+        if splitted_inst:
+            splitted_inst[0] = self.address
+        if len(splitted_inst) == HEAD_FIELDS - 1:
+            if len(self.rest) > 0:
+                splitted_inst.append(self.opcode)
+            if len(self.rest) > 1:
+                splitted_inst.append(self.asm_inst)
+            splitted_inst.extend(self.accesses)
+
+        return splitted_inst
+
+def decode(value):
+    """This function decodes the value read in from the trace file.
+
+    args:
+        value (bytes or str): value to decode.
+
+    returns:
+        (str) decoded value.
+    """
+
+    if isinstance(value, bytes):
+        return value.decode()
+
+    return value
+
+def hex_value(text: str):
+    """This function parses the hex number of the trace, e.g., an address
+    or a R/W value, into an integer.
+
+    args:
+        text (str): hex number with or without 0x.
+
+    returns:
+        (int) parsed value.
+        (str) the text as it is, if it is not a hex number.
+    """
+
+    try:
+        return int(text, 16)
+    except ValueError:
+        return text
+
+def address_text(address: int):
+    """This function converts the address to the hex form written out,
+    i.e., with 0x and without the leading zeros, e.g., 0x562ffc0295f8.
+
+    args:
+        address (int): address.
+
+    returns:
+        (str) address in hex.
+    """
+
+    return f"0x{address:x}"
+
+def opcode_text(opcode: int):
+    """This function converts the IR opcode of a node, which is written
+    as a 2-byte value, back to its 4-digit hex form, e.g., 002a.
+
+    args:
+        opcode (int): IR opcode.
+
+    returns:
+        (str) opcode in hex.
+    """
+
+    return f"{opcode:04x}"
+
+def program_name(field):
+    """This function returns the program name of the program field.
+
+    args:
+        field (bytes or str): program field as read in.
+
+    returns:
+        (str) program name.
+    """
+
+    program = PROGRAMS.get(field)
+    if program is None:
+        program = PROGRAMS[field] = decode(field).strip()
+
+    return program
+
+def function_id(name: str):
+    """This function interns the function name and returns its id.
+    Categories of the function are computed once when the id is
+    assigned.
+
+    args:
+        name (str): function name.
+
+    returns:
+        (int) function id.
+    """
+
+    fid = FUNCTION_IDS.get(name)
+    if fid is None:
+        fid = len(FUNCTION_NAMES)
+        FUNCTION_IDS[name] = fid
+        FUNCTION_NAMES.append(name)
+        category, phase = categorize(name)
+        FUNCTION_CATEGORIES.append(category)
+        FUNCTION_PHASES.append(phase)
+
+    return fid
+
+def raw_function_id(field):
+    """This function returns the function id of the function field
+    without decoding the field, if the field was seen before.
+
+    args:
+        field (bytes or str): function field as read in.
+
+    returns:
+        (int) function id.
+    """
+
+    fid = RAW_FUNCTION_IDS.get(field)
+    if fid is None:
+        fid = RAW_FUNCTION_IDS[field] = function_id(decode(field).strip())
+
+    return fid
+
+def categorize(name: str):
+    """This function identifies the categories of the function.
+
+    args:
+        name (str): function name.
+
+    returns:
+        (int) categories of the function.
+        (str) phase name, if the function runs an optimisation phase.
+        (None) otherwise.
+    """
+
+    category = 0
+    phase = None
+
+    re_phase = OPT_PHASE_RE.search(name)
+    if re_phase:
+        category |= OPT_PHASE
+        phase = re_phase.group("phase")
+    if PHASE_RE.match(name):
+        category |= PHASE
+        if not phase:
+            phase = name.split("::")[3]
+    if ASSEMBLER_RE.match(name):
+        category |= ASSEMBLER
+    if TURBOASSEMBLER_RE.match(name):
+        category |= TURBOASSEMBLER
+    if INSTRUCTIONSELECTOR_RE.match(name):
+        category |= INSTRUCTIONSELECTOR
+    if (
+            name == FL.VERSION_GET
+            or name == FL.VERSION_BYTECODESIZE
+            or FL.VERSION_READFIELD in name
+    ):
+        category |= BYTECODE_ACCESS
+
+    return category, phase
+
+def function_category(name: str):
+    """This function returns the categories of the function.
+
+    args:
+        name (str): function name.
+
+    returns:
+        (int) categories of the function.
+    """
+
+    return FUNCTION_CATEGORIES[function_id(name)]
+
+class FunctionTable:
+    """Table indexed by the function id. The value of each function
+    is computed with the given function of the name when the id is
+    first looked up.
+    """
+    def __init__(self, compute):
+        self.compute = compute
+        self.values = []
+
+    def __getitem__(self, fid: int):
+        values = self.values
+        if fid >= len(values):
+            for i in range(len(values), fid+1):
+                values.append(self.compute(FUNCTION_NAMES[i]))
+
+        return values[fid]
+
+def dispatch_table(handlers: dict):
+    """This function creates a table of the handlers indexed by the
+    function id.
+
+    args:
+        handlers (dict): function name-to-handler dictionary.
+
+    returns:
+        (FunctionTable) handler of each function id, or None if the
+        function has no handler.
+    """
+
+    return FunctionTable(handlers.get)
+
+def is_exception(raw_line):
+    """This function checks whether the trace line is an exception.
+
+    args:
+        raw_line (bytes or str): raw trace line.
+
+    returns:
+        (bool) True, if the line is an exception.
+    """
+
+    if isinstance(raw_line, bytes):
+        return EXCEPTION_BYTES in raw_line
+
+    return EXCEPTION in raw_line
+
+def split_asm_inst(operation: str):
+    """This function splits the assembly instruction into the mnemonic
+    and the list of operands. Spaces in the operands are removed.
+
+    args:
+        operation (str): assembly instruction text.
+
+    returns:
+        (list) [mnemonic, [operands]].
+    """
+
+    asm_inst = operation.split(' ')
+    asm = []
+    mnemonics = ''.join(asm_inst[1:]).split(',')
+    if len(mnemonics) > 2:
+        for e in mnemonics:
+            ptr = BETWEEN_BRACKET_REGEX.search(e)
+            if ptr:
+                asm.append(f"[{ptr.group(1)}]")
+            else:
+                asm.append(e)
+    else:
+        asm = mnemonics
+
+    return [asm_inst[0], asm]
+
+def split_accesses(elem: str):
+    """This function splits the memory and register access field, and
+    parses the memory addresses and values into integers.
+
+    args:
+        elem (str): memory and register access field.
+
+    returns:
+        (list) list of [r/w/mr/mw, register/address, value, width].
+    """
+
+    accesses = []
+    for kind, target, value in split_access_text(elem):
+        if kind == "mr" or kind == "mw":
+            target = hex_value(target)
+        accesses.append([kind, target, hex_value(value), len(value)])
+
+    return accesses
+
+def split_access_text(elem: str):
+    """This function splits the memory and register access field
+    without parsing the addresses and values.
+
+    args:
+        elem (str): memory and register access field.
+
+    returns:
+        (list) list of [r/w/mr/mw, register/address, value] in text.
+    """
+
+    accesses = []
+    for inst in elem.split(' ')[1:-1]:
+        # Format example: ["R:RBP","0000000000000000"].
+        # ["MW[7ffd30632e80]","0000000000000000"]
+        splitted = inst.split('=')
+        if (
+                "MR" in inst or
+                "MW" in inst
+        ):
+            access = handle_memory_RW(splitted)
+        else:
+            access = handle_register_RW(splitted)
+        access.append(splitted[-1])
+        accesses.append(access)
+
+    return accesses
+
+def handle_memory_RW(splitted: list) -> list:
+    """This function splits the memory read and write
+    operation into a separate list and return the refined
+    format of list.
+
+    args:
+        splitted (list): a list of splitted memory read and write.
+
+    returns:
+        (list) refined list.
+    """
+
+    mem_access = []
+
+    # For example: ["MW","7ffd30632e80]"].
+    re_split = splitted[0].split("[")
+    # For example: "mw".
+    mem_access.append(re_split[0].lower())
+    # For example: "7ffd30632e80"
+    mem_access.append(re_split[1].strip(']'))
+
+    return mem_access
+
+def handle_register_RW(splitted: list) -> list:
+    """This function splits the register read and write
+    operation into a separate list and return the refined
+    format of list.
+
+    args:
+        splitted (list): a list of splitted register read and write.
+
+    returns:
+        (list) refined list.
+    """
+    reg_access = []
+
+    # Format example: r.
+    reg_access.append(splitted[0].split(':')[0].lower())
+    # Format example: rbp.
+    reg_access.append(splitted[0].split(':')[1].lower())
+
+    return reg_access
+
+# Intern the function names in FunctionLists first, so the interned names
+# are the FunctionLists constants themselves and comparing them with the
+# parsed function names is an identity check.
+for name, value in vars(FL).items():
+    if isinstance(value, str) and "::" in value and not name.endswith("REGEX"):
+        function_id(value)
+
+def instruction_splitter(inst_line):
+    """This function parses the instruction line.
+
+    args:
+        inst_line (bytes or str): A single line of instruction read in from
+        the ascii trace file.
+
+    returns:
+        (Instruction) parsed instruction.
+    """
+
+    return Instruction(inst_line)
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the trace file name
+    and the line number to parse.
+
+    returns:
+        (str) file name.
+        (int) line number.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="An input trace file."
+    )
+    parser.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=0,
+        help="Line number (0-based) to parse."
+    )
+    args = parser.parse_args()
+
+    return args.file, args.number
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename, number = argument_parser()
+    source = TR.open_trace(filename)
+    print (instruction_splitter(source[number]))
+    source.close()
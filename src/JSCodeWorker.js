@@ -0,0 +1,34 @@
+/*
+    This program is a long-lived JS code generator for the modified
+    syntax trees of PoCModifier. Instead of starting node once per
+    PoC, it reads one request per line from stdin, generates the JS
+    code of the syntax tree, and writes a reply line to stdout.
+
+    Request: {"ast": <ESTree syntax tree>, "output": <JS file path>}
+    Reply:   {"output": <JS file path>} or {"error": <message>}
+
+    Example,
+        $node JSCodeWorker.js < requests.ndjson
+*/
+
+const fs = require("fs");
+const readline = require("readline");
+const escodegen = require("escodegen");
+
+const requests = readline.createInterface({
+    input: process.stdin,
+    crlfDelay: Infinity,
+});
+
+requests.on("line", (line) => {
+    let reply;
+    try {
+        const request = JSON.parse(line);
+        fs.writeFileSync(request.output, escodegen.generate(request.ast));
+        reply = {output: request.output};
+    } catch (error) {
+        // A bad syntax tree fails only its own request.
+        reply = {error: error.message};
+    }
+    process.stdout.write(JSON.stringify(reply) + "\n");
+});
@@ -16,17 +16,24 @@ Author: Terrence J. Lim
 import time
 import json
 import os, sys
-import pickle
+import shutil
+import inspect
 import argparse
+import tempfile
 import subprocess
+import concurrent.futures
 
-import PhaseIdentifier as PI
-import BytecodeIdentifier as BI
-import OptimisationTracker as OT
 import FunctionLists as FL
 import NativeCodeMapper as NT
-import GraphCreator as GC
 import GraphAnalyser as GA
+import TraceReader as TR
+import TraceScanner as TS
+import TraceStore as ST
+import CodeGenerator as CG
+import StageCache as SC
+import GraphStore as GS
+import RunManifest as RM
+import ToolRunner as TL
 import Visualization.GraphRestructurer as GR
 import Visualization.GraphMerger as GM
 
@@ -42,8 +49,6 @@ import x86Tracer.backTracer.instruction_restructor as IR
 import PoCModifier.PoCModifier as PoCM
 import PoCModifier.JSAstGenerator as AstG
 
-JSCODEGENERATOR = "/scratch/hlim1/scripts/ResearchTools/PoCModifier/JSCodeGenerator.js"
-
 D8OPTIONS = [
         "--allow-natives-syntax",
         "--no-turbo-inlining",
@@ -61,6 +66,19 @@ TRACEOUTS = [
         "data.out",
         "errors.out",
 ]
+# Status of each d8 run.
+D8_STATUSES = ["OK", "CRASHED", "TIMEOUT"]
+# d8 option to print the functions being optimised, and the line it
+# prints when TurboFan starts to optimise a function.
+TRACE_OPT = "--trace-opt"
+TURBOFAN_PATTERN = "using TurboFan"
+# Syntax tree properties that only hold the formatting of the JS code,
+# so they are ignored when the PoCs are compared.
+FORMAT_KEYS = {"loc", "range", "start", "end", "raw", "comments", "leadingComments", "trailingComments"}
+# Times to regenerate the duplicate PoCs to reach the requested number of PoCs.
+UNIQUE_ATTEMPTS = 10
+# Stages of the streaming pipeline in the order each PoC goes through.
+PIPELINE_STAGES = ["generate", "d8", "tracer", "trace2ascii", "graph"]
 TRACE2ASCII = "/scratch/hlim1/pin-3.7/source/tools/ScienceUpToPar/Tools/uacs-lynx/trace2ascii/trace2ascii"
 
 def CheckUserInputs(PoC: str, bytecode: str, directory: str, number: int):
@@ -98,54 +116,359 @@ def CheckUserInputs(PoC: str, bytecode: str, directory: str, number: int):
         os.makedirs(f"{directory}/graphs")
     if not os.path.exists(f"{directory}/etc"):
         os.makedirs(f"{directory}/etc")
+    if not os.path.exists(f"{directory}/keys"):
+        os.makedirs(f"{directory}/keys")
 
-def RunD8(directory: str, executable: str):
+def RunD8(
+        directory: str, executable: str, jobs: int = None, timeout: float = None,
+        cache: SC.StageCache = None, manifest: RM.RunManifest = None
+):
     """This function runs all the PoC files including the original file.
     It captures the stdouts from running the PoCs with d8 and write to files.
+    PoCs are run concurrently by a bounded pool of workers.
 
     args:
         orgPoC (str): original PoC file.
         directory (str): path to the directory where outputs will be stored.
+        executable (str): d8 executable.
+        jobs (int): number of PoCs to run at once. If None, the number of CPUs.
+        timeout (float): seconds to wait for each run. If None, wait until it ends.
+        cache (StageCache): cache of the d8 outputs. If None, all PoCs are run.
+        manifest (RunManifest): manifest of the run. The PoCs that were
+        already run are skipped.
 
     returns:
-        None.
+        (dict) status (OK, CRASHED, or TIMEOUT)-to-file numbers.
     """
     
     begin = time.time()
 
-    D8 = executable
-
     pocsDir  = directory + "/pocs"
     d8outDir = directory + "/d8outs"
 
     # Retrieve all the PoC file names from the PoC directory.
     pocs = os.listdir(pocsDir)
     # Run all PoCs with d8 and write out the outputs to a file.
-    for poc in pocs:
-        pocPath = pocsDir + "/" + poc
-        fileNumber = get_file_number(poc)
-        output = subprocess.run(
-                    [D8, D8OPTIONS[0], D8OPTIONS[1], D8OPTIONS[2], D8OPTIONS[3], pocPath],
-                    capture_output=True,
-                    text=True
-        )
+    summary = {status: [] for status in D8_STATUSES}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        runs = [
+            pool.submit(
+                ManifestStage, manifest, get_file_number(poc), "d8",
+                lambda result: [d8out_file(d8outDir, result[0])],
+                RunPoC, executable, pocsDir + "/" + poc, d8outDir, timeout, cache
+            )
+            for poc in pocs
+        ]
+        for run in concurrent.futures.as_completed(runs):
+            fileNumber, status = run.result()
+            summary[status].append(fileNumber)
+
+    for status in summary:
+        summary[status].sort(key=lambda number: (len(number), number))
+
+    end = time.time()
+    print ("TIME: RunDB -", "{0:.2f}".format((end-begin)/60), " mins")
+    print ("RunD8:", ", ".join(f"{status} {len(numbers)}" for status, numbers in summary.items()))
+
+    return summary
+
+def RunPoC(
+        executable: str, pocPath: str, d8outDir: str, timeout: float = None,
+        cache: SC.StageCache = None
+):
+    """This function runs a single PoC with d8 and writes its output.
+
+    args:
+        executable (str): d8 executable.
+        pocPath (str): PoC file path.
+        d8outDir (str): directory where all d8 outputs are stored.
+        timeout (float): seconds to wait for the run.
+        cache (StageCache): cache of the d8 outputs.
 
+    returns:
+        (str) file number of the PoC.
+        (str) status of the run (OK, CRASHED, or TIMEOUT). The output of a
+        crashed run is kept, as it was before the status was reported.
+    """
+
+    fileNumber = get_file_number(os.path.basename(pocPath))
+    outputFile = d8out_file(d8outDir, fileNumber)
+    if cache:
+        # The outputs of the crashed runs used to be replaced with CRASHED.
+        key = poc_key("d8", executable, pocPath, "uniq -c")
+        meta = cache.get(key, {"output": outputFile})
+        if meta:
+            return fileNumber, meta["value"]
+
+    try:
         # This code is not needed for all PoCs - Currently, only needed for Issue # 1072171.
-        output = subprocess.run(["uniq", "-c"], input=output.stdout, capture_output=True, text=True)
+        # The repeated lines are collapsed as d8 writes them, so the output is never held whole.
+        with open(outputFile, 'w') as f:
+            counter = RepeatCounter(f)
+            output = TL.get_runner().run(
+                        "d8",
+                        [executable, D8OPTIONS[0], D8OPTIONS[1], D8OPTIONS[2], D8OPTIONS[3], pocPath],
+                        timeout,
+                        on_line=counter.add
+            )
+            counter.flush()
+    except subprocess.TimeoutExpired:
+        with open(outputFile, 'w') as f:
+            f.write("TIMEOUT")
+        # A timeout depends on the load of the machine, so it is not cached.
+        return fileNumber, "TIMEOUT"
+
+    # If the output return code is not 0, the execution terminated abnormally or crashed.
+    # The output file keeps the collapsed output of the run, as the crash check
+    # of the output file tested the return code of 'uniq -c', which does not fail.
+    status = "CRASHED" if output.returncode != 0 else "OK"
+
+    if cache:
+        cache.put(key, {"output": outputFile}, status)
+
+    return fileNumber, status
+
+def RunTraceOpt(
+        directory: str, executable: str, jobs: int = None, timeout: float = None,
+        cache: SC.StageCache = None, manifest: RM.RunManifest = None
+):
+    """This function runs all the PoC files with d8 and --trace-opt to find
+    the PoCs that get optimised by TurboFan. It is a cheap pre-pass, so the
+    PoCs that never get JIT compiled do not need to be traced.
 
-        # If the output return code is not 0, the execution terminated abnormally or crashed.
-        outputFile = d8outDir + f"/output_{str(fileNumber)}.out"
+    args:
+        directory (str): path to the directory where outputs will be stored.
+        executable (str): d8 executable.
+        jobs (int): number of PoCs to run at once. If None, the number of CPUs.
+        timeout (float): seconds to wait for each run. If None, wait until it ends.
+        cache (StageCache): cache of the pre-pass results.
+        manifest (RunManifest): manifest of the run. The PoCs that were
+        already run are skipped.
 
-        if output.returncode != 0:
-            with open(outputFile, 'w') as f:
-                f.write("CRASHED")
-        else:
-            with open(outputFile, 'w') as f:
-                f.write(output.stdout)
+    returns:
+        (dict) file number-to-optimised status.
+    """
+
+    begin = time.time()
+
+    pocsDir = directory + "/pocs"
+    etcDir  = directory + "/etc"
+
+    # Retrieve all the PoC file names from the PoC directory.
+    pocs = sorted(os.listdir(pocsDir), key=file_number_order)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        runs = [
+            pool.submit(
+                ManifestStage, manifest, get_file_number(poc), "trace_opt", lambda result: [],
+                IsOptimised, executable, pocsDir + "/" + poc, timeout, cache
+            )
+            for poc in pocs
+        ]
+        optimised = dict(run.result() for run in runs)
+
+    # Write optimised status dictionary to a JSON file.
+    Optimised_f = etcDir + "/Optimised.json"
+    with open(Optimised_f, 'w') as of:
+        json.dump(optimised, of)
 
     end = time.time()
-    print ("TIME: RunDB -", "{0:.2f}".format((end-begin)/60), " mins")
+    print ("TIME: RunTraceOpt -", "{0:.2f}".format((end-begin)/60), " mins")
+    print ("RunTraceOpt:", sum(optimised.values()), "of", len(optimised), "optimised")
+
+    return optimised
+
+def IsOptimised(
+        executable: str, pocPath: str, timeout: float = None, cache: SC.StageCache = None
+):
+    """This function runs a single PoC with d8 and --trace-opt and checks
+    whether TurboFan optimised any function.
+
+    args:
+        executable (str): d8 executable.
+        pocPath (str): PoC file path.
+        timeout (float): seconds to wait for the run.
+        cache (StageCache): cache of the pre-pass results.
+
+    returns:
+        (str) file number of the PoC.
+        (bool) True, if TurboFan optimised any function. Also True, if the
+        run timed out, since it is unknown.
+    """
+
+    fileNumber = get_file_number(os.path.basename(pocPath))
+    if cache:
+        key = poc_key("trace_opt", executable, pocPath)
+        meta = cache.get(key)
+        if meta:
+            return fileNumber, meta["value"]
+
+    # Only the lines with TURBOFAN_PATTERN are kept from the output.
+    matches = []
+    def match(line):
+        if TURBOFAN_PATTERN in line:
+            matches.append(line)
+
+    try:
+        TL.get_runner().run(
+                "d8",
+                [executable, D8OPTIONS[0], D8OPTIONS[1], D8OPTIONS[2], D8OPTIONS[3], TRACE_OPT, pocPath],
+                timeout,
+                on_line=match
+        )
+    except subprocess.TimeoutExpired:
+        return fileNumber, True
+
+    # The function may be optimised before d8 crashes, so the output is
+    # checked regardless of the return code.
+    optimised = bool(matches)
+    if cache:
+        cache.put(key, value=optimised)
+
+    return fileNumber, optimised
 
+def poc_key(stage: str, executable: str, pocPath: str, *parts):
+    """This function computes the cache key of a stage that runs d8 on
+    the PoC from the PoC bytes, d8 binary, and D8OPTIONS.
+
+    args:
+        stage (str): stage name.
+        executable (str): d8 executable.
+        pocPath (str): PoC file path.
+        parts (any): other inputs of the stage.
+
+    returns:
+        (str) cache key.
+    """
+
+    with open(pocPath, "rb") as f:
+        poc = f.read()
+
+    return SC.stage_key(stage, poc, SC.command_digest([executable]), D8OPTIONS, *parts)
+
+def key_file(directory: str, filenumber: str):
+    """This function returns the file that holds the cache key of the
+    trace of the file number. The later stages of the trace are cached
+    by this key, so the trace does not need to be hashed.
+
+    args:
+        directory (str): Directory to store generated outout files.
+        filenumber (str): file number.
+
+    returns:
+        (str) key file path.
+    """
+
+    return directory + f"/keys/trace_{str(filenumber)}.key"
+
+def read_key(directory: str, filenumber: str):
+    """This function reads the cache key of the trace of the file number.
+
+    args:
+        directory (str): Directory to store generated outout files.
+        filenumber (str): file number.
+
+    returns:
+        (str) cache key.
+        (None) if the trace was not generated with a cache.
+    """
+
+    try:
+        with open(key_file(directory, filenumber)) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def d8out_file(d8outDir: str, filenumber: str):
+    """This function returns the d8 output file path of the file number.
+
+    args:
+        d8outDir (str): directory where all d8 outputs are stored.
+        filenumber (str): file number.
+
+    returns:
+        (str) d8 output file path.
+    """
+
+    return d8outDir + f"/output_{str(filenumber)}.out"
+
+def ManifestStage(
+        manifest: RM.RunManifest, filenumber: str, stage: str, files, function, *args
+):
+    """This function runs a stage of a single PoC, unless the manifest
+    records the stage as completed, and records the stage once it is done.
+
+    args:
+        manifest (RunManifest): manifest of the run. If None, the stage
+        is always run and not recorded.
+        filenumber (str): file number of the PoC.
+        stage (str): stage name.
+        files (function): function of the stage result that returns the
+        file paths written by the stage.
+        function (function): stage function, e.g., RunPoC.
+        args: arguments of the stage function.
+
+    returns:
+        (any) result of the stage function, or the recorded result. The
+        tuples of a recorded result are lists.
+    """
+
+    if manifest:
+        record = manifest.completed(filenumber, stage)
+        if record:
+            return record["value"]
+
+    result = function(*args)
+    # A stage that did not give a result, e.g., no trace, is run again.
+    if manifest and result is not None:
+        manifest.record(filenumber, stage, files(result), result)
+
+    return result
+
+class RepeatCounter:
+    """Collapser of the repeated adjacent lines, the same as 'uniq -c'.
+    The lines are added one at a time as they are produced, and each
+    collapsed line is written with its count as soon as it ends.
+    """
+    def __init__(self, output):
+        """
+        args:
+            output (file): text file to write the collapsed lines to.
+        """
+
+        self.output = output
+        self.line = None
+        self.count = 0
+
+    def add(self, line: str):
+        """This function adds the next line.
+
+        args:
+            line (str): line with or without its newline.
+
+        returns:
+            None.
+        """
+
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line == self.line:
+            self.count += 1
+            return
+        self.flush()
+        self.line = line
+        self.count = 1
+
+    def flush(self):
+        """This function writes the last collapsed line.
+
+        returns:
+            None.
+        """
+
+        if self.count:
+            self.output.write("%7d %s\n" % (self.count, self.line))
+        self.line = None
+        self.count = 0
 
 def get_file_number(filename: str):
     """This is a helper function to capture the file number
@@ -163,13 +486,62 @@ def get_file_number(filename: str):
 
     return filenumber
 
-def GetTraceAsciis(directory: str):
+def trace_files(traceDir: str):
+    """This is a helper function to list the trace files in the trace
+    directory. The scratch directories left by a stopped tracer and
+    any other entries are excluded.
+
+    args:
+        traceDir (str): directory where all traces are stored.
+
+    returns:
+        (list) trace file names.
+    """
+
+    return [
+        f for f in os.listdir(traceDir)
+        if f.startswith("trace_") and os.path.isfile(traceDir + "/" + f)
+    ]
+
+def file_number_order(filename: str):
+    """This is a helper function to order the files by their file
+    numbers, numerically if the numbers are digits.
+
+    args:
+        filename (str): file name.
+
+    returns:
+        (tuple) sort key.
+    """
+
+    filenumber = get_file_number(filename)
+    if filenumber.isdigit():
+        return (0, int(filenumber), filename)
+
+    return (1, filenumber, filename)
+
+def GetTraceAsciis(
+        directory: str, convert: bool = True, compression: str = None,
+        executable: str = None, jobs: int = None, cache: SC.StageCache = None,
+        filenumbers: list = None, manifest: RM.RunManifest = None
+):
     """Run tracer and trace2ascii programs to get the trace of d8 execution
     on each PoCs in ascii format.
 
     args:
         directory (str): path to the directory where outputs will be stored.
         orgPoC (str): original PoC file.
+        convert (bool): If False, trace2ascii is not run here, since its
+        output will be piped into GetGraphs.
+        compression (str): compressed file extension (gz, xz, or bz2) of the
+        traces and asciis. If None, they are not compressed.
+        executable (str): d8 executable.
+        jobs (int): number of tracers to run at once.
+        cache (StageCache): cache of the traces and asciis.
+        filenumbers (list): file numbers of the PoCs to trace. If None,
+        all PoCs are traced.
+        manifest (RunManifest): manifest of the run. The PoCs that were
+        already traced and converted are skipped.
 
     returns:
         None.
@@ -182,84 +554,232 @@ def GetTraceAsciis(directory: str):
     asciiDir  = directory + "/asciis"
 
     # Run tracer on the original PoC and generated PoCs.
-    RunTracer(pocsDir, traceDir)
+    RunTracer(pocsDir, traceDir, compression, executable, jobs, cache, filenumbers, manifest)
 
     # Run trace2ascii on all trace files.
-    RunTrace2Ascii(asciiDir, traceDir)
+    if convert:
+        RunTrace2Ascii(asciiDir, traceDir, compression, cache, manifest)
 
     end = time.time()
     print ("TIME: GetTraceAsciis -", "{0:.2f}".format((end-begin)/60), " mins")
 
-def RunTracer(pocsDir: str, traceDir: str):
+def RunTracer(
+        pocsDir: str, traceDir: str, compression: str = None,
+        executable: str = None, jobs: int = None, cache: SC.StageCache = None,
+        filenumbers: list = None, manifest: RM.RunManifest = None
+):
     """This function runs tracer on the original PoC and all generated modified
-    PoCs to get binary trace files.
+    PoCs to get binary trace files. Each tracer runs in its own scratch
+    directory, so the PoCs are traced concurrently by a bounded pool of workers.
 
     args:
         pocsDir (str) :directory where all pocs are stored.
         traceDir (str): directory where all traces are stored.
+        compression (str): compressed file extension of the traces.
+        executable (str): d8 executable.
+        jobs (int): number of tracers to run at once. If None, the number of CPUs.
+        cache (StageCache): cache of the traces.
+        filenumbers (list): file numbers of the PoCs to trace. If None,
+        all PoCs are traced.
+        manifest (RunManifest): manifest of the run. The PoCs that were
+        already traced are skipped.
 
     returns:
-        None.
+        (list) trace files generated.
     """
 
     # Retrieve all the PoC file names from the PoC directory.
     pocs = os.listdir(pocsDir)
+    if filenumbers is not None:
+        filenumbers = set(filenumbers)
+        pocs = [poc for poc in pocs if get_file_number(poc) in filenumbers]
 
     # Run the tracer on all PoCs including the original.
-    for poc in pocs:
-        pocPath = pocsDir + "/" + poc
-        print ("RunTracer: pocPath:", pocPath)
-        # Get the trace file from the original PoC.
-        output = subprocess.run(
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        runs = [
+            pool.submit(
+                ManifestStage, manifest, get_file_number(poc), "tracer", lambda path: [path],
+                TracePoC, executable, pocsDir + "/" + poc, traceDir, compression, cache
+            )
+            for poc in pocs
+        ]
+        traces = [run.result() for run in runs]
+
+    return [trace for trace in traces if trace]
+
+def TracePoC(
+        executable: str, pocPath: str, traceDir: str, compression: str = None,
+        cache: SC.StageCache = None
+):
+    """This function runs tracer on a single PoC in a scratch directory and
+    moves the trace file to the trace directory.
+
+    args:
+        executable (str): d8 executable.
+        pocPath (str): PoC file path.
+        traceDir (str): directory where all traces are stored.
+        compression (str): compressed file extension of the trace.
+        cache (StageCache): cache of the traces.
+
+    returns:
+        (str) trace file path.
+        (None) if the tracer did not generate a trace file.
+    """
+
+    print ("RunTracer: pocPath:", pocPath)
+    # Paths must not depend on the working directory of the tracer.
+    if os.sep in executable:
+        executable = os.path.abspath(executable)
+    pocPath = os.path.abspath(pocPath)
+    # Get the file number of each PoC and rename the trace file with
+    # the PoC file number added to distinguish which trace is from which PoC.
+    fileNumber = get_file_number(os.path.basename(pocPath))
+    mTraceFile = traceDir + f"/trace_{str(fileNumber)}.out"
+    if cache:
+        # The later stages of the trace are cached by the key of the trace.
+        trace_key = poc_key("trace", executable, pocPath, TRACER)
+        with open(key_file(os.path.dirname(traceDir), fileNumber), 'w') as f:
+            f.write(trace_key)
+        key = SC.stage_key("trace_file", trace_key, compression)
+        cachedTraceFile = mTraceFile + ("." + compression if compression else "")
+        if cache.get(key, {"trace": cachedTraceFile}):
+            return cachedTraceFile
+    # All trace files are default to store at the location where the tracer was
+    # ran with default names (TRACEOUTS). Thus, each tracer runs in a scratch
+    # directory next to the trace directory, so the trace file can be renamed
+    # into the trace directory, while a scratch directory left by a stopped
+    # run is not taken as a trace.
+    with tempfile.TemporaryDirectory(prefix=".tracer_", dir=os.path.dirname(traceDir)) as scratchDir:
+        # Get the trace file from the PoC. The output of d8 is not needed.
+        output = TL.get_runner().run(
+                    "pin",
                     [
                        TRACER[0], TRACER[1], TRACER[2], TRACER[3],
-                       D8, D8OPTIONS[0], D8OPTIONS[1], D8OPTIONS[2], D8OPTIONS[3],
-                       pocPath 
+                       executable, D8OPTIONS[0], D8OPTIONS[1], D8OPTIONS[2], D8OPTIONS[3],
+                       pocPath
                     ],
-                    capture_output=True,
-                    text=True
+                    cwd=scratchDir,
+                    output_file=os.devnull
         )
-        # Get the file number of each PoC and rename the trace file with
-        # the PoC file number added to distinguish which trace is from which PoC.
-        fileNumber = get_file_number(poc)
-        mTraceFile = traceDir + f"/trace_{str(fileNumber)}.out"
-        # All trace files are default to store at the location where the tracer was
-        # ran with a default name 'trace.out'. Thus, we need to move all trace files
-        # to the trace directory.
-        subprocess.run(['mv', TRACEOUTS[0], mTraceFile])
-        # Remove other files those are generated by default.
-        subprocess.run(['rm', TRACEOUTS[1]])
-        subprocess.run(['rm', TRACEOUTS[2]])
-
-def RunTrace2Ascii(asciiDir: str, traceDir: str):
+        traceFile = scratchDir + "/" + TRACEOUTS[0]
+        if not os.path.exists(traceFile):
+            print ("RunTracer: no trace generated:", pocPath, output.stderr)
+            return None
+        os.replace(traceFile, mTraceFile)
+        # Other files generated by default are removed with the scratch directory.
+
+    if compression:
+        TR.compress_file(mTraceFile, mTraceFile + "." + compression)
+        mTraceFile += "." + compression
+
+    if cache:
+        cache.put(key, {"trace": mTraceFile})
+
+    return mTraceFile
+
+def RunTrace2Ascii(
+        asciiDir: str, traceDir: str, compression: str = None, cache: SC.StageCache = None,
+        manifest: RM.RunManifest = None
+):
     """This function runs trace2ascii on all trace files in the trace directory.
+    The output is written to the ascii file as it is produced.
 
     args:
         asciiDir (str): directory where all asciis are stored.
         traceDir (str): directory where all traces are stored.
+        compression (str): compressed file extension of the asciis.
+        cache (StageCache): cache of the asciis.
+        manifest (RunManifest): manifest of the run. The traces that were
+        already converted are skipped.
 
     returns:
         None.
     """
 
-    # Retrieve all ascii file names from the asciis directory.
-    traces = os.listdir(traceDir)
-    
+    # Retrieve all trace file names from the traces directory.
+    traces = trace_files(traceDir)
+
     # Run trace2ascii on all trace files.
     for trace in traces:
-        tracePath = traceDir + "/" + trace
-        print ("RunTrace2Ascii: tracePath:", tracePath)
-        output = subprocess.run (
-                    [TRACE2ASCII, tracePath],
-                    capture_output=True,
-                    text=True
+        ManifestStage(
+            manifest, get_file_number(trace), "trace2ascii", lambda path: [path],
+            ConvertTrace, traceDir + "/" + trace, asciiDir, compression, cache
         )
-        filenumber = get_file_number(trace)
-        ascii_f = asciiDir + f"/ascii_{str(filenumber)}.out"
-        with open(ascii_f, 'w') as f:
-            f.write(output.stdout)
 
-def GetPoCs(PoC: str, directory: str, number: int):
+def ConvertTrace(
+        tracePath: str, asciiDir: str, compression: str = None, cache: SC.StageCache = None
+):
+    """This function runs trace2ascii on a single trace file.
+
+    args:
+        tracePath (str): trace file path.
+        asciiDir (str): directory where all asciis are stored.
+        compression (str): compressed file extension of the ascii.
+        cache (StageCache): cache of the asciis.
+
+    returns:
+        (str) ascii file path.
+    """
+
+    print ("RunTrace2Ascii: tracePath:", tracePath)
+    filenumber = get_file_number(os.path.basename(tracePath))
+    ascii_f = ascii_file(asciiDir, filenumber, compression)
+    trace_key = read_key(os.path.dirname(asciiDir), filenumber) if cache else None
+    if trace_key and cache.get(ascii_key(trace_key, compression), {"ascii": ascii_f}):
+        return ascii_f
+
+    with TR.plain_file(tracePath) as plainPath:
+        if compression:
+            # The output is compressed on its way to the ascii file.
+            # Closing the pipe writes the rest of output to the ascii file.
+            TR.TracePipe([TRACE2ASCII, plainPath], ascii_f).close()
+        else:
+            # trace2ascii writes its output straight to the ascii file.
+            output = TL.get_runner().run("trace2ascii", [TRACE2ASCII, plainPath], output_file=ascii_f)
+            assert (
+                    output.returncode == 0
+            ), f"ERROR: {[TRACE2ASCII, plainPath]} exited with {output.returncode}."
+
+    if trace_key:
+        cache.put(ascii_key(trace_key, compression), {"ascii": ascii_f})
+
+    return ascii_f
+
+def ascii_key(trace_key: str, compression: str = None):
+    """This function computes the cache key of the ascii of a trace.
+
+    args:
+        trace_key (str): cache key of the trace.
+        compression (str): compressed file extension of the ascii.
+
+    returns:
+        (str) cache key.
+    """
+
+    return SC.stage_key("ascii", trace_key, SC.command_digest([TRACE2ASCII]), compression)
+
+def ascii_file(asciiDir: str, filenumber: str, compression: str = None):
+    """This function returns the ascii file path of the file number.
+
+    args:
+        asciiDir (str): directory where all asciis are stored.
+        filenumber (str): file number.
+        compression (str): compressed file extension of the asciis.
+
+    returns:
+        (str) ascii file path.
+    """
+
+    ascii_f = asciiDir + f"/ascii_{str(filenumber)}.out"
+    if compression:
+        ascii_f += "." + compression
+
+    return ascii_f
+
+def GetPoCs(
+        PoC: str, directory: str, number: int, write_asts: bool = True,
+        cache: SC.StageCache = None, unique: bool = False, manifest: RM.RunManifest = None
+):
     """This function calls PoCModifier program to modify the original PoC
     and generate new PoCs.
 
@@ -267,6 +787,13 @@ def GetPoCs(PoC: str, directory: str, number: int):
         PoC (str): Original PoC file path.
         directory (str): Directory to store generated outout files.
         number (int): A number of PoCs to modify & generate from the original PoC.
+        write_asts (bool): If True, the modified syntax trees are also
+        written to JSON files.
+        cache (StageCache): cache of the generated PoCs.
+        unique (bool): If True, the duplicate PoCs are regenerated until
+        there are the requested number of unique PoCs.
+        manifest (RunManifest): manifest of the run. If the PoCs were
+        generated by the resumed run, they are not generated again.
 
     returns:
         None.
@@ -274,6 +801,57 @@ def GetPoCs(PoC: str, directory: str, number: int):
 
     begin = time.time()
 
+    if ResumePoCs(manifest) is None:
+        # The stages recorded for the PoCs of an unfinished generation
+        # do not hold for the new PoCs.
+        if manifest:
+            manifest.reset()
+
+        key = pocs_key(PoC, number, unique) if cache else None
+        pocPaths = RestorePoCs(cache, key, directory) if key else None
+        if pocPaths is None:
+            modifiedPoCs = ModifyPoC(PoC, directory, number, write_asts, unique)
+
+            # Generate new PoCs through a single code generation worker.
+            generator = CG.CodeGenerator()
+            for m_Ast, pocPath in modifiedPoCs:
+                GeneratePoC(generator, m_Ast, pocPath)
+            generator.close()
+
+            pocPaths = [pocPath for m_Ast, pocPath in modifiedPoCs]
+            if key:
+                CachePoCs(cache, key, pocPaths, directory)
+
+        # Copy the original PoC to the poc directory.
+        pocPaths = [CopyPoC(PoC, directory)] + pocPaths
+        if manifest:
+            RecordPoCs(manifest, pocPaths)
+
+    end = time.time()
+    print ("TIME: GetPoC -", "{0:.2f}".format((end-begin)/60), " mins")
+
+def ModifyPoC(
+        PoC: str, directory: str, number: int, write_asts: bool = True, unique: bool = False
+):
+    """This function calls PoCModifier program to modify the syntax tree
+    of the original PoC. The modified syntax trees that are identical to
+    the original or an earlier one, other than the formatting, are dropped,
+    since they would give the same d8 runs, traces, and graphs. Each dropped
+    file number is mapped to the file number it duplicates in Duplicates.json.
+
+    args:
+        PoC (str): Original PoC file path.
+        directory (str): Directory to store generated outout files.
+        number (int): A number of PoCs to modify & generate from the original PoC.
+        write_asts (bool): If True, the modified syntax trees are also
+        dumped to JSON files.
+        unique (bool): If True, the duplicate PoCs are regenerated, up to
+        UNIQUE_ATTEMPTS times, to reach the number of unique PoCs.
+
+    returns:
+        (list) [syntax tree, PoC file path to generate] ordered by their file numbers.
+    """
+
     with open(PoC) as JSFile:
         file = os.path.basename(PoC)
         filename, ext = os.path.splitext(file)
@@ -284,125 +862,783 @@ def GetPoCs(PoC: str, directory: str, number: int):
         # Convert syntax tree type from esprima object to python dict.
         ast_dict = ast.toDict()
 
-        # Generate N number of PoCs and retrieve them in a list container.
-        modifiedASTs = PoCM.PoCGenerator(ast_dict, number)
-        # Dump generated syntax tress to JSON files.
-        file_number = 1
-        json_files = []
-        for m_Ast in modifiedASTs:
-            json_file = directory + "/asts/" + filename + f"_{str(file_number)}.json"
-            with open(json_file, 'w') as json_f:
-                json.dump(m_Ast, json_f)
-            file_number += 1
-            json_files.append(json_file)
-
-        # Call JSCodeGenerator to generate new PoCs.
-        for json_f in json_files:
-            f = os.path.basename(json_f)
-            of, ext = os.path.splitext(f)
-            output_file = directory + "/pocs/" + of + ".js"
-            subprocess.run(['node', JSCODEGENERATOR, json_f, output_file])
-
-        # Copy the original PoC to the poc directory. Original PoC get file number 0 ALWAYS.
-        movedPoC  = directory + "/pocs/" + filename + "_0.js"
-        subprocess.run(["cp", PoC, movedPoC])
+    # Syntax tree digest-to-file number of the unique PoCs.
+    # The original PoC gets file number 0 ALWAYS.
+    digests = {ast_digest(ast_dict): "0"}
+    # File number-to-file number of the PoC that it duplicates.
+    # {__filenumber__: __filenumber__}.
+    duplicates = {}
+    # [file number, syntax tree, PoC file path] of each unique PoC.
+    uniquePoCs = []
+
+    # Generate N number of PoCs and retrieve them in a list container.
+    file_numbers = list(range(1, number + 1))
+    modifiedASTs = PoCM.PoCGenerator(ast_dict, number)
+    for attempt in range(UNIQUE_ATTEMPTS):
+        remaining = []
+        for file_number, m_Ast in zip(file_numbers, modifiedASTs):
+            digest = ast_digest(m_Ast)
+            if digest in digests:
+                duplicates[str(file_number)] = digests[digest]
+                remaining.append(file_number)
+                continue
+            digests[digest] = str(file_number)
+            duplicates.pop(str(file_number), None)
+            # Dump generated syntax tress to JSON files.
+            if write_asts:
+                json_file = directory + "/asts/" + filename + f"_{str(file_number)}.json"
+                with open(json_file, 'w') as json_f:
+                    json.dump(m_Ast, json_f)
+            output_file = directory + "/pocs/" + filename + f"_{str(file_number)}.js"
+            uniquePoCs.append((file_number, m_Ast, output_file))
+
+        if not unique or not remaining:
+            break
+        # Regenerate the duplicates under their file numbers.
+        file_numbers = remaining
+        modifiedASTs = PoCM.PoCGenerator(ast_dict, len(remaining))
+
+    # Write duplicate PoCs dictionary to a JSON file.
+    Duplicates_f = directory + "/etc/Duplicates.json"
+    with open(Duplicates_f, 'w') as df:
+        json.dump(duplicates, df, indent=2)
+    print ("ModifyPoC:", len(uniquePoCs), "unique,", len(duplicates), "duplicates")
+
+    uniquePoCs.sort(key=lambda uniquePoC: uniquePoC[0])
+
+    return [(m_Ast, output_file) for file_number, m_Ast, output_file in uniquePoCs]
+
+def ast_digest(ast: dict):
+    """This function computes the digest of the syntax tree without the
+    properties that only hold the formatting (FORMAT_KEYS), so the PoCs
+    that only differ in their formatting have the same digest.
 
-    end = time.time()
-    print ("TIME: GetPoC -", "{0:.2f}".format((end-begin)/60), " mins")
+    args:
+        ast (dict): syntax tree.
+
+    returns:
+        (str) hex digest of the syntax tree.
+    """
+
+    def normalise(node):
+        if isinstance(node, dict):
+            return {
+                key: normalise(value) for key, value in node.items()
+                if key not in FORMAT_KEYS
+            }
+        if isinstance(node, list):
+            return [normalise(value) for value in node]
+        return node
+
+    return SC.stage_key("ast", normalise(ast))
+
+def GeneratePoC(generator: CG.CodeGenerator, m_Ast: dict, pocPath: str):
+    """This function generates a new PoC from a modified syntax tree.
+
+    args:
+        generator (CodeGenerator): JS code generation worker.
+        m_Ast (dict): modified syntax tree.
+        pocPath (str): PoC file path to generate.
+
+    returns:
+        (str) generated PoC file path.
+    """
+
+    return generator.generate(m_Ast, pocPath)
+
+def CopyPoC(PoC: str, directory: str):
+    """This function copies the original PoC to the poc directory.
+    Original PoC get file number 0 ALWAYS.
+
+    args:
+        PoC (str): Original PoC file path.
+        directory (str): Directory to store generated outout files.
+
+    returns:
+        (str) copied PoC file path.
+    """
+
+    filename, ext = os.path.splitext(os.path.basename(PoC))
+    movedPoC  = directory + "/pocs/" + filename + "_0.js"
+    shutil.copyfile(PoC, movedPoC)
+
+    return movedPoC
+
+def RecordPoCs(manifest: RM.RunManifest, pocPaths: list):
+    """This function records the generate stage of all PoCs. The PoCs
+    are recorded only once all of them are generated, so a resumed run
+    never mixes the PoCs of two generations.
+
+    args:
+        manifest (RunManifest): manifest of the run.
+        pocPaths (list): PoC file paths including the original PoC.
+
+    returns:
+        None.
+    """
 
-def GetGraphs(directory: str, bytecode: str):
+    filenumbers = []
+    for pocPath in pocPaths:
+        filenumbers.append(get_file_number(os.path.basename(pocPath)))
+        manifest.record(filenumbers[-1], "generate", [pocPath], pocPath)
+    manifest.record_generated(filenumbers)
+
+def ResumePoCs(manifest: RM.RunManifest):
+    """This function returns the PoCs generated by the resumed run.
+
+    args:
+        manifest (RunManifest): manifest of the run.
+
+    returns:
+        (list) PoC file paths including the original PoC.
+        (None) if the run is not resumed, or its PoCs were not all generated.
+    """
+
+    if not manifest or not manifest.resumed:
+        return None
+    filenumbers = manifest.generated()
+    if filenumbers is None:
+        return None
+
+    return [manifest.completed(filenumber, "generate")["value"] for filenumber in filenumbers]
+
+def pocs_key(PoC: str, number: int, unique: bool = False):
+    """This function computes the cache key of the PoCs generated from
+    the original PoC.
+
+    args:
+        PoC (str): Original PoC file path.
+        number (int): A number of PoCs to modify & generate from the original PoC.
+        unique (bool): If True, the duplicate PoCs are regenerated.
+
+    returns:
+        (str) cache key.
+    """
+
+    with open(PoC, "rb") as f:
+        poc = f.read()
+
+    return SC.stage_key(
+            "pocs", poc, number, unique, sorted(FORMAT_KEYS),
+            SC.code_digest(PoCM, AstG), SC.file_digest(CG.JSCODEWORKER)
+    )
+
+def RestorePoCs(cache: SC.StageCache, key: str, directory: str):
+    """This function copies the cached generated PoCs to the poc directory,
+    and their Duplicates.json.
+
+    args:
+        cache (StageCache): cache of the generated PoCs.
+        key (str): cache key of the PoCs.
+        directory (str): Directory to store generated outout files.
+
+    returns:
+        (list) restored PoC file paths ordered by their file numbers.
+        (None) if the PoCs are not in the cache.
+    """
+
+    meta = cache.get(key)
+    if not meta:
+        return None
+
+    pocs = {name: directory + "/pocs/" + name for name in meta["value"]}
+    files = dict(pocs, duplicates=directory + "/etc/Duplicates.json")
+    if not cache.get(key, files):
+        return None
+
+    return list(pocs.values())
+
+def CachePoCs(cache: SC.StageCache, key: str, pocPaths: list, directory: str):
+    """This function stores the generated PoCs and their Duplicates.json
+    in the cache.
+
+    args:
+        cache (StageCache): cache of the generated PoCs.
+        key (str): cache key of the PoCs.
+        pocPaths (list): generated PoC file paths ordered by their file numbers.
+        directory (str): Directory to store generated outout files.
+
+    returns:
+        None.
+    """
+
+    names = [os.path.basename(pocPath) for pocPath in pocPaths]
+    files = dict(zip(names, pocPaths), duplicates=directory + "/etc/Duplicates.json")
+    cache.put(key, files, names)
+
+def GetGraphs(
+        directory: str, bytecode: str, pipe: bool = False, tee: bool = True, compression: str = None,
+        jobs: int = None, cache: SC.StageCache = None, not_jitted: list = None,
+        manifest: RM.RunManifest = None
+):
     """This function runs graph creator on each trace ascii files to create graphs.
 
     args:
         directory (str): Directory to store generated outout files.
         bytecode (str): bytecode file path.
+        pipe (bool): If True, trace2ascii is run on each trace file and its
+        output is consumed through a pipe instead of reading the ascii files.
+        tee (bool): If True, the piped output is also written to the ascii file.
+        compression (str): compressed file extension of the written asciis.
+        jobs (int): number of worker processes to create graphs concurrently.
+        If None, the files are processed one-by-one. With workers, a file that
+        fails is reported in Failed.json instead of aborting the whole run.
+        cache (StageCache): cache of the graphs.
+        not_jitted (list): file numbers of the PoCs that were not traced,
+        since they are known not to be jit compiled.
+        manifest (RunManifest): manifest of the run. The graphs created by
+        the resumed run are kept, and their traces are skipped.
 
     returns:
-        (dict) file number-to-graphs.
+        (GraphStore) file number-to-graphs, loaded on demand.
         (dict) file number-to-jitted status.
     """
 
     begin = time.time()
 
-    # Empty container to hold generated graphs.
-    # {__filenumber__: (__tuple__)}.
-    graphs = {}
-    # Keep a track either the PoC was JIT compiled or not.
-    # {__filenumber__: __bool__}.
-    jitted = {}
+    if not_jitted is None:
+        not_jitted = []
+
+    # Files that failed to create graphs.
+    # {__filenumber__: __error__}.
+    failed = {}
 
+    traceDir  = directory + "/traces"
     asciiDir  = directory + "/asciis"
     graphDir  = directory + "/graphs"
-    etcDir    = directory + "/etc"
 
     # Get the list of bytecodes for current V8 version.
     bytecode_dict = read_file(bytecode)
 
-    # Retrieve all ascii file names.
-    asciis = os.listdir(asciiDir)
-
-    # Process all ascii file one-by-one.
-    for ascii in asciis:
-        asciiPath = asciiDir + "/" + ascii
-        print ("GetGraphs: asciiPath:", asciiPath)
-        # Get file number, which will be the key for the graph dict.
-        # container.
-        filenumber = get_file_number(ascii)
-        # Load the ascii file content.
-        lines = read_file(asciiPath)
-        # Identify the scope of each optimisation phases from
-        # the GraphBuilderPhase.
-        (
-            phase_scopes,
-            has_exception,
-            line_number,
-            first_and_last
-        ) = PI.phase_identifier(lines)
-        # Fill jitted with either each file was jit compiled
-        # (True) or not (False).
-        jitted[filenumber] = True if phase_scopes else False
-        # If the PoC was not jit compiled, then there will be no graph
-        # generated. Therefore, we just move on to the next file.
-        # Otherwise, move to graph generation step.
-        if not jitted[filenumber]: continue
-        # Identify the optimised bytecode info based on V8 version.
-        (
-            bytecode_info,
-            line_number
-        ) = BI.bytecode_identifier(lines, bytecode_dict, phase_scopes)
-        # Get the initial JS nodes generated during the GraphBuilderPhase.
-        last_line = max(phase_scopes["GraphBuilderPhase"])
-        GraphBuilderPhase_lines = lines[line_number:last_line]
-        (
-            initial_nodes,
-            input_nodes
-        ) = OT.initial_node_identifier(
-                bytecode_info,
-                GraphBuilderPhase_lines
+    store = GS.GraphStore(graphDir)
+    # Graphs created by the resumed run. The other graphs are removed.
+    resumed = ResumeGraphs(store, manifest)
+
+    if pipe:
+        sources = trace_files(traceDir)
+    else:
+        # Retrieve all ascii file names. Line-offset index files and columnar
+        # stores are stored next to the ascii files, so they are excluded.
+        # TR.open_trace opens the store of an ascii file instead, if any.
+        sources = [
+            f for f in os.listdir(asciiDir)
+            if not f.endswith(TR.INDEX_SUFFIX) and ST.STORE_SUFFIX not in f
+        ]
+    # Files of the PoCs that were not traced are left from a previous run.
+    sources = [
+        f for f in sources
+        if get_file_number(f) not in not_jitted and get_file_number(f) not in resumed
+    ]
+    # Files are ordered by their file numbers, so the outputs are
+    # deterministic regardless of the directory listing.
+    sources.sort(key=file_number_order)
+
+    if not jobs:
+        # Process all ascii file one-by-one.
+        for source in sources:
+            filenumber, entry = GraphSource(
+                    directory, source, bytecode_dict, pipe, tee, compression, cache
             )
-        # Generate graphs and collect their properties.
-        graphs[filenumber] = GC.graph_former(
-                                    lines, 0, first_and_last[1],
-                                    initial_nodes["nodes"], phase_scopes
-        )
-        graph_file = graphDir + f"/graph_{str(filenumber)}.json"
-        with open(graph_file, 'w') as f:
-            json.dump(graphs[filenumber][0], f, indent=2)
+            RecordGraph(directory, store, filenumber, entry, pipe, tee, compression, manifest)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            runs = [
+                pool.submit(GraphSource, directory, source, bytecode_dict, pipe, tee, compression, cache)
+                for source in sources
+            ]
+            for source, run in zip(sources, runs):
+                try:
+                    filenumber, entry = run.result()
+                except Exception as error:
+                    # A failure is isolated to its own file.
+                    filenumber = get_file_number(source)
+                    failed[filenumber] = f"{type(error).__name__}: {error}"
+                    print ("GetGraphs: failed:", source, "-", failed[filenumber])
+                    continue
+                RecordGraph(directory, store, filenumber, entry, pipe, tee, compression, manifest)
+
+    # The PoCs that were not traced have no graphs.
+    for filenumber in not_jitted:
+        store.add(filenumber, {"jitted": False})
+    jitted = WriteGraphs(directory, store, failed)
+
+    end = time.time()
+    print ("TIME: GetGraphs -", "{0:.2f}".format((end-begin)/60), " mins")
+
+    return store, jitted
+
+def RecordGraph(
+        directory: str, store: GS.GraphStore, filenumber: str, entry: dict,
+        pipe: bool = False, tee: bool = True, compression: str = None,
+        manifest: RM.RunManifest = None
+):
+    """This function adds the graph shard of a single trace to the graph
+    store as soon as it is written, and records the graph stage in the
+    manifest. It runs in the main process, where the store and the
+    manifest are kept.
+
+    args:
+        directory (str): Directory to store generated outout files.
+        store (GraphStore): graph store of the run.
+        filenumber (str): file number.
+        entry (dict): graph store entry of the graph (GraphSource).
+        pipe (bool): If True, trace2ascii output of the trace file was piped.
+        tee (bool): If True, the piped output was also written to the ascii file.
+        compression (str): compressed file extension of the written ascii.
+        manifest (RunManifest): manifest of the run.
+
+    returns:
+        None.
+    """
+
+    asciiDir = directory + "/asciis"
+
+    store.add(filenumber, entry)
+    files = [GS.shard_file(store.directory, filenumber)] if entry["jitted"] else []
+    # The piped output is not converted by the trace2ascii stage. The ascii
+    # file is missing, if the graph was cached without it.
+    ascii_f = ascii_file(asciiDir, filenumber, compression)
+    if pipe and tee and os.path.exists(ascii_f):
+        files.append(ascii_f)
+    if manifest:
+        manifest.record(filenumber, "graph", files, entry["jitted"])
+
+def ResumeGraphs(store: GS.GraphStore, manifest: RM.RunManifest = None):
+    """This function keeps the graphs in the store that the manifest
+    records as created by the resumed run, and removes the others. The
+    kept graphs are not loaded.
+
+    args:
+        store (GraphStore): graph store of the run.
+        manifest (RunManifest): manifest of the run.
+
+    returns:
+        (dict) file number-to-graph store entries of the resumed run.
+    """
+
+    if not manifest or not manifest.resumed:
+        store.clear()
+        return {}
+
+    resumed = {}
+    for filenumber in store.jitted():
+        # The shard may be lost, if the run stopped while writing it.
+        if manifest.completed(filenumber, "graph"):
+            resumed[filenumber] = store.entries[filenumber]
+        else:
+            store.remove(filenumber)
+    if resumed:
+        print ("ResumeGraphs:", len(resumed), "graphs resumed")
+
+    return resumed
+
+def WriteGraphs(directory: str, store: GS.GraphStore, failed: dict):
+    """This function writes the JIT compilation status of the PoCs in
+    the graph store and the failed files to files. The graphs are
+    already in their shards.
+
+    args:
+        directory (str): Directory to store generated outout files.
+        store (GraphStore): graph store of the run.
+        failed (dict): file number-to-error of the traces that failed.
+
+    returns:
+        (dict) file number-to-jitted status.
+    """
+
+    etcDir = directory + "/etc"
+
+    # Keep a track either the PoC was JIT compiled or not.
+    # {__filenumber__: __bool__}.
+    jitted = store.jitted()
 
     # Write JIT compilation status dictionary to a JSON file.
     Jitted_f = etcDir + "/Jitted.json"
     with open(Jitted_f, 'w') as jf:
         json.dump(jitted, jf)
 
-    # Write graphs data to a file in byte.
-    graphs_f = graphDir + "/Graphs.pkl"
-    with open(graphs_f, "wb") as bin_file:
-        pickle.dump(graphs, bin_file)
+    # Write failed files to a JSON file.
+    Failed_f = etcDir + "/Failed.json"
+    with open(Failed_f, 'w') as ff:
+        json.dump(failed, ff, indent=2)
+
+    return jitted
+
+def RunPipeline(
+        PoC: str, bytecode: str, directory: str, number: int, executable: str,
+        stage_jobs: dict = None, timeout: float = None,
+        pipe: bool = False, tee: bool = True, compression: str = None,
+        write_asts: bool = True, cache: SC.StageCache = None, trace_opt: bool = False,
+        unique: bool = False, manifest: RM.RunManifest = None
+):
+    """This function runs all stages from generating the PoCs to creating the
+    graphs as a streaming pipeline instead of one stage after another. Each
+    PoC moves on to its next stage as soon as its current stage is done, so
+    a PoC is run, traced, converted, and analysed while the other PoCs are
+    still being generated or traced. Each stage has its own pool of workers,
+    which bounds the number of runs of the stage at once.
+
+    args:
+        PoC (str): Original PoC file path.
+        bytecode (str): bytecode file path.
+        directory (str): Directory to store generated outout files.
+        number (int): A number of PoCs to modify & generate from the original PoC.
+        executable (str): d8 executable.
+        stage_jobs (dict): stage (PIPELINE_STAGES)-to-number of workers. A stage
+        not in the dictionary defaults to the number of CPUs, except the
+        graph stage that defaults to one worker process.
+        timeout (float): seconds to wait for each d8 run.
+        pipe (bool): If True, trace2ascii output is piped into the graph creator.
+        tee (bool): If True, the piped output is also written to the ascii file.
+        compression (str): compressed file extension of the traces and asciis.
+        write_asts (bool): If True, the modified syntax trees are also
+        written to JSON files.
+        cache (StageCache): cache of the outputs of all stages.
+        trace_opt (bool): If True, only the PoCs that d8 --trace-opt reports
+        optimised by TurboFan are traced.
+        unique (bool): If True, the duplicate PoCs are regenerated until
+        there are the requested number of unique PoCs.
+        manifest (RunManifest): manifest of the run. The stages that the
+        resumed run completed are skipped.
+
+    returns:
+        (GraphStore) file number-to-graphs, loaded on demand.
+        (dict) file number-to-jitted status.
+        (dict) status (OK, CRASHED, or TIMEOUT)-to-file numbers.
+    """
+
+    begin = time.time()
+
+    stage_jobs = stage_jobs or {}
+    for stage in stage_jobs:
+        assert stage in PIPELINE_STAGES, f"ERROR: Unknown pipeline stage '{stage}'."
+
+    # Get the list of bytecodes for current V8 version.
+    bytecode_dict = read_file(bytecode)
+
+    # Graph creator is CPU bound python code, so it runs in worker processes.
+    # Other stages only wait for their subprocesses, so they run in threads.
+    workers = {
+        stage: stage_jobs.get(stage, 1 if stage == "graph" else os.cpu_count())
+        for stage in PIPELINE_STAGES
+    }
+    pools = {}
+    for stage in PIPELINE_STAGES:
+        if stage == "graph":
+            pools[stage] = concurrent.futures.ProcessPoolExecutor(max_workers=workers[stage])
+        else:
+            pools[stage] = concurrent.futures.ThreadPoolExecutor(max_workers=workers[stage])
+    # The worker processes are forked when the first task is submitted. They
+    # must be forked before the other stages start their subprocesses from
+    # threads, otherwise the workers inherit the pipes of the subprocesses,
+    # and reading the pipes never ends.
+    pools["graph"].submit(os.getpid).result()
+    # Each PoC is driven through the stages by a driver thread, which
+    # only waits for the stage pools, so it does not take a stage worker.
+    # The stages do not run more PoCs at once than their workers, so the
+    # drivers are bounded by them, and the other PoCs wait for a driver.
+    drivers = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=min(number + 1, sum(workers.values()))
+    )
+
+    key, restored, generator = None, None, None
+    resumedPoCs = ResumePoCs(manifest)
+    if resumedPoCs is None:
+        # The stages recorded for the PoCs of an unfinished generation
+        # do not hold for the new PoCs.
+        if manifest:
+            manifest.reset()
+        key = pocs_key(PoC, number, unique) if cache else None
+        restored = RestorePoCs(cache, key, directory) if key else None
+        # The generate stage shares a single code generation worker.
+        generator = CG.CodeGenerator() if restored is None else None
+    store = GS.GraphStore(directory + "/graphs")
+    # Graphs created by the resumed run. The other graphs are removed.
+    resumed = ResumeGraphs(store, manifest)
+    # [PoC file path, generate stage] of each PoC.
+    generated = []
+
+    summary = {status: [] for status in D8_STATUSES}
+    # Files that failed in any stage.
+    # {__filenumber__: __error__}.
+    failed = {}
+    first_graph = None
+    try:
+        runs = {}
+        if resumedPoCs is None:
+            original = pools["generate"].submit(CopyPoC, PoC, directory)
+            # The original PoC enters the pipeline before the PoCs are modified.
+            runs["0"] = drivers.submit(
+                    StreamPoC, pools, directory, original,
+                    bytecode_dict, executable, timeout, pipe, tee, compression, cache, trace_opt,
+                    store, manifest, resumed
+            )
+        if restored is None and resumedPoCs is None:
+            for m_Ast, pocPath in ModifyPoC(PoC, directory, number, write_asts, unique):
+                generated.append(
+                    (pocPath, pools["generate"].submit(GeneratePoC, generator, m_Ast, pocPath))
+                )
+        else:
+            # The cached or resumed PoCs are already generated.
+            for pocPath in restored or resumedPoCs:
+                generated.append((pocPath, concurrent.futures.Future()))
+                generated[-1][1].set_result(pocPath)
+        for pocPath, generate in generated:
+            runs[get_file_number(os.path.basename(pocPath))] = drivers.submit(
+                    StreamPoC, pools, directory, generate,
+                    bytecode_dict, executable, timeout, pipe, tee, compression, cache, trace_opt,
+                    store, manifest, resumed
+            )
+        if manifest and resumedPoCs is None:
+            generates = [original] + [generate for _, generate in generated]
+            concurrent.futures.wait(generates)
+            if not any(generate.exception() for generate in generates):
+                RecordPoCs(manifest, [generate.result() for generate in generates])
+
+        filenumbers = {run: filenumber for filenumber, run in runs.items()}
+        for run in concurrent.futures.as_completed(filenumbers):
+            try:
+                filenumber, status, entry = run.result()
+            except Exception as error:
+                # A failure is isolated to its own PoC.
+                filenumber = filenumbers[run]
+                failed[filenumber] = f"{type(error).__name__}: {error}"
+                print ("RunPipeline: failed:", filenumber, "-", failed[filenumber])
+                continue
+            summary[status].append(filenumber)
+            if entry["jitted"] and not first_graph:
+                first_graph = time.time()
+                print ("TIME: RunPipeline first graph -", "{0:.2f}".format((first_graph-begin)/60), " mins")
+    finally:
+        drivers.shutdown()
+        for pool in pools.values():
+            pool.shutdown()
+        if generator:
+            generator.close()
+
+    if key and restored is None and not any(generate.exception() for _, generate in generated):
+        CachePoCs(cache, key, [pocPath for pocPath, _ in generated], directory)
+
+    for status in summary:
+        summary[status].sort(key=lambda number: (len(number), number))
+    # The last graph has arrived, so the JIT compilation status is written for the merge.
+    jitted = WriteGraphs(directory, store, failed)
 
     end = time.time()
-    print ("TIME: GetGraphs -", "{0:.2f}".format((end-begin)/60), " mins")
+    print ("TIME: RunPipeline -", "{0:.2f}".format((end-begin)/60), " mins")
+    print ("RunD8:", ", ".join(f"{status} {len(numbers)}" for status, numbers in summary.items()))
+
+    return store, jitted, summary
+
+def StreamPoC(
+        pools: dict, directory: str, generated: concurrent.futures.Future, bytecode_dict: dict,
+        executable: str, timeout: float = None,
+        pipe: bool = False, tee: bool = True, compression: str = None,
+        cache: SC.StageCache = None, trace_opt: bool = False,
+        store: GS.GraphStore = None, manifest: RM.RunManifest = None, resumed: dict = None
+):
+    """This function drives a single PoC through the pipeline stages. Each
+    stage is submitted to the pool of the stage. The PoC is run with d8
+    while it is being traced, since they do not depend on each other.
+
+    args:
+        pools (dict): stage-to-pool of workers.
+        directory (str): Directory to store generated outout files.
+        generated (Future): the generate stage of the PoC that returns the PoC file path.
+        bytecode_dict (dict): dictionary of opcode-to-bytecode.
+        executable (str): d8 executable.
+        timeout (float): seconds to wait for the d8 run.
+        pipe (bool): If True, trace2ascii output is piped into the graph creator.
+        tee (bool): If True, the piped output is also written to the ascii file.
+        compression (str): compressed file extension of the trace and ascii.
+        cache (StageCache): cache of the outputs of all stages.
+        trace_opt (bool): If True, the PoC is traced only if d8 --trace-opt
+        reports it optimised by TurboFan.
+        store (GraphStore): graph store of the run.
+        manifest (RunManifest): manifest of the run. The stages that the
+        resumed run completed are skipped.
+        resumed (dict): file number-to-graph store entries of the resumed run.
+
+    returns:
+        (str) file number.
+        (str) status of the d8 run (OK, CRASHED, or TIMEOUT).
+        (dict) graph store entry of the graph.
+    """
+
+    if resumed is None:
+        resumed = {}
+
+    traceDir = directory + "/traces"
+    asciiDir = directory + "/asciis"
+    d8outDir = directory + "/d8outs"
+
+    pocPath = generated.result()
+    assert os.path.exists(pocPath), f"ERROR: PoC file '{pocPath}' was not generated."
+    filenumber = get_file_number(os.path.basename(pocPath))
+
+    run = pools["d8"].submit(
+            ManifestStage, manifest, filenumber, "d8",
+            lambda result: [d8out_file(d8outDir, filenumber)],
+            RunPoC, executable, pocPath, d8outDir, timeout, cache
+    )
+    # The graph was created by the resumed run.
+    if filenumber in resumed:
+        return filenumber, run.result()[1], resumed[filenumber]
+    if trace_opt:
+        filenumber, optimised = pools["d8"].submit(
+                ManifestStage, manifest, filenumber, "trace_opt", lambda result: [],
+                IsOptimised, executable, pocPath, timeout, cache
+        ).result()
+        # The PoC is not jit compiled, so it has no graph.
+        if not optimised:
+            store.add(filenumber, {"jitted": False})
+            return filenumber, run.result()[1], {"jitted": False}
+    tracePath = pools["tracer"].submit(
+            ManifestStage, manifest, filenumber, "tracer", lambda path: [path],
+            TracePoC, executable, pocPath, traceDir, compression, cache
+    ).result()
+    assert tracePath, f"ERROR: Tracer did not generate a trace for '{pocPath}'."
+
+    if pipe:
+        source = os.path.basename(tracePath)
+    else:
+        asciiPath = pools["trace2ascii"].submit(
+                ManifestStage, manifest, filenumber, "trace2ascii", lambda path: [path],
+                ConvertTrace, tracePath, asciiDir, compression, cache
+        ).result()
+        source = os.path.basename(asciiPath)
+    filenumber, entry = pools["graph"].submit(
+            GraphSource, directory, source, bytecode_dict, pipe, tee, compression, cache
+    ).result()
+    # The graph is added to the store as soon as its shard is written.
+    RecordGraph(directory, store, filenumber, entry, pipe, tee, compression, manifest)
+
+    return filenumber, run.result()[1], entry
+
+def GraphSource(
+        directory: str, source: str, bytecode_dict: dict,
+        pipe: bool = False, tee: bool = True, compression: str = None,
+        cache: SC.StageCache = None
+):
+    """This function creates the graph of a single trace and writes it to
+    its shard in the graph directory. It runs either in the main process
+    or in a worker process, so only the small store entry of the graph is
+    returned to the main process.
+
+    args:
+        directory (str): Directory to store generated outout files.
+        source (str): ascii file name, or trace file name if piped.
+        bytecode_dict (dict): dictionary of opcode-to-bytecode.
+        pipe (bool): If True, trace2ascii output of the trace file is piped.
+        tee (bool): If True, the piped output is also written to the ascii file.
+        compression (str): compressed file extension of the written ascii.
+        cache (StageCache): cache of the graphs.
+
+    returns:
+        (str) file number.
+        (dict) graph store entry of the graph, with its JIT compilation status.
+    """
+
+    traceDir  = directory + "/traces"
+    asciiDir  = directory + "/asciis"
+    graphDir  = directory + "/graphs"
+
+    # Get file number, which will be the key for the graph store.
+    filenumber = get_file_number(source)
+    shard = GS.shard_file(graphDir, filenumber)
+
+    trace_key = read_key(directory, filenumber) if cache else None
+    if trace_key:
+        key = SC.stage_key("graph_shard", trace_key, SC.command_digest([TRACE2ASCII]), bytecode_dict, analysis_key())
+        meta = cache.get(key)
+        if meta and (not meta["value"]["jitted"] or cache.get(key, {"shard": shard})):
+            # The piped output is not converted, so the ascii file is restored, if cached.
+            if pipe and tee:
+                cache.get(ascii_key(trace_key, compression), {"ascii": ascii_file(asciiDir, filenumber, compression)})
+            return filenumber, meta["value"]
+
+    if pipe:
+        tracePath = traceDir + "/" + source
+        print ("GetGraphs: tracePath:", tracePath)
+        ascii_f = ascii_file(asciiDir, filenumber, compression) if tee else None
+        # trace2ascii output is analysed while it is being converted.
+        with TR.plain_file(tracePath) as plainPath:
+            lines = TR.TracePipe([TRACE2ASCII, plainPath], ascii_f)
+            graph = AnalyseTrace(lines, bytecode_dict)
+            lines.close()
+    else:
+        asciiPath = asciiDir + "/" + source
+        print ("GetGraphs: asciiPath:", asciiPath)
+        lines = TR.open_trace(asciiPath)
+        graph = AnalyseTrace(lines, bytecode_dict)
+        lines.close()
+
+    entry = GS.write_shard(graphDir, filenumber, graph)
+
+    if trace_key:
+        cache.put(key, {"shard": shard} if entry["jitted"] else {}, entry)
+        if pipe and tee:
+            cache.put(ascii_key(trace_key, compression), {"ascii": ascii_f})
+
+    return filenumber, entry
+
+def analysis_key():
+    """This function computes the cache key of the analysis code that
+    creates the graphs, so any change in it invalidates the cached graphs.
+    The code of the restructure, merge, and simplification is not part
+    of it, since they run on the graphs.
+
+    returns:
+        (str) cache key.
+    """
+
+    return SC.stage_key("analysis", SC.code_digest(TS), inspect.getsource(AnalyseTrace))
+
+def AnalyseTrace(lines, bytecode_dict: dict):
+    """This function runs graph creator on the lines of a single trace.
+
+    args:
+        lines (MappedTrace, TraceStore, TracePipe, or list): trace lines.
+        bytecode_dict (dict): dictionary of opcode-to-bytecode.
+
+    returns:
+        (EventLog) event log of the graph.
+        (None) if the PoC was not jit compiled.
+    """
 
-    return graphs, jitted
+    # Scan the trace only once. Each stage below replays the
+    # lines it needs from the scan instead of rescanning the trace.
+    scanner = TS.TraceScanner(lines)
+    # Identify the scope of each optimisation phases from
+    # the GraphBuilderPhase.
+    (
+        phase_scopes,
+        has_exception,
+        line_number,
+        first_and_last
+    ) = scanner.phase_identifier()
+    if not phase_scopes:
+        return None
+    # Identify the optimised bytecode info based on V8 version.
+    (
+        bytecode_info,
+        line_number
+    ) = scanner.bytecode_identifier(bytecode_dict, phase_scopes)
+    # Get the initial JS nodes generated during the GraphBuilderPhase.
+    last_line = max(phase_scopes["GraphBuilderPhase"])
+    (
+        initial_nodes,
+        input_nodes
+    ) = scanner.initial_node_identifier(
+            bytecode_info,
+            line_number,
+            last_line
+        )
+    # Generate graphs and collect their properties.
+    return scanner.graph_former(
+                0, first_and_last[1],
+                initial_nodes["nodes"], phase_scopes
+    )
 
 def read_file(filename: str) -> list:
     """This function simply opens the file, if exists,
@@ -422,7 +1658,7 @@ def read_file(filename: str) -> list:
             with open(filename) as json_file:
                 return json.load(json_file)
         else:
-            with open(filename) as f:
+            with TR.open_file(filename) as f:
                 return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
@@ -449,6 +1685,18 @@ def argument_parser():
     returns:
         (str) path to trace ascii file.
         (str) path to bytecode json file.
+        (int) number of d8 and tracer runs at once.
+        (float) seconds to wait for each d8 run.
+        (bool) True, if trace2ascii output is piped.
+        (bool) True, if piped output is written to files.
+        (str) compressed file extension.
+        (bool) True, if the stages are run as a streaming pipeline.
+        (dict) pipeline stage-to-number of workers.
+        (bool) True, if the modified syntax trees are written to files.
+        (StageCache) cache of the stage outputs.
+        (None) if the stage outputs are not cached.
+        (bool) True, if only the PoCs optimised by TurboFan are traced.
+        (bool) True, if the duplicate PoCs are regenerated.
     """
 
     parser = argparse.ArgumentParser()
@@ -488,22 +1736,166 @@ def argument_parser():
         type=str,
         help="Output CSV file name."
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help=(
+            "Number of d8 runs, tracer runs, and graph creator processes at once. "
+            "Default: number of CPUs for d8 and tracer runs, and one for graph creator."
+        )
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds to wait for each d8 run."
+    )
+    parser.add_argument(
+        "-p",
+        "--pipe",
+        action="store_true",
+        help="Pipe trace2ascii output straight into the graph creator."
+    )
+    parser.add_argument(
+        "--no-tee",
+        action="store_true",
+        help="Do not write the piped trace2ascii output to the ascii files."
+    )
+    parser.add_argument(
+        "-z",
+        "--compression",
+        type=str,
+        choices=["gz", "xz", "bz2"],
+        default=None,
+        help="Compress the traces and ascii files."
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Run the stages as a streaming pipeline, so each PoC moves on to its next stage without waiting for the other PoCs."
+    )
+    parser.add_argument(
+        "--stage-jobs",
+        type=str,
+        nargs="+",
+        default=[],
+        metavar="STAGE=N",
+        help=(
+            f"Number of workers of each pipeline stage ({', '.join(PIPELINE_STAGES)}). "
+            "Default: --jobs, or number of CPUs and one for graph."
+        )
+    )
+    parser.add_argument(
+        "--tool-jobs",
+        type=str,
+        nargs="+",
+        default=[],
+        metavar="TOOL=N",
+        help=(
+            f"Number of runs of each tool ({', '.join(TL.TOOL_LIMITS)}) at once across all stages. "
+            "Default: number of CPUs, and a quarter of them for pin."
+        )
+    )
+    parser.add_argument(
+        "--no-asts",
+        action="store_true",
+        help="Do not write the modified syntax trees to JSON files."
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        type=str,
+        default=None,
+        help="A cache directory to skip the stages whose inputs have not changed."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=50,
+        help="Size limit of the cache in GB. Default: 50."
+    )
+    parser.add_argument(
+        "--trace-opt",
+        action="store_true",
+        help="Run d8 with --trace-opt first and trace only the PoCs optimised by TurboFan."
+    )
+    parser.add_argument(
+        "--unique",
+        action="store_true",
+        help="Regenerate the duplicate PoCs to reach the number of unique PoCs."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the stopped run in the output directory from its manifest (etc/Manifest.json)."
+    )
     
     args = parser.parse_args()
 
-    return args.file, args.bytecode, args.directory, args.number, args.csv, args.executable
+    stage_jobs = {stage: args.jobs for stage in PIPELINE_STAGES} if args.jobs else {}
+    for stage_job in args.stage_jobs:
+        stage, _, jobs = stage_job.partition("=")
+        assert (
+                stage in PIPELINE_STAGES and jobs.isdigit() and int(jobs) > 0
+        ), f"ERROR: Invalid stage jobs '{stage_job}'."
+        stage_jobs[stage] = int(jobs)
+    tool_jobs = {}
+    for tool_job in args.tool_jobs:
+        tool, _, jobs = tool_job.partition("=")
+        assert (
+                tool in TL.TOOL_LIMITS and jobs.isdigit() and int(jobs) > 0
+        ), f"ERROR: Invalid tool jobs '{tool_job}'."
+        tool_jobs[tool] = int(jobs)
+
+    return (
+            args.file, args.bytecode, args.directory, args.number, args.output, args.executable,
+            args.jobs, args.timeout, args.pipe, not args.no_tee, args.compression,
+            args.stream, stage_jobs, not args.no_asts,
+            SC.StageCache(args.cache, int(args.cache_size * (1 << 30))) if args.cache else None,
+            args.trace_opt, args.unique, args.resume, tool_jobs
+    )
 
 if __name__ == "__main__":
-    PoC, bytecode, directory, number, csv_f, executable = argument_parser()
+    (
+        PoC, bytecode, directory, number, csv_f, executable,
+        jobs, timeout, pipe, tee, compression,
+        stream, stage_jobs, write_asts, cache, trace_opt, unique, resume, tool_jobs
+    ) = argument_parser()
     CheckUserInputs(PoC, bytecode, directory, number)
-    # Get N number of modified PoCs from the original PoC.
-    GetPoCs(PoC, directory, number)
-    # Run d8 to get the outputs of each PoCs.
-    Crashes = RunD8(directory, excutable)
-    # Get ascii files for each PoC runs.
-    GetTraceAsciis(directory)
-    # Run graph creator to get graphs for each trace.
-    Graphs, Jitted = GetGraphs(directory, bytecode)
+    # All tools run on a single event loop with their own limits.
+    TL.get_runner(tool_jobs)
+    # An interrupt kills the running tools, so the run stops at once.
+    TL.cancel_on_interrupt()
+    # Completed stages of each PoC, so a stopped run can be resumed.
+    manifest = RM.RunManifest(directory, resume)
+    if stream:
+        # Generate, run, trace, and create graphs of each PoC as it goes.
+        Graphs, Jitted, Crashes = RunPipeline(
+                PoC, bytecode, directory, number, executable,
+                stage_jobs, timeout, pipe, tee, compression, write_asts, cache, trace_opt,
+                unique, manifest
+        )
+    else:
+        # Get N number of modified PoCs from the original PoC.
+        GetPoCs(PoC, directory, number, write_asts, cache, unique, manifest)
+        # Run d8 to get the outputs of each PoCs.
+        Crashes = RunD8(directory, executable, jobs, timeout, cache, manifest)
+        # Only trace the PoCs that get optimised by TurboFan, if requested.
+        traced, not_jitted = None, []
+        if trace_opt:
+            Optimised = RunTraceOpt(directory, executable, jobs, timeout, cache, manifest)
+            traced = [filenumber for filenumber in Optimised if Optimised[filenumber]]
+            not_jitted = [filenumber for filenumber in Optimised if not Optimised[filenumber]]
+        # Get ascii files for each PoC runs.
+        GetTraceAsciis(directory, not pipe, compression, executable, jobs, cache, traced, manifest)
+        # Run graph creator to get graphs for each trace.
+        Graphs, Jitted = GetGraphs(
+                directory, bytecode, pipe, tee, compression, jobs, cache, not_jitted, manifest
+        )
     # Restructure a graph to an appropriate format.
     restructured_graphs = GR.RestructureGraphs(Graphs)
     # IR merging.
@@ -7,7 +7,6 @@
 """
 
 import os, sys
-import re
 import json
 import argparse
 
@@ -18,9 +17,9 @@ parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
 import FunctionLists as FL
+import InstructionParser as IP
 import X86ASM as X86
-
-import x86Tracer.backTracer.instruction_restructor as IREST
+import TraceReader as TR
 
 # List of x86 registers.
 RSI = ["esi", "rsi"]
@@ -57,7 +56,7 @@ def instruction_address_identifier(re_inst: list):
         re_inst (list): restructured instruction line
 
     returns:
-        (str) Found instruction address in a string type.
+        (int) Found instruction address.
         (bool) Flag to indicate whether the address was found or not.
     """
 
@@ -79,7 +78,7 @@ def get_instruction_opcode(lines: list, instruction_addrs: list, start_from: int
     code generator generates.
 
     args:
-        lines (list): list of raw trace instructions.
+        lines (MappedTrace or list): raw trace instructions.
         instruction_addrs (list): list of instruction addresses.
         start_from (int): line number of instructions to start scanning.
         stop_line (int): line number of instructions to stop scanning.
@@ -92,14 +91,14 @@ def get_instruction_opcode(lines: list, instruction_addrs: list, start_from: int
     address_to_opcode = {}
     opcode_to_addresses = {}
     
-    for line in lines[start_from:stop_at]:
+    for line in TR.get_lines(lines, start_from, stop_at):
 
         # This is noot really needed, but for the efficiency purpose,
         # check the function name.
         if FL.INSTRUCTION not in line:
             continue
 
-        re_inst = IREST.instruction_splitter(line)
+        re_inst = IP.instruction_splitter(line)
 
         assert (
                 re_inst[2] == FL.INSTRUCTION
@@ -107,7 +106,7 @@ def get_instruction_opcode(lines: list, instruction_addrs: list, start_from: int
 
         for op in re_inst[5:]:
             if op[0] == "mw" and op[1] in instruction_addrs:
-                opcode = op[2].lstrip('0')
+                opcode = op[2]
                 assert (
                         op[1] not in address_to_opcode
                 ), f"ERROR: Address {op[1]} already in the dictionary - {address_to_opcode}"
@@ -129,7 +128,7 @@ def node_to_instruction_mapper(
     instruction address.
 
     args:
-        lines (list): list of raw trace instructions.
+        lines (MappedTrace or list): raw trace instructions.
         start_from (int): line number of instructions to start scanning.
         stop_line (int): line number of instructions to stop scanning.
         instruction_to_opcode (dict): dictionary of instruction address-to-opcode.
@@ -151,8 +150,8 @@ def node_to_instruction_mapper(
     is_instruction_gen = False
 
     line_number = start_from
-    for line in lines[start_from:]:
-        re_inst = IREST.instruction_splitter(line)
+    for line in TR.get_lines(lines, start_from):
+        re_inst = IP.instruction_splitter(line)
         function = re_inst[2]
         X86Op = re_inst[3]
         X86Op_SP = re_inst[3].split(' ')
@@ -166,7 +165,7 @@ def node_to_instruction_mapper(
                 if op[0] == "w" and op[1] == "rsi":
                     node = op[2]
             assert (
-                    node
+                    node is not None
             ), f"ERROR: VisitControl Node is not valid - Node: {node} - Line: {line}"
             current_node = node
             is_instruction_gen = True
@@ -176,7 +175,7 @@ def node_to_instruction_mapper(
                 if op[0] == "r" and op[1] == "rbx":
                     node = op[2]
             assert (
-                    node
+                    node is not None
             ), f"ERROR: VisitNode Node is not valid - Node: {node} - Line: {line}"
             current_node = node
             is_instruction_gen = True
@@ -186,7 +185,7 @@ def node_to_instruction_mapper(
         # code gets triggered only if this flag is true.
         if is_instruction_gen:
             assert (
-                    current_node
+                    current_node is not None
             ), f"ERROR: current_node is None.\nLine: {line}"
 
             # If the scanning has reached the Emit() instruction that actually emits the instruction address
@@ -201,10 +200,7 @@ def node_to_instruction_mapper(
                     if op[0] == "mw":
                         if op[2] in inst_addresses:
                             inst_address = op[2]
-            elif function != FL.EMIT and inst_address:
-                assert (
-                        inst_address
-                ), f"ERROR: inst_address is None.\nLine: {line}"
+            elif function != FL.EMIT and inst_address is not None:
                 if current_node not in node_to_instruction:
                     node_to_instruction[current_node] = [inst_address]
                 else:
@@ -226,7 +222,7 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
      operands) to the instruction addresses.
 
      args:
-        lines (list): list of raw trace instructions.
+        lines (MappedTrace or list): raw trace instructions.
         start_from (int): line number of instructions to start scanning.
         stop_at (int): line number of instructions to stop scanning.
 
@@ -260,8 +256,8 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
     # Flag to indicate turbo assembler has excuted.
     is_TurboAssembler = False
 
-    for line in lines[start_from:stop_at]:
-        re_inst = IREST.instruction_splitter(line)
+    for line in TR.get_lines(lines, start_from, stop_at):
+        re_inst = IP.instruction_splitter(line)
         function = re_inst[2]
         x86op = re_inst[3]
         asm_inst = re_inst[4]["asm_inst"]
@@ -269,7 +265,7 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
         # Extract instruction address.
         if function == FL.ADDINSTRUCTION and not has_found_inst:
             address, has_found_inst = instruction_address_identifier(re_inst)
-            if address:
+            if address is not None:
                 inst_addresses.append(address)
         elif function == FL.ADDINSTRUCTION and asm_inst[0] == "ret":
             has_found_inst = False
@@ -286,7 +282,7 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
         elif function == FL.ASSEMBLEINSTRUCTION and is_assemble_instruction and x86op not in X86.RET:
             # Identify and retrieve the instruction address that current
             # AssembleInstruction() is assembling the code.
-            if asm_inst[1][0] == "eax" and "ptr" in asm_inst[1][1] and not cur_instruction:
+            if asm_inst[1][0] == "eax" and "ptr" in asm_inst[1][1] and cur_instruction is None:
                 for op in re_inst[5:]:
                     if op[0] == "mr":
                         cur_instruction = op[1]
@@ -297,7 +293,7 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
         # Code generation is done by Assembler::X() after AssembleInstruction()
         # check for the instruction address and get the opcode for it.
         if is_assemble_instruction:
-            if re.match(FL.ASSEMBLER_REGEX, function):
+            if re_inst.category & IP.ASSEMBLER:
                 # Retrieve the opcode information, if any exists.
                 code, cur_dest = get_opcode(re_inst[5:], "mw")
                 # If encountered the first opcode of the instruction, then set the flags to True
@@ -310,8 +306,8 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
                         opcode_addresses.append(cur_dest)
                         prev_opcode = code
                     else:
-                        distance = int(cur_dest, 16) - int(opcode_addresses[-1], 16)
-                        is_equal = cur_dest[0] == opcode_addresses[-1][0]
+                        distance = cur_dest - opcode_addresses[-1]
+                        is_equal = leading_digit(cur_dest) == leading_digit(opcode_addresses[-1])
                         # Opcodes are written one next to each other. In other words,
                         # memory distance of one opcode and another is 1 unless a the previous
                         # opcode instruction was a jump instruction. Also, check for the base
@@ -335,8 +331,8 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
                         else:
                             pass
                 elif asm_inst[0] == "mov" and "byteptr" in asm_inst[1][0] and is_one_code:
-                    distance = int(cur_dest, 16) - int(opcode_addresses[-1], 16)
-                    is_equal = cur_dest[0] == opcode_addresses[-1][0]
+                    distance = cur_dest - opcode_addresses[-1]
+                    is_equal = leading_digit(cur_dest) == leading_digit(opcode_addresses[-1])
                     if (
                             distance == 1
                             or ((prev_opcode in X86.ONE_BYTE_JX 
@@ -353,7 +349,7 @@ def instruction_to_code_mapper(lines: list, start_from: int, stop_at: int):
                         prev_opcode = code
                 elif asm_inst[0] == "ret" and is_one_code:
                     assert (
-                            cur_instruction
+                            cur_instruction is not None
                     ), f"ERROR: There is no instruction exists (None) - line: {line}"
                     if cur_instruction in instruction_to_code:
                         instruction_to_code[cur_instruction].append(cur_code)
@@ -372,19 +368,52 @@ def get_opcode(rw_insts: list, op: str):
         op (str): represents either read (r) or write (w) operation.
 
     returns:
-        (str) found address.
+        (str) found opcode byte in hex, as in the x86 opcodes of the trace.
+        (int) address where the opcode was written.
     """
 
     opcode = None
     opcode_addr = None
 
     for inst in rw_insts:
-        if inst[0] == op and len(inst[2]) == 2:
+        # Opcodes are written one byte (2 hex digits) at a time.
+        if inst[0] == op and inst[3] == 2:
             opcode_addr = inst[1]
-            opcode = inst[2]
+            opcode = f"{inst[2]:02x}"
 
     return opcode, opcode_addr
 
+def leading_digit(address: int):
+    """This function returns the leading hex digit of the address.
+
+    args:
+        address (int): memory address.
+
+    returns:
+        (int) leading hex digit.
+    """
+
+    if address <= 0:
+        return 0
+
+    return address >> (4 * ((address.bit_length() - 1) // 4))
+
+def address_base(address: int):
+    """This function returns the base address of the address, i.e.,
+    its first 4 hex digits followed by zeros. For example, 0x2ade00000000
+    from 0x2ade00082ce2.
+
+    args:
+        address (int): address.
+
+    returns:
+        (int) base address.
+    """
+
+    shift = 4 * max(0, (address.bit_length() + 3) // 4 - 4)
+
+    return address >> shift << shift
+
 def instruction_to_optcode_mapper(instruction_to_codes: dict, optcodes: dict):
     """This function maps machine code to the instruction address.
 
@@ -504,7 +533,7 @@ def find_target_optfunction(instruction_to_codes: list, optcodes: dict):
         function addresses to executed machine codes that belong to it.
 
     returns:
-        (str) address of optimised function. 
+        (int) address of optimised function. 
     """
 
     optfunction_counter = {}
@@ -530,7 +559,7 @@ def find_optcode_match(codes: list, optcodes: dict):
         optcodes (dict): executed optimised codes.
 
     returns:
-        (str) address of optimised function.
+        (int) address of optimised function.
     """
 
     code_len = len(codes)
@@ -583,7 +612,7 @@ def optimised_code_identifier(lines: list, start_from: int):
     executions in the trace.
 
     args:
-        lines (list): list of raw trace instructions.
+        lines (MappedTrace or list): raw trace instructions.
 
     returns:
         (list) list of optimised codes. 
@@ -606,16 +635,16 @@ def optimised_code_identifier(lines: list, start_from: int):
 
     line_number = start_from
     
-    for line in lines[start_from:]:
-        re_inst = IREST.instruction_splitter(line)
-        # Store current instruction address after removing 0x.
+    for line in TR.get_lines(lines, start_from):
+        re_inst = IP.instruction_splitter(line)
+        # Store current instruction address.
         try:
-            current_addr = re_inst[0][2:]
+            current_addr = re_inst[0]
         except:
             assert (
                     False
             ), f"Something wrong with re_inst: {re_inst} - Line {line_number}; {line}"
-        current_addr_base = (current_addr[:4]).ljust(len(current_addr),'0')
+        current_addr_base = address_base(current_addr)
 
         if re_inst[2] == FL.FINALIZEJOBIMPL:
             address = get_opt_function_address(re_inst)
@@ -623,15 +652,14 @@ def optimised_code_identifier(lines: list, start_from: int):
                 for_debug[address] = []
                 optcodes[address] = []
                 collected_optcodes[address] = []
-                address_size = len(address)
                 cur_optfunction = address
                 # Considering first 4 bytes are the base address.
                 # For example, 2ade from 0x2ade00082ce2.
                 # Then, fill "0" for the rest of bytes.
-                cur_optfunction_base = address[:4].ljust(address_size,'0')
+                cur_optfunction_base = address_base(address)
 
         if re_inst[2] == FL.FUNCTION_ENTRY and not is_optf_entry and cur_optfunction:
-            is_optf_entry = is_optfunction_entry(re_inst[5:], cur_optfunction.zfill(16))
+            is_optf_entry = is_optfunction_entry(re_inst[5:], cur_optfunction)
             stop_increment = True
     
         if cur_optfunction and current_addr_base == cur_optfunction_base:
@@ -650,7 +678,7 @@ def optimised_code_identifier(lines: list, start_from: int):
                     is_optf_entry = True
                     is_within_optf = False
             else:
-                is_within_optf = is_optfunction_entry(re_inst[5:], cur_optfunction.zfill(16))
+                is_within_optf = is_optfunction_entry(re_inst[5:], cur_optfunction)
         else:
             # Reset all flag variables and value holder variables at the end of last
             # optimised code instruction collected.
@@ -672,7 +700,7 @@ def is_optfunction_entry(re_inst: list, cur_optfunction: str):
 
     args:
         re_inst (list): restructured instruction line.
-        cur_optfunction (str): current optimised function entry.
+        cur_optfunction (int): current optimised function entry.
 
     returns:
         (bool) true, current entry is an entry to the currently stroed optimised code.
@@ -697,7 +725,7 @@ def get_opt_function_address(line: list):
         line (list): restructured instruction line.
 
     returns:
-        (str) start address of optimised function.
+        (int) start address of optimised function.
     """
     assert (
             line
@@ -718,7 +746,7 @@ def get_opt_function_address(line: list):
         # then retrieve the rsi value that is an address of optimised function.
         for inst in line[5:]:
             if inst[0] == "w" and inst[1] == RSI[1]:
-                address = inst[2].lstrip('0')
+                address = inst[2]
 
     return address
 
@@ -788,7 +816,7 @@ def read_file(filename: str) -> list:
     """
 
     try:
-        with open(filename) as f:
+        with TR.open_file(filename) as f:
             return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
@@ -803,12 +831,12 @@ def read_file(filename: str) -> list:
 if __name__ == "__main__":
     input_f, start_from, stop_at = argument_parser()
 
-    lines = read_file(input_f)
+    lines = TR.open_trace(input_f)
     # Get executed optimised codes.
     optcodes, ignore, for_debug = optimised_code_identifier(lines, start_from)
     print ("Executed Optimised Code Instructions:")
     for address, codes in for_debug.items():
-        print ("Address: ", address)
+        print ("Address: ", IP.address_text(address))
         print ("Codes:")
         for code in codes:
             print (code)
@@ -824,7 +852,7 @@ if __name__ == "__main__":
     inst_to_optcodes = instruction_to_optcode_mapper(instruction_to_opcodes, optcodes)
     # print ("Instruction_to_optcode: ", inst_to_optcodes)
     for inst, optcodes in inst_to_optcodes.items():
-        print (f"0x{inst}")
+        print (IP.address_text(inst))
         for optcode in optcodes:
             print (f" - {optcode}")
     print ("")
@@ -835,8 +863,8 @@ if __name__ == "__main__":
     )
     print (f"node_to_instruction:")
     for node, insts in node_to_instruction.items():
-        print (f"Node: {node}, Inst: {insts}")
+        print (f"Node: {IP.address_text(node)}, Inst: {[IP.address_text(inst) for inst in insts]}")
 
-    finals = {"nodes":list(node_to_instruction.keys())}
+    finals = {"nodes":[IP.address_text(node) for node in node_to_instruction]}
     with open ("final_nodes.json", "w") as json_f:
         json.dump(finals, json_f)
@@ -9,10 +9,10 @@ sys.path.append(parentdir)
 
 import X86ASM as X86
 import FunctionLists as FL
+import InstructionParser as IP
+import TraceReader as TR
 import GraphCreator as GC
 
-import x86Tracer.backTracer.instruction_restructor as IREST
-
 PUSH_OP_INSTS = [
         "41 57",        # push r15
 #        "41 56",       # push r14
@@ -26,47 +26,66 @@ def NodeToOpcode_Mapper(lines: list):
     """
     """
 
-    node = [None]
-    current_op = None
-    current_addr = None
-    NodeToOpcode = {}
-    OpAddressToOpcode = {}
-
+    scanner = NodeToOpcodeScanner()
     for line in lines:
-        re_inst = IREST.instruction_splitter(line)
-        
+        scanner.scan(IP.instruction_splitter(line), line)
+
+    return scanner.NodeToOpcode
+
+class NodeToOpcodeScanner:
+    """State of NodeToOpcode_Mapper over the instructions scanned so
+    far. Only the instructions of the functions in FUNCTIONS change
+    the state.
+    """
+    FUNCTIONS = (
+        FL.OPERATOR,
+        FL.NEWNODE_STR,
+        FL.NEWNODEUNCHECKED_STR,
+        FL.CLONENODE_STR,
+        FL.NEW_STR,
+    )
+
+    def __init__(self):
+        self.node = [None]
+        self.current_op = None
+        self.current_addr = None
+        self.NodeToOpcode = {}
+        self.OpAddressToOpcode = {}
+
+    def scan(self, re_inst: list, line: str):
+        """
+        """
+
         image = re_inst[1]
         function = re_inst[2]
 
         if image != "d8":
-            continue
+            return
 
-        address_to_opcode(re_inst, OpAddressToOpcode)
+        address_to_opcode(re_inst, self.OpAddressToOpcode)
 
         if function == FL.NEWNODE_STR or function == FL.NEWNODEUNCHECKED_STR:
-            new_op, new_addr = get_opcode(re_inst, line, OpAddressToOpcode)
-            if new_op:
+            new_op, new_addr = get_opcode(re_inst, line, self.OpAddressToOpcode)
+            if new_op is not None:
                 # If current_op already exists, we replace the value of current_op with the new_op.
                 # This is because of the assumption that the last opcode appeared is the opcode
                 # for currently generating node.
-                current_op = new_op
-                current_addr = new_addr
+                self.current_op = new_op
+                self.current_addr = new_addr
         elif function == FL.CLONENODE_STR:
-            org_node = get_clone_node(re_inst, line, NodeToOpcode)
-            if org_node:
-                current_op = NodeToOpcode[org_node][0]
-                current_addr = NodeToOpcode[org_node][1]
+            org_node = get_clone_node(re_inst, line, self.NodeToOpcode)
+            if org_node is not None:
+                self.current_op = self.NodeToOpcode[org_node][0]
+                self.current_addr = self.NodeToOpcode[org_node][1]
         elif function == FL.NEW_STR:
-            assert current_op, f"ERROR: current_op is None - {line}"
+            assert self.current_op is not None, f"ERROR: current_op is None - {line}"
             if re_inst[4]['asm_inst'][1][0] == "rax":
-                GC.get_new_node(node, re_inst, line, {})
+                GC.get_new_node(self.node, re_inst, line, {})
             elif re_inst[4]['asm_inst'][0] == "ret":
-                assert node, f"ERROR: node[0] is None - {line}"
-                NodeToOpcode[node[0]] = [current_op, current_addr]
-                current_op = None
-                current_addr = None
-
-    return NodeToOpcode
+                assert self.node, f"ERROR: node[0] is None - {line}"
+                self.NodeToOpcode[self.node[0]] = [self.current_op, self.current_addr]
+                self.current_op = None
+                self.current_addr = None
 
 def get_clone_node(re_inst: list, line: str, NodeToOpcode: dict):
     """
@@ -109,17 +128,20 @@ def address_to_opcode(re_inst: list, OpAddressToOpcode: dict):
     """
 
     function = re_inst[2]
+    if function != FL.OPERATOR:
+        return
+
     asm_inst = re_inst[4]['asm_inst']
     if (
-            function == FL.OPERATOR
-            and asm_inst[0] == "mov"
+            asm_inst[0] == "mov"
             and "wordptr" in asm_inst[1][0]
             and "rdi+0x10" in asm_inst[1][0]
             and asm_inst[1][1] == "si"
     ):
-        opcode, op_address = get_op(re_inst[5:])
+        opcode, op_address, width = get_op(re_inst[5:])
+        # The opcode is written as a 2-byte value.
         assert (
-                len(opcode) == 4
+                width == 4
         ), f"ERROR: opcode {opcode} is not in the correct form."
         # This assert's been commented out with an assumption that the opcode address
         # can be overwritten after used. Thus, we do not have to prohibit overwriting yet.
@@ -138,13 +160,15 @@ def get_op(rw_insts: list):
 
     opcode = None
     op_address = None
+    width = None
     for inst in rw_insts:
         if inst[0] == "mw":
             opcode = inst[2]
+            width = inst[3]
         elif inst[0] == "r" and inst[1] == "rdi":
             op_address = inst[2]
 
-    return opcode, op_address
+    return opcode, op_address, width
 
 def get_address(re_insts: list):
     """
@@ -157,7 +181,7 @@ def get_address(re_insts: list):
 def read_file(filename: str) -> list:
 
     try:
-        with open(filename) as f:
+        with TR.open_file(filename) as f:
             return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
@@ -192,5 +216,5 @@ if __name__ == "__main__":
     lines = read_file(ascii_f)
     NodeToOpcode = NodeToOpcode_Mapper(lines)
     for node, opcode in NodeToOpcode.items():
-        print(opcode[0])    # Prints only opcodes
+        print(IP.opcode_text(opcode[0]))    # Prints only opcodes
         #print (f"{node} = {opcode}") # Prints node address, opcode, and opcode address
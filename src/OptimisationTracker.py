@@ -9,7 +9,6 @@
     Author: Terrence J. Lim
 """
 import os
-import re
 import sys
 import argparse
 
@@ -22,9 +21,11 @@ sys.path.append(parentdir)
 import X86ASM as X86
 import PhaseIdentifier
 import FunctionLists as FL
+import TraceReader as TR
+import InstructionParser as IP
+import PhaseTimeline as PT
 
 # REGEX
-BETWEEN_BRACKET_REGEX = "\[(.*?)\]"
 OP_REGEX = "[\+\-\*\/]"
 
 # List of X86 operations.
@@ -37,10 +38,9 @@ ARGUMENT_PUSHES = [
 ]
 EXCEPTION = "EXCEPTION"
 
-def instruction_splitter(inst_line: str) -> list:
-    """This function splits and clean up the instrcution line.
-    The ascii file generated using updated trace2ascii under
-    uacs-lynx conveniently delimited the line with semi-colons (;).
+def instruction_splitter(inst_line: str):
+    """This function splits and clean up the instrcution line
+    with the shared parser in InstructionParser.
 
     args:
         inst_line (str): A single line of instruction read in from
@@ -56,90 +56,10 @@ def instruction_splitter(inst_line: str) -> list:
 
 
     returns:
-        (list): a list holding splitted instruction.
+        (Instruction): a parsed instruction indexed as the splitted list.
     """
 
-    idx = 0
-    splitted_inst = []
-    for elem in inst_line.split(';')[:-1]:
-        if idx == 5:
-            asm_inst = elem.strip().split(' ')
-            asm = []
-            mnemonics = ''.join(asm_inst[1:]).split(',')
-            if len(mnemonics) > 2:
-                for e in mnemonics:
-                    ptr = re.search(BETWEEN_BRACKET_REGEX, e)
-                    if ptr:
-                        asm.append(f"[{ptr.group(1)}]")
-                    else:
-                        asm.append(e)
-            else:
-                asm = mnemonics
-
-            splitted_inst.append({"asm_inst":[asm_inst[0], asm]})
-        elif idx > 5:
-            mem_accesses = elem.split(' ')[1:-1]
-            for inst in mem_accesses:
-                # Format example: ["R:RBP","0000000000000000"].
-                # ["MW[7ffd30632e80]","0000000000000000"]
-                splitted = inst.split('=')
-                if (
-                        "MR" in inst or
-                        "MW" in inst
-                ):
-                    mem_access = handle_memory_RW(splitted)
-                else:
-                    mem_access = handle_register_RW(splitted)
-                mem_access.append(splitted[-1])
-                splitted_inst.append(mem_access)
-        else:
-            splitted_inst.append(elem.strip())
-        idx += 1
-    
-    return splitted_inst[1:]
-
-def handle_memory_RW(splitted: list) -> list:
-    """This function splits the memory read and write
-    operation into a separate list and return the refined
-    format of list.
-
-    args:
-        splitted (list): a list of splitted memory read and write.
-
-    returns:
-        (list) refined list.
-    """
-
-    mem_access = []
-
-    # For example: ["MW","7ffd30632e80]"].
-    re_split = splitted[0].split("[")
-    # For example: "mw".
-    mem_access.append(re_split[0].lower())
-    # For example: "7ffd30632e80"
-    mem_access.append(re_split[1].strip(']'))
-
-    return mem_access
-
-def handle_register_RW(splitted: list) -> list:
-    """This function splits the register read and write
-    operation into a separate list and return the refined
-    format of list.
-
-    args:
-        splitted (list): a list of splitted register read and write.
-
-    returns:
-        (list) refined list.
-    """
-    reg_access = []
-
-    # Format example: r.
-    reg_access.append(splitted[0].split(':')[0].lower())
-    # Format example: rbp.
-    reg_access.append(splitted[0].split(':')[1].lower())
-
-    return reg_access
+    return IP.instruction_splitter(inst_line)
 
 def get_all_nodes(lines: list, start_from: int):
     """This function goes through all optimisation phases start
@@ -154,13 +74,12 @@ def get_all_nodes(lines: list, start_from: int):
         (list) list of collected node addresses.
     """
 
-    AllNodes = []
-    is_new = False
+    scanner = AllNodesScanner()
     line_number = start_from
 
-    for line in lines[start_from:]:
+    for line in TR.get_lines(lines, start_from):
         if EXCEPTION in line:
-            return AllNodes
+            return scanner.AllNodes
         re_inst = instruction_splitter(line)
         line_number += 1
 
@@ -172,34 +91,56 @@ def get_all_nodes(lines: list, start_from: int):
         except:
             assert False, f"ERROR: List index out of range - Line: {line_number}; {line}"
 
+        scanner.scan(re_inst, line)
+
+    return scanner.AllNodes
+
+class AllNodesScanner:
+    """State of get_all_nodes over the "Node::New" instructions
+    scanned so far.
+    """
+    def __init__(self):
+        self.AllNodes = []
+        self.is_new = False
+
+    def scan(self, re_inst: list, line: str):
+        """This function scans a single "Node::New" instruction and
+        collects the generated node address, if any.
+
+        args:
+            re_inst (list): restructured instruction.
+            line (str): raw instruction line.
+
+        returns:
+            None.
+        """
+
         if re_inst[3] == "55":
             # X86 opcode '55' is a function entry indication.
             # Therefore, set the is_new flag to True to start
             # analysing the instructions.
-            is_new = True
+            self.is_new = True
         elif re_inst[3] == "c3":
             # X86 opcode 'c3' is a function return.
             # Therefore, reset the is_new flag to False to end
             # the analysis.
-            is_new = False
+            self.is_new = False
 
         # Register 'rax' is where generated nodes are being stored for the caller function
         # to access. However, 'rax' can be used for other purposes as well, so if we let
         # the tool to collect the 'rax' value until the New()'s last write rax, we can
         # get the node address.
-        if is_new and re_inst[4]["asm_inst"][0] == "mov" and re_inst[4]["asm_inst"][1][0] == "rax":
+        if self.is_new and re_inst[4]["asm_inst"][0] == "mov" and re_inst[4]["asm_inst"][1][0] == "rax":
             node = None
             for op in re_inst[5:]:
                 if op[0] == "w" and op[1] == "rax":
                     node = op[2]
             assert (
-                    node
+                    node is not None
             ), f"ERROR: Node is empty - {line}"
-            AllNodes.append(node)
-
-    return AllNodes
+            self.AllNodes.append(node)
 
-def optimisation_tracker(lines: list, phase_scope: dict, number: int, address: str):
+def optimisation_tracker(lines: list, phase_scope: dict, number: int, address: int):
     """This function tracks all optimisation phases applied to each node
     and return the dictionary of tracked optimisation phases mapped to
     each node.
@@ -208,7 +149,7 @@ def optimisation_tracker(lines: list, phase_scope: dict, number: int, address: s
         lines (list): trace lines in list.
         phase_scope (dict): scope of each phase.
         number (int): line number to begin scanning.
-        address (str): address of target node to track optimisation.
+        address (int): address of target node to track optimisation.
 
     returns:
         (dict) phases that the node passed through.
@@ -228,18 +169,16 @@ def optimisation_tracker(lines: list, phase_scope: dict, number: int, address: s
 
     target_addr = address
     has_newnode = False
-    line_number = number
     prev_function = None
     last_phase = None
-    for raw_line in lines[number:]:
-        phase = get_current_phase(line_number, phase_scope)
-
-        line_number += 1
-        # If phase is None, then the line is an instruction that can be
-        # disregarded. So, simply skip to next line.
-        if not phase:
-            continue
-
+    # Only the first scope of each phase is checked, and the last phase
+    # in phase_scope wins as get_current_phase.
+    timeline = PT.PhaseTimeline(
+        {phase: scope[:2] for phase, scope in reversed(list(phase_scope.items()))}
+    )
+    # If phase is None, then the line is an instruction that can be
+    # disregarded. So, the lines outside of every phase are skipped.
+    for raw_line, phase in phase_lines(lines, timeline, number):
         re_inst = instruction_splitter(raw_line)
         
         function = re_inst[2]
@@ -305,14 +244,31 @@ def optimisation_tracker(lines: list, phase_scope: dict, number: int, address: s
 
     return phases, generated_nodes, ref_nodes, optimised_phases
 
-def is_accessing_node(accessing_insts: list, address: str):
+def phase_lines(lines, timeline, start_from: int):
+    """This function generates the trace lines that belong to a phase
+    from start_from with their phase.
+
+    args:
+        lines (TraceSource or list): raw trace lines.
+        timeline (PhaseTimeline): phase segments of the trace.
+        start_from (int): trace line number to start.
+
+    returns:
+        (generator) trace line and its phase.
+    """
+
+    for first, last, phase in timeline.phase_segments(start_from):
+        for raw_line in TR.get_lines(lines, first, last):
+            yield raw_line, phase
+
+def is_accessing_node(accessing_insts: list, address: int):
     """This function simply checks whether the current instruction
     is accessing the node or not.
 
     args:
         accessing_insts (list): memory and register accessing
         instructions.
-        address (str): target node's address.
+        address (int): target node's address.
 
     returns:
         (boolean) True, if the instruction is accessing node.
@@ -378,7 +334,7 @@ def initial_node_identifier(bytecode_info: dict, lines: list):
     args:
         bytecode_info (dict): dictionary holding bytecode information.
         {address: [opcode, bytecode, size]}
-        lines (list): a sublist of the trace that lines are only belongs to
+        lines (iterable): lines of the trace that only belongs to
         GraphBuilderPhase after bytecode offset setting.
 
     returns:
@@ -386,17 +342,48 @@ def initial_node_identifier(bytecode_info: dict, lines: list):
         (dict) JS node address-to-input node addresses dictionary.
     """
 
-    is_new           = False    # Flag to indicate Node::New function was entered.
-    current_bytecode = None     # Temp. holder to hold current bytecode.
-    prev_inst        = None     # Temp. holder to hold previous instruction.
-    initial_nodes    = {}       # Dict. of initial nodes for each bytecode.
-    input_nodes      = {}       # Dict. of inputs nodes to the new nodes.
-    gen_nodes        = []       # List of generated nodes.
-    inputs           = []       # List of input nodes.
-    input_count      = 0        # Number of input nodes to generate a new node.
-
+    scanner = InitialNodeScanner(bytecode_info)
     for line in lines:
-        re_inst = instruction_splitter(line)
+        scanner.scan(instruction_splitter(line))
+
+    return scanner.result()
+
+class InitialNodeScanner:
+    """State of initial_node_identifier over the instructions scanned
+    so far. Only the instructions of the functions in FUNCTIONS change
+    the state, but every instruction must be passed in order, since the
+    previous instruction is also checked.
+    """
+    FUNCTIONS = (
+        FL.VERSION_REF,
+        FL.CURRENT_BYTECODE_STR,
+        FL.NEWNODE_STR,
+        FL.NEWNODEUNCHECKED_STR,
+        FL.NEW_STR,
+    )
+
+    def __init__(self, bytecode_info: dict):
+        self.bytecode_info    = bytecode_info
+        self.is_new           = False    # Flag to indicate Node::New function was entered.
+        self.current_bytecode = None     # Temp. holder to hold current bytecode.
+        self.prev_inst        = None     # Temp. holder to hold previous instruction.
+        self.initial_nodes    = {}       # Dict. of initial nodes for each bytecode.
+        self.input_nodes      = {}       # Dict. of inputs nodes to the new nodes.
+        self.gen_nodes        = []       # List of generated nodes.
+        self.inputs           = []       # List of input nodes.
+        self.input_count      = 0        # Number of input nodes to generate a new node.
+
+    def scan(self, re_inst: list):
+        """This function scans a single restructured instruction.
+
+        args:
+            re_inst (list): restructured instruction.
+
+        returns:
+            None.
+        """
+
+        bytecode_info = self.bytecode_info
 
         # If current instruction function is "current_bytecode", which
         # is a function to identify and mark next target bytecode to generate
@@ -408,20 +395,20 @@ def initial_node_identifier(bytecode_info: dict, lines: list):
         ):
                 mr = get_mr(re_inst[5:])
                 if mr and mr[1] in bytecode_info:
-                    current_bytecode = mr[1]
+                    self.current_bytecode = mr[1]
 
         # With the current_bytecode variable holding the bytecode array index address
         # and "NewNode" or "NewNodeUnchecked" is encountered,
         if (
                 (re_inst[2] == FL.NEWNODE_STR or re_inst[2] == FL.NEWNODEUNCHECKED_STR)
-                and current_bytecode
+                and self.current_bytecode
         ):
-            if is_new:
+            if self.is_new:
                 # if the is_newnode and already marked to True and the previous
                 # instruction was "Node::New" function's return, 
                 if (
-                        prev_inst[2] == FL.NEW_STR
-                        and prev_inst[4]["asm_inst"][0] == "ret"
+                        self.prev_inst[2] == FL.NEW_STR
+                        and self.prev_inst[4]["asm_inst"][0] == "ret"
                 ):
                     # then we get the new node address by retrieving
                     # the value stored in the accumulator (rax). 
@@ -431,56 +418,65 @@ def initial_node_identifier(bytecode_info: dict, lines: list):
                             # node, so the below code breaks out once the "Return"
                             # node was collected.
                             if (
-                                    current_bytecode in initial_nodes
-                                    and bytecode_info[current_bytecode][0] == "ab"
+                                    self.current_bytecode in self.initial_nodes
+                                    and bytecode_info[self.current_bytecode][0] == 0xab
                             ):
                                 break
-                            initial_nodes[current_bytecode] = op[2]
-                            input_nodes[op[2]] = inputs
-                            gen_nodes.append(op[2])
+                            self.initial_nodes[self.current_bytecode] = op[2]
+                            self.input_nodes[op[2]] = self.inputs
+                            self.gen_nodes.append(op[2])
 
                     # Then, set is_new booleans to False and empty out inputs.
-                    is_new = False
-                    inputs = []
+                    self.is_new = False
+                    self.inputs = []
             else:
                 # Identify the instruction of function parameter
                 # int input_count passed to Node::New function.
                 if re_inst[4]["asm_inst"][1][0] == "ecx":
                     for op in re_inst[5:]:
                         if op[1] == "rcx":
-                            input_count = int(op[2], 16)
+                            self.input_count = op[2]
 
         if (
-                input_count > 0
-                and is_new
+                self.input_count > 0
+                and self.is_new
                 and re_inst[2] == FL.NEW_STR
                 and re_inst[4]["asm_inst"][0] == "mov"
                 and re_inst[3] == CONNECT_INPUT_PTR
         ):
-            get_input_nodes(re_inst[5:], gen_nodes, inputs)
+            get_input_nodes(re_inst[5:], self.gen_nodes, self.inputs)
 
         if (
-                not is_new
+                not self.is_new
                 and re_inst[2] == FL.NEW_STR
         ):
-            is_new = True
+            self.is_new = True
 
-        prev_inst = re_inst
+        self.prev_inst = re_inst
 
-    # Clean input nodes. This is not the best way to do it, but for now
-    # I will keep this way and update it later.
-    tmp = {}
-    for node, ipts in input_nodes.items():
-        tmp[node] = []
-        for ipt in ipts:
-            if ipt in list(initial_nodes.values()):
-                tmp[node].append(ipt)
-    input_nodes = tmp
+    def result(self):
+        """This function returns the identified initial nodes and
+        their input nodes.
 
-    # Convert initial nodes to dictionary type.
-    initial_nodes = {"nodes":list(initial_nodes.values())}
+        returns:
+            (dict) bytecode address-to-JS node address dictionary.
+            (dict) JS node address-to-input node addresses dictionary.
+        """
 
-    return initial_nodes, input_nodes
+        # Clean input nodes. This is not the best way to do it, but for now
+        # I will keep this way and update it later.
+        tmp = {}
+        for node, ipts in self.input_nodes.items():
+            tmp[node] = []
+            for ipt in ipts:
+                if ipt in list(self.initial_nodes.values()):
+                    tmp[node].append(ipt)
+        input_nodes = tmp
+
+        # Convert initial nodes to dictionary type.
+        initial_nodes = {"nodes":list(self.initial_nodes.values())}
+
+        return initial_nodes, input_nodes
 
 def get_input_nodes(insts: list, gen_nodes: list, inputs: list):
     """This function updates the inputs list with
@@ -559,7 +555,7 @@ def read_file(filename: str) -> list:
     """
 
     try:
-        with open(filename) as f:
+        with TR.open_file(filename) as f:
             return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
@@ -575,16 +571,18 @@ if __name__ == "__main__":
     filename, number, address = argument_parser()
     lines = read_file(filename)
     phase_scope, has_exception, line_number = phase_identifier.phase_identifier(lines)
-    phases, generated_nodes, ref_nodes, opt_phases = optimisation_tracker(lines, phase_scope, number, address)
+    phases, generated_nodes, ref_nodes, opt_phases = optimisation_tracker(
+            lines, phase_scope, number, IP.hex_value(address)
+    )
 
     for node, phase_list in phases.items():
-        print (f"Node [{node}] passed {phase_list} phase(s)")
+        print (f"Node [{IP.address_text(node)}] passed {phase_list} phase(s)")
         if node in opt_phases:
-            print (f"Node [{node}] was optimised in {opt_phases[node]} phase(s)\n")
+            print (f"Node [{IP.address_text(node)}] was optimised in {opt_phases[node]} phase(s)\n")
         for phase in phase_list:
             if phase in generated_nodes:
                 addr = generated_nodes[phase]
-                print (f"Node [{addr}] generated during [{phase}] phase")
+                print (f"Node [{IP.address_text(addr)}] generated during [{phase}] phase")
                 if addr in ref_nodes:
                     for node_addr in ref_nodes[addr]:
-                        print (f"Referenced node(s): {node_addr}")
+                        print (f"Referenced node(s): {IP.address_text(node_addr)}")
@@ -8,7 +8,6 @@ Example:
 Author: Terrence J. Lim
 """
 import os
-import re
 import sys
 import argparse
 import statistics
@@ -19,7 +18,8 @@ currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-import FunctionLists as FL
+import InstructionParser as IP
+import TraceReader as TR
 
 EXCEPTION = "EXCEPTION"
 
@@ -39,89 +39,121 @@ def instruction_splitter(inst_line: str):
             len(inst_line) > 0
     ), f"Line cannot be an empty string."
 
+    inst = IP.instruction_splitter(inst_line)
     try:
-        splitted = inst_line.split(';')[1:-1]
+        return inst.program, inst.function, inst.operation
     except Exception as e:
-        print (f"ERROR: {e} - Original: {inst_line} - Splitted: {inst_line.split(';')}")
-        assert False, "Terminating the Program"
-
-    idx = 0
-    splitted_inst = []
-    for elem in splitted:
-        if idx == 1 or idx == 2 or idx == 4:
-            if idx > 4:
-                # Since we only need 3 info. from the instruction line, we break
-                # out from the line scanning once they are all collected.
-                break
+        print (f"ERROR: {e} - raw line: {inst_line} - splitted inst: {inst}")
+        raise
+
+class PhaseScanner:
+    """State of the phase scope identification over the trace lines
+    scanned so far. phase_identifier feeds the lines one by one, and
+    TraceScanner shares the same state while running the other stages
+    over the same scan.
+    """
+    def __init__(self):
+        # Data Structure:
+        #   {Phase name = [first, last],}
+        self.opt_phase_scope = {}
+        self.phase_scope = {}
+        self.first_and_last = [0,0]
+        self.line_number = 1
+        self.has_exception = False
+
+    def scan(self, raw_line: str):
+        """This function scans a single trace line and updates the
+        phase scopes.
+
+        args:
+            raw_line (str): A single line of instruction read in from
+            the ascii trace file.
+
+        returns:
+            (Instruction) parsed instruction of the line.
+            (None) if the line is an exception, so the scan must stop.
+        """
+
+        # If "EXCEPTION" occured, then following instructions are
+        # for debugging process and program termination, so we can
+        # safely ignore rest and break out from the loop.
+        if IP.is_exception(raw_line):
+            self.has_exception = True
+            return None
+
+        inst = IP.instruction_splitter(raw_line)
+        self.scan_instruction(inst)
+
+        return inst
+
+    def scan_instruction(self, inst):
+        """This function updates the phase scopes with the parsed
+        instruction of the current line.
+
+        args:
+            inst (Instruction): parsed instruction.
+
+        returns:
+            None.
+        """
+
+        # Phase functions are identified with OPT_PHASE_REGEX and PHASE_REGEX
+        # once per function name when the function is interned.
+        category = inst.category
+        if category & (IP.OPT_PHASE | IP.PHASE) and inst.program == "d8":
+            phase = IP.FUNCTION_PHASES[inst.function_id]
+            if category & IP.OPT_PHASE:
+                fill_phase_scopes(self.opt_phase_scope, self.line_number, inst.operation, phase, self.first_and_last)
             else:
-                splitted_inst.append(elem.strip())
-        idx += 1
+                fill_phase_scopes(self.phase_scope, self.line_number, inst.operation, phase, self.first_and_last)
 
-    try:
-        program = splitted_inst[0]
-        function = splitted_inst[1]
-        operation = splitted_inst[2]
-    except Exception as e:
-        print (f"ERROR: {e} - raw line: {inst_line} - splitted inst: {splitted_inst}")
+        self.line_number += 1
+
+    def result(self):
+        """This function combines the collected scopes. It must be
+        called only once after the scan is completed.
+
+        returns:
+            (dict) phase name-to-scope dictionary.
+            (bool) True, if the scan stopped at an exception.
+            (int) last line number scanned.
+            (list) first and last phase line numbers.
+        """
 
-    return program, function, operation
+        opt_phase_scope = self.opt_phase_scope
+
+        # Combine two dictionaries.
+        for phase, scope in self.phase_scope.items():
+            if phase not in opt_phase_scope:
+                opt_phase_scope[phase] = scope
+            else:
+                opt_phase_scope[phase] += scope
+
+            # TODO: Fix the odd number of phase scopes properly.
+            # There was one case when handling V8 version 6.5.0 that one GraphBuilderPhase
+            # return instruction is missing resulting to making scope list odd.
+            if len(opt_phase_scope[phase]) % 2 != 0:
+                opt_phase_scope[phase].pop(1)
+
+        return opt_phase_scope, self.has_exception, self.line_number, self.first_and_last
 
 def phase_identifier(lines: list):
     """This function identifies the scope (line numbers) of each
     optimisation phase.
 
     args:
-        lines (list): lines of raw ascii traces.
+        lines (TraceSource or list): lines of raw ascii traces.
 
     returns:
         (dict) phase name-to-scope dictionary.
     """
-    p_re = re.compile(FL.OPT_PHASE_REGEX)
 
-    # Data Structure:
-    #   {Phase name = [first, last],}
-    opt_phase_scope = {}
-    phase_scope = {}
-    first_and_last = [0,0]
-
-    line_number = 1
-    has_exception = False
-    is_match = False
+    scanner = PhaseScanner()
     for raw_line in lines:
-        # If "EXCEPTION" occured, then following instructions are
-        # for debugging process and program termination, so we can
-        # safely ignore rest and break out from the loop.
-        if EXCEPTION in raw_line:
-            has_exception = True
+        if scanner.scan(raw_line) is None:
             break
 
-        program, function, operation = instruction_splitter(raw_line)
-        re_phase = p_re.search(function)
-        if program == "d8":
-            if re_phase:
-                re_phase = p_re.search(function)
-                phase = re_phase.group("phase")
-                fill_phase_scopes(opt_phase_scope, line_number, operation, phase, first_and_last)
-            elif re.match(FL.PHASE_REGEX, function):
-                phase = function.split("::")[3]
-                fill_phase_scopes(phase_scope, line_number, operation, phase, first_and_last)
-
-        line_number += 1
-
-    # Combine two dictionaries.
-    for phase, scope in phase_scope.items():
-        if phase not in opt_phase_scope:
-            opt_phase_scope[phase] = scope
-        else:
-            opt_phase_scope[phase] += scope
-
-        # TODO: Fix the odd number of phase scopes properly.
-        # There was one case when handling V8 version 6.5.0 that one GraphBuilderPhase
-        # return instruction is missing resulting to making scope list odd.
-        if len(opt_phase_scope[phase]) % 2 != 0:
-            opt_phase_scope[phase].pop(1)
-
-    return opt_phase_scope, has_exception, line_number, first_and_last
+    return scanner.result()
 
 def fill_phase_scopes(phase_scope: dict, line_number: int, operation: str, phase: str, first_and_last: list):
     if phase not in phase_scope:
@@ -194,7 +226,7 @@ def read_file(filename: str) -> list:
     """
 
     try:
-        with open(filename) as f:
+        with TR.open_file(filename) as f:
             return f.readlines()
     except IOError as x:
         if x.errno == errno.ENOENT:
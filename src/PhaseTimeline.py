@@ -0,0 +1,230 @@
+"""
+    This program indexes the phase scopes identified by phase_identifier
+    on the trace line numbers.
+
+    The phase of a line used to be looked up by looping over every scope
+    of every phase on each trace line. PhaseTimeline splits the trace
+    into segments of consecutive lines that belong to the same phase
+    once, so the phase of a line is found by bisect, or in O(1) with a
+    cursor while the lines are scanned in order. The segments are also
+    iterated directly, so the lines outside of every phase are skipped
+    without being read, and they carry the sequential phase ids that
+    graph_former assigns.
+
+    Example,
+        $python3 PhaseTimeline.py -f <ascii.out>
+"""
+
+import os, sys
+import bisect
+import argparse
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import PhaseIdentifier as PI
+import TraceReader as TR
+
+class PhaseTimeline:
+    """Segments of the trace lines by phase. A line belongs to the
+    first phase, in the order of phase_scopes, that has a scope
+    [first, last] with first < line < last, as GraphCreator.get_current_phase.
+    """
+    def __init__(self, phase_scopes: dict):
+        """
+        args:
+            phase_scopes (dict): phase name-to-scope dictionary.
+        """
+
+        bounds = set()
+        for phase, scopes in phase_scopes.items():
+            assert (
+                    len(scopes) % 2 == 0
+            ), f"ERROR: Scope length for phase [{phase}] is odd - [{scopes}]"
+            for i in range(0, len(scopes), 2):
+                if scopes[i] + 1 < scopes[i+1]:
+                    bounds.add(scopes[i] + 1)
+                    bounds.add(scopes[i+1])
+
+        # First line number of each segment and its phase. The lines
+        # before the first segment do not belong to any phase.
+        self.starts = []
+        self.phases = []
+        for start in sorted(bounds):
+            phase = phase_of(start, phase_scopes)
+            if self.phases and self.phases[-1] == phase:
+                continue
+            if not self.phases and phase is None:
+                continue
+            self.starts.append(start)
+            self.phases.append(phase)
+
+    def phase_at(self, line_number: int):
+        """This function returns the phase of the line.
+
+        args:
+            line_number (int): trace line number.
+
+        returns:
+            (str) phase name.
+            (None) if the line is not within any phase scope.
+        """
+
+        i = bisect.bisect_right(self.starts, line_number) - 1
+        return self.phases[i] if i >= 0 else None
+
+    def cursor(self):
+        """This function returns a cursor to look up the phases of
+        the lines in increasing order.
+
+        returns:
+            (PhaseCursor) cursor at the beginning of the trace.
+        """
+
+        return PhaseCursor(self)
+
+    def segments(self, start_from: int = 0, end_at: int = None):
+        """This function generates the segments between start_from
+        and end_at (exclusive).
+
+        args:
+            start_from (int): trace line number to start.
+            end_at (int): trace line number to stop. If None, the last
+            segment is left open.
+
+        returns:
+            (generator) [first, last (exclusive or None), phase] of each segment.
+        """
+
+        i = bisect.bisect_right(self.starts, start_from) - 1
+        first = start_from
+        while end_at is None or first < end_at:
+            phase = self.phases[i] if i >= 0 else None
+            last = self.starts[i+1] if i + 1 < len(self.starts) else None
+            if end_at is not None and (last is None or last > end_at):
+                last = end_at
+            yield first, last, phase
+            if last is None:
+                break
+            first = last
+            i += 1
+
+    def phase_segments(self, start_from: int = 0, end_at: int = None):
+        """This function generates the segments that belong to a phase
+        between start_from and end_at (exclusive).
+
+        returns:
+            (generator) [first, last (exclusive or None), phase] of each segment.
+        """
+
+        for segment in self.segments(start_from, end_at):
+            if segment[2]:
+                yield segment
+
+    def id_segments(self, start_from: int = 0, end_at: int = None):
+        """This function generates the segments between start_from
+        and end_at (exclusive) with the phase id that graph_former
+        assigns when it starts scanning at start_from. The phase id
+        starts from 0 and increases whenever the phase differs from
+        the last phase seen. The lines outside of any phase keep the
+        phase id of the last phase.
+
+        returns:
+            (generator) [first, last (exclusive or None), phase, phase id] of each segment.
+        """
+
+        phase_id = 0
+        last_phase = None
+        for first, last, phase in self.segments(start_from, end_at):
+            if phase:
+                if last_phase is not None and phase != last_phase:
+                    phase_id += 1
+                last_phase = phase
+            yield first, last, phase, phase_id
+
+class PhaseCursor:
+    """Forward cursor over a PhaseTimeline. Looking up the lines in
+    increasing order costs O(1) per line. Looking up an earlier line
+    falls back to bisect.
+    """
+    def __init__(self, timeline: PhaseTimeline):
+        self.timeline = timeline
+        # Index of the current segment. -1 is before the first segment.
+        self.index = -1
+
+    def phase_at(self, line_number: int):
+        """This function returns the phase of the line.
+
+        args:
+            line_number (int): trace line number.
+
+        returns:
+            (str) phase name.
+            (None) if the line is not within any phase scope.
+        """
+
+        starts = self.timeline.starts
+        if self.index >= 0 and line_number < starts[self.index]:
+            self.index = bisect.bisect_right(starts, line_number) - 1
+        else:
+            while self.index + 1 < len(starts) and starts[self.index+1] <= line_number:
+                self.index += 1
+
+        return self.timeline.phases[self.index] if self.index >= 0 else None
+
+def phase_of(line_number: int, phase_scopes: dict):
+    """This function finds the phase of the line by checking every
+    scope. It is used only once per segment to build the timeline.
+
+    args:
+        line_number (int): trace line number.
+        phase_scopes (dict): phase name-to-scope dictionary.
+
+    returns:
+        (str) phase name.
+        (None) if the line is not within any phase scope.
+    """
+
+    for phase, scopes in phase_scopes.items():
+        for i in range(0, len(scopes), 2):
+            if scopes[i] < line_number < scopes[i+1]:
+                return phase
+
+    return None
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the trace file name.
+
+    returns:
+        (str) file name.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="An input trace file."
+    )
+    args = parser.parse_args()
+
+    return args.file
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename = argument_parser()
+    lines = TR.open_trace(filename)
+    phase_scopes = PI.phase_identifier(lines)[0]
+    lines.close()
+
+    timeline = PhaseTimeline(phase_scopes)
+    for first, last, phase, phase_id in timeline.id_segments(0, max(timeline.starts, default=0)):
+        if phase:
+            print (f"[{first}, {last}) {phase_id}: {phase}")
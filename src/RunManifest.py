@@ -0,0 +1,217 @@
+"""
+    This program keeps the manifest of a Main run (etc/Manifest.json).
+
+    The manifest records the stages completed for each PoC and the size
+    and modification time of the files each stage wrote, so a stopped run
+    can be resumed without repeating the completed stages. A stage is
+    complete only if all of its files still exist with their recorded
+    sizes and modification times. The files are not read, as the traces
+    and ascii files of a PoC can be gigabytes, so this detects files that
+    were rewritten or cut off, not corrupted bytes.
+
+    Example,
+        $python3 RunManifest.py -d <Output Directory>
+"""
+
+import os
+import json
+import argparse
+import threading
+
+def file_state(filename: str):
+    """This function returns the size and modification time of the file,
+    which tell whether the file was changed after it was recorded.
+
+    args:
+        filename (str): file path.
+
+    returns:
+        (dict) size and modification time in nanoseconds.
+    """
+
+    stat = os.stat(filename)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+class RunManifest:
+    """Manifest of the completed stages of each PoC. It is written to the
+    file on every record, so it can be shared by the threads of a run.
+    """
+    def __init__(self, directory: str, resume: bool = False, read_only: bool = False):
+        """
+        args:
+            directory (str): Directory to store generated outout files.
+            resume (bool): If True, the manifest of the previous run is
+            loaded. Otherwise, the run starts with an empty manifest.
+            read_only (bool): If True, the manifest is only inspected, so
+            it is never written to the file.
+        """
+
+        self.directory = directory
+        self.filename = directory + "/etc/Manifest.json"
+        self.lock = threading.Lock()
+        self.read_only = read_only
+        self.resumed = resume and os.path.exists(self.filename)
+        if self.resumed:
+            with open(self.filename) as f:
+                self.manifest = json.load(f)
+        else:
+            # {"generated": [__filenumber__], "variants": {__filenumber__: {__stage__: __record__}}}.
+            self.manifest = {"generated": None, "variants": {}}
+            if not read_only:
+                os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+                self.save()
+
+    def save(self):
+        """This function writes the manifest to the file. The file is
+        replaced at once, so a stopped run leaves a complete manifest.
+
+        returns:
+            None.
+        """
+
+        assert (
+                not self.read_only
+        ), f"ERROR: Manifest '{self.filename}' is opened read-only."
+        tmp = self.filename + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.filename)
+
+    def record(self, filenumber: str, stage: str, files: list = None, value=None):
+        """This function records the stage of the PoC as complete.
+
+        args:
+            filenumber (str): file number of the PoC.
+            stage (str): stage name.
+            files (list): file paths written by the stage.
+            value (any): JSON serialisable value of the stage.
+
+        returns:
+            None.
+        """
+
+        if files is None:
+            files = []
+
+        record = {
+            "files": {
+                os.path.relpath(filename, self.directory): file_state(filename)
+                for filename in files
+            },
+            "value": value,
+        }
+        with self.lock:
+            self.manifest["variants"].setdefault(str(filenumber), {})[stage] = record
+            self.save()
+
+    def completed(self, filenumber: str, stage: str):
+        """This function checks whether the stage of the PoC was completed.
+
+        args:
+            filenumber (str): file number of the PoC.
+            stage (str): stage name.
+
+        returns:
+            (dict) record of the stage with its value and files.
+            (None) if the stage was not completed, or its files were changed.
+        """
+
+        with self.lock:
+            record = self.manifest["variants"].get(str(filenumber), {}).get(stage)
+        if not record:
+            return None
+
+        for filename, state in record["files"].items():
+            filename = self.directory + "/" + filename
+            if not os.path.exists(filename) or file_state(filename) != state:
+                return None
+
+        return record
+
+    def reset(self):
+        """This function removes all records, e.g., when the PoCs are
+        generated again.
+
+        returns:
+            None.
+        """
+
+        with self.lock:
+            self.manifest = {"generated": None, "variants": {}}
+            self.save()
+
+    def variants(self):
+        """This function returns the file numbers of the recorded PoCs.
+
+        returns:
+            (list) file numbers.
+        """
+
+        with self.lock:
+            return list(self.manifest["variants"])
+
+    def record_generated(self, filenumbers: list):
+        """This function records that all PoCs were generated.
+
+        args:
+            filenumbers (list): file numbers of the generated PoCs.
+
+        returns:
+            None.
+        """
+
+        with self.lock:
+            self.manifest["generated"] = list(filenumbers)
+            self.save()
+
+    def generated(self):
+        """This function returns the file numbers of the generated PoCs,
+        if all of them were generated and are unchanged.
+
+        returns:
+            (list) file numbers of the generated PoCs.
+            (None) if the PoCs were not generated.
+        """
+
+        filenumbers = self.manifest["generated"]
+        if filenumbers is None:
+            return None
+        for filenumber in filenumbers:
+            if not self.completed(filenumber, "generate"):
+                return None
+
+        return filenumbers
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the output directory.
+
+    returns:
+        (str) output directory.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-d",
+        "--directory",
+        type=str,
+        help="An output directory of Main."
+    )
+    args = parser.parse_args()
+
+    return args.directory
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    directory = argument_parser()
+    manifest = RunManifest(directory, resume=True, read_only=True)
+    if not manifest.resumed:
+        print (f"No manifest in {directory}.")
+    for filenumber in manifest.variants():
+        stages = manifest.manifest["variants"][filenumber]
+        completed = [stage for stage in stages if manifest.completed(filenumber, stage)]
+        print (f"{filenumber}: {', '.join(completed)}")
@@ -0,0 +1,320 @@
+"""
+    This program caches the outputs of the Main stages by the hash of
+    their inputs, e.g., PoC bytes, d8 binary, D8OPTIONS, bytecode
+    dictionary, and the analysis code, so re-running Main on the same
+    inputs skips the stages whose inputs have not changed.
+
+    Each entry is a directory named by its key that holds the output
+    files of the stage and meta.json with the value of the stage, e.g.,
+    the d8 run status. When the cache grows over its size limit, the
+    least recently used entries are removed.
+
+    Example,
+        $python3 StageCache.py -c <cache directory> -s <size limit in GB>
+"""
+
+import os, sys
+import json
+import types
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+META = "meta.json"
+# Entries being written are stored under the names with this prefix.
+TMP_PREFIX = ".tmp_"
+
+class StageCache:
+    """Content-addressed cache of the stage output files. Entries are
+    written to a temporary directory and renamed into place, so the
+    cache can be shared by multiple threads and processes.
+    """
+    def __init__(self, directory: str, max_size: int = None):
+        """
+        args:
+            directory (str): cache directory.
+            max_size (int): size limit of the cache in bytes. If None,
+            entries are never evicted.
+        """
+
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def entry(self, key: str):
+        """This function returns the directory of the entry.
+
+        args:
+            key (str): entry key.
+
+        returns:
+            (str) entry directory.
+        """
+
+        return self.directory + f"/{key[:2]}/{key}"
+
+    def get(self, key: str, files: dict = None):
+        """This function copies the output files of the entry to their
+        destinations.
+
+        args:
+            key (str): entry key.
+            files (dict): output name-to-destination file path.
+
+        returns:
+            (dict) meta data of the entry with the value of the stage.
+            (None) if the entry is not in the cache.
+        """
+
+        if files is None:
+            files = {}
+
+        entry = self.entry(key)
+        try:
+            with open(entry + "/" + META) as f:
+                meta = json.load(f)
+            for name, destination in files.items():
+                shutil.copyfile(entry + "/" + name, destination)
+            # Mark the entry as recently used.
+            os.utime(entry + "/" + META)
+        except (OSError, ValueError):
+            # The entry does not exist or was evicted while reading it.
+            return None
+
+        return meta
+
+    def put(self, key: str, files: dict = None, value=None):
+        """This function stores the output files and the value of the
+        stage as the entry, then evicts the least recently used entries
+        if the cache is over its size limit.
+
+        args:
+            key (str): entry key.
+            files (dict): output name-to-source file path.
+            value (any): JSON serialisable value of the stage.
+
+        returns:
+            None.
+        """
+
+        if files is None:
+            files = {}
+
+        entry = self.entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=os.path.dirname(entry))
+        size = 0
+        for name, source in files.items():
+            shutil.copyfile(source, tmp + "/" + name)
+            size += os.path.getsize(source)
+        with open(tmp + "/" + META, 'w') as f:
+            json.dump({"key": key, "files": sorted(files), "size": size, "value": value}, f)
+
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # The same entry was stored by another worker.
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        if self.max_size is not None:
+            self.evict(self.max_size, keep=key)
+
+    def entries(self):
+        """This function lists the entries in the cache.
+
+        returns:
+            (list) [last used time, size, entry directory] of each entry.
+        """
+
+        entries = []
+        for prefix in os.listdir(self.directory):
+            prefixDir = self.directory + "/" + prefix
+            if not os.path.isdir(prefixDir):
+                continue
+            for key in os.listdir(prefixDir):
+                if key.startswith(TMP_PREFIX):
+                    continue
+                meta_f = prefixDir + "/" + key + "/" + META
+                try:
+                    with open(meta_f) as f:
+                        size = json.load(f)["size"]
+                    entries.append((os.path.getmtime(meta_f), size, prefixDir + "/" + key))
+                except (OSError, ValueError, KeyError):
+                    continue
+
+        return entries
+
+    def evict(self, max_size: int, keep: str = None):
+        """This function removes the least recently used entries until
+        the cache size is within max_size.
+
+        args:
+            max_size (int): size limit of the cache in bytes.
+            keep (str): key of the entry not to remove.
+
+        returns:
+            (int) cache size after the eviction.
+        """
+
+        entries = sorted(self.entries())
+        size = sum(entry[1] for entry in entries)
+        for used, entry_size, entry in entries:
+            if size <= max_size:
+                break
+            if os.path.basename(entry) == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            size -= entry_size
+
+        return size
+
+def stage_key(stage: str, *parts):
+    """This function computes the key of a stage output from its inputs.
+
+    args:
+        stage (str): stage name.
+        parts (bytes, str, or any JSON serialisable): inputs of the stage.
+
+    returns:
+        (str) hex digest of the inputs.
+    """
+
+    h = hashlib.sha256(stage.encode())
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        elif not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True).encode()
+        # Length prefix, so the parts cannot be confused with each other.
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+
+    return h.hexdigest()
+
+# File path, size, and modification time-to-digest. A file, e.g., the d8
+# binary, is read only once per process to hash it.
+_file_digests = {}
+_file_digests_lock = threading.Lock()
+
+def file_digest(filename: str):
+    """This function computes the digest of the file contents.
+
+    args:
+        filename (str): file path.
+
+    returns:
+        (str) hex digest of the file.
+    """
+
+    stat = os.stat(filename)
+    memo = (os.path.realpath(filename), stat.st_size, stat.st_mtime_ns)
+    with _file_digests_lock:
+        if memo in _file_digests:
+            return _file_digests[memo]
+
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+    with _file_digests_lock:
+        _file_digests[memo] = h.hexdigest()
+
+    return _file_digests[memo]
+
+def command_digest(command: list):
+    """This function computes the digest of the executable files of the
+    command, e.g., [pin, -t, Tracer.so, --]. The arguments that are not
+    files are hashed as they are.
+
+    args:
+        command (list): command and its arguments.
+
+    returns:
+        (str) hex digest of the command.
+    """
+
+    parts = []
+    for arg in command:
+        path = arg if os.sep in arg else shutil.which(arg)
+        if path and os.path.isfile(path):
+            parts.append(file_digest(path))
+        else:
+            parts.append(arg)
+
+    return stage_key("command", *parts)
+
+def code_digest(*modules):
+    """This function computes the digest of the source code of the
+    modules and of the modules they import from the same directories,
+    so any change in the code that a stage runs changes its keys.
+
+    args:
+        modules (module): modules that run the stage.
+
+    returns:
+        (str) hex digest of the source code.
+    """
+
+    directories = {os.path.dirname(os.path.realpath(m.__file__)) for m in modules}
+    seen = {}
+    stack = list(modules)
+    while stack:
+        module = stack.pop()
+        source = getattr(module, "__file__", None)
+        if not source or not source.endswith(".py"):
+            continue
+        source = os.path.realpath(source)
+        if source in seen or os.path.dirname(source) not in directories:
+            continue
+        seen[source] = file_digest(source)
+        stack.extend(v for v in vars(module).values() if isinstance(v, types.ModuleType))
+
+    return stage_key("code", *[seen[source] for source in sorted(seen)])
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the cache directory.
+
+    returns:
+        (str) cache directory.
+        (float) size limit in GB.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-c",
+        "--cache",
+        type=str,
+        help="A cache directory."
+    )
+    parser.add_argument(
+        "-s",
+        "--size",
+        type=float,
+        default=None,
+        help="Evict the least recently used entries down to this size in GB."
+    )
+    args = parser.parse_args()
+
+    return args.cache, args.size
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    directory, size = argument_parser()
+    cache = StageCache(directory)
+    if size is not None:
+        cache.evict(int(size * (1 << 30)))
+    entries = cache.entries()
+    print (f"{len(entries)} entries, {sum(entry[1] for entry in entries) / (1 << 30):.2f} GB")
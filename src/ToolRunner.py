@@ -0,0 +1,435 @@
+"""
+    This program runs the external tools of Main, e.g., d8, pin, and
+    trace2ascii, on a single asyncio event loop.
+
+    Each tool has its own limit of runs at once (TOOL_LIMITS), so many d8
+    runs can be in flight while only a few Pin runs are, since Pin holds
+    the instrumented d8 and its code cache in memory. The runs take their
+    slots from semaphores shared between processes, and a worker process
+    forked after the runner was started keeps the slots of its parent, so
+    the limits hold across all stages, threads, and worker processes that
+    run the tool. The standard output of each run is streamed line by line
+    to a consumer, straight to a file, or into a pipe that the caller
+    reads (ToolPipe) instead of being captured whole, and a run that times
+    out or is cancelled is killed and waited for, so no tool is left
+    running.
+
+    The event loop runs in its own thread, so the stage workers, which
+    are threads, call the tools the same way as subprocess.run.
+
+    Example,
+        $python3 ToolRunner.py -t <tool name> -c <command and its arguments>
+"""
+
+import os, sys
+import signal
+import asyncio
+import argparse
+import threading
+import contextlib
+import subprocess
+import multiprocessing
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+# Tool-to-number of runs at once. A tool not listed defaults to the number of CPUs.
+TOOL_LIMITS = {
+    "d8": os.cpu_count(),
+    "pin": max(1, os.cpu_count() // 4),
+    "trace2ascii": os.cpu_count(),
+}
+# Longest output line in bytes that can be streamed.
+LINE_LIMIT = 1 << 26
+# Seconds between the tries to take a slot that another process may free.
+SLOT_INTERVAL = 0.05
+
+class ToolRunner:
+    """Runner of the tool commands on an event loop in its own thread.
+    It can be shared by multiple threads.
+    """
+    def __init__(self, limits: dict = None, slots: dict = None):
+        """
+        args:
+            limits (dict): tool-to-number of runs at once. The tools not
+            in the dictionary default to TOOL_LIMITS.
+            slots (dict): tool-to-semaphore of the runs shared with other
+            processes, e.g., the slots of the parent process.
+        """
+
+        self.limits = dict(TOOL_LIMITS, **(limits or {}))
+        # Tool-to-semaphore shared between processes. The tools in the
+        # limits get theirs now, so the processes forked later share them.
+        self.slots = slots if slots is not None else {}
+        for tool, limit in self.limits.items():
+            if tool not in self.slots:
+                self.slots[tool] = multiprocessing.BoundedSemaphore(limit)
+        # Tools that were run by this runner.
+        self.started = set()
+        # The runner belongs to the process that started its event loop.
+        self.pid = os.getpid()
+        self.cancelled = False
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+                target=self.loop.run_forever, name="ToolRunner", daemon=True
+        )
+        self.thread.start()
+
+    def set_limits(self, limits: dict):
+        """This function changes the limits of the tools that were not run yet.
+
+        args:
+            limits (dict): tool-to-number of runs at once.
+
+        returns:
+            None.
+        """
+
+        for tool, limit in limits.items():
+            if tool not in self.started:
+                self.limits[tool] = limit
+                self.slots[tool] = multiprocessing.BoundedSemaphore(limit)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, tool: str):
+        """This function waits until the tool has a free slot, and holds
+        it until the run is done. The slot can be taken by another process,
+        so it is tried again without blocking the event loop.
+
+        args:
+            tool (str): tool name.
+
+        returns:
+            None.
+        """
+
+        self.started.add(tool)
+        if tool not in self.slots:
+            self.slots[tool] = multiprocessing.BoundedSemaphore(
+                                    self.limits.get(tool, os.cpu_count())
+            )
+        slot = self.slots[tool]
+        while not slot.acquire(block=False):
+            await asyncio.sleep(SLOT_INTERVAL)
+        try:
+            yield
+        finally:
+            slot.release()
+
+    async def run_async(
+            self, tool: str, command: list, timeout: float = None, cwd: str = None,
+            on_line=None, output_file: str = None, output_fd: int = None
+    ):
+        """This coroutine runs the command once the tool has a free slot.
+
+        args:
+            tool (str): tool name, e.g., d8.
+            command (list): command and its arguments.
+            timeout (float): seconds to wait for the run, not including the
+            wait for the slot. If None, wait until it ends.
+            cwd (str): working directory of the run.
+            on_line (function): function called with each output line
+            (str) as it is written. If None, the output is collected.
+            output_file (str): file to write the output to, e.g., os.devnull.
+            The output is not read through the runner then.
+            output_fd (int): file descriptor to write the output to, e.g., the
+            write end of a pipe. It is closed by the run, even if the run
+            never starts, so the reader of the pipe sees its end.
+
+        returns:
+            (CompletedProcess) return code, output (None if it was consumed
+            or written to the file), and standard error of the run.
+        """
+
+        try:
+            async with self.slot(tool):
+                output = open(output_file, 'wb') if output_file else None
+                if output_fd is not None:
+                    output = os.fdopen(output_fd, 'wb')
+                    output_fd = None
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                            *command,
+                            stdout=output or asyncio.subprocess.PIPE,
+                            stderr=asyncio.subprocess.PIPE,
+                            cwd=cwd,
+                            limit=LINE_LIMIT
+                    )
+                finally:
+                    # The tool has its own copy of the file.
+                    if output:
+                        output.close()
+
+                return await self.wait_run(process, command, timeout, on_line, output)
+        finally:
+            if output_fd is not None:
+                os.close(output_fd)
+
+    async def wait_run(self, process, command: list, timeout: float, on_line, output):
+        """This coroutine reads the output of the started run and waits for
+        it. The run is killed if it times out or is cancelled.
+
+        args:
+            process (asyncio.subprocess.Process): started run.
+            command (list): command and its arguments.
+            timeout (float): seconds to wait for the run.
+            on_line (function): function called with each output line.
+            output (file): file the output is written to, if it is not read.
+
+        returns:
+            (CompletedProcess) return code, output, and standard error of the run.
+        """
+
+        lines = []
+        async def read_output():
+            if output:
+                return
+            async for line in process.stdout:
+                line = line.decode(errors="replace")
+                if on_line:
+                    on_line(line)
+                else:
+                    lines.append(line)
+
+        try:
+            # The pipes are read while the tool runs, so it never
+            # blocks on a full pipe.
+            _, stderr, _ = await asyncio.wait_for(
+                    asyncio.gather(read_output(), process.stderr.read(), process.wait()),
+                    timeout
+            )
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(command, timeout)
+        finally:
+            # The run timed out or was cancelled.
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        return subprocess.CompletedProcess(
+                command, process.returncode,
+                None if output or on_line else "".join(lines),
+                stderr.decode(errors="replace")
+        )
+
+    def run(
+            self, tool: str, command: list, timeout: float = None, cwd: str = None,
+            on_line=None, output_file: str = None
+    ):
+        """This function runs the command on the event loop and waits for
+        it. The arguments are the same as run_async. The on_line function
+        is called from the event loop thread.
+
+        returns:
+            (CompletedProcess) return code, output, and standard error of the run.
+        """
+
+        if self.cancelled:
+            raise asyncio.CancelledError(f"{tool} runs were cancelled.")
+        future = asyncio.run_coroutine_threadsafe(
+                self.run_async(tool, command, timeout, cwd, on_line, output_file), self.loop
+        )
+        try:
+            return future.result()
+        except BaseException:
+            # The caller was interrupted, so the run is killed.
+            future.cancel()
+            raise
+
+    def pipe(self, tool: str, command: list, timeout: float = None, cwd: str = None):
+        """This function starts the command on the event loop without
+        waiting for it. Its output is written to a pipe that the caller
+        reads, so a large output, e.g., of trace2ascii, is consumed as it
+        is written without passing each line through the event loop.
+
+        args:
+            tool (str): tool name, e.g., trace2ascii.
+            command (list): command and its arguments.
+            timeout (float): seconds to wait for the run, not including the
+            wait for the slot. If None, wait until it ends.
+            cwd (str): working directory of the run.
+
+        returns:
+            (ToolPipe) pipe of the run.
+        """
+
+        if self.cancelled:
+            raise asyncio.CancelledError(f"{tool} runs were cancelled.")
+
+        return ToolPipe(self, tool, command, timeout, cwd)
+
+    def cancel(self):
+        """This function kills all running tools and makes the later runs
+        fail at once, e.g., when the run is interrupted.
+
+        returns:
+            None.
+        """
+
+        self.cancelled = True
+
+        async def cancel_runs():
+            runs = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in runs:
+                task.cancel()
+            await asyncio.gather(*runs, return_exceptions=True)
+
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(cancel_runs(), self.loop).result()
+
+    def close(self):
+        """This function kills the running tools and stops the event loop.
+
+        returns:
+            None.
+        """
+
+        self.cancel()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+class ToolPipe:
+    """Run of a tool whose output is read from a pipe. The run belongs to
+    the runner, so it waits for a slot of the tool, and it is killed when
+    it times out or the runner is cancelled. It has the parts of Popen
+    that the readers use: stdout, wait, and kill.
+    """
+    def __init__(self, runner: ToolRunner, tool: str, command: list, timeout: float, cwd: str):
+        """
+        args:
+            runner (ToolRunner): runner of the run.
+            tool (str): tool name.
+            command (list): command and its arguments.
+            timeout (float): seconds to wait for the run.
+            cwd (str): working directory of the run.
+        """
+
+        self.runner = runner
+        self.command = command
+        read_fd, write_fd = os.pipe()
+        # The output is read as it is written. The end of the output is
+        # seen once the run exits, or it did not start at all.
+        self.stdout = os.fdopen(read_fd, 'rb')
+
+        async def start():
+            return asyncio.ensure_future(
+                runner.run_async(tool, command, timeout, cwd, output_fd=write_fd)
+            )
+        self.task = asyncio.run_coroutine_threadsafe(start(), runner.loop).result()
+
+    def wait(self):
+        """This function waits for the run. It raises TimeoutExpired if
+        the run timed out, and CancelledError if it was cancelled.
+
+        returns:
+            (CompletedProcess) return code and standard error of the run.
+        """
+
+        async def result():
+            return await asyncio.shield(self.task)
+
+        return asyncio.run_coroutine_threadsafe(result(), self.runner.loop).result()
+
+    def kill(self):
+        """This function kills the run and waits until it is gone.
+
+        returns:
+            None.
+        """
+
+        async def stop():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(stop(), self.runner.loop).result()
+
+# Tool runner of the current process.
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner(limits: dict = None):
+    """This function returns the tool runner of the current process. The
+    runner is started on the first call.
+
+    args:
+        limits (dict): tool-to-number of runs at once. The limits apply
+        to the tools that were not run yet.
+
+    returns:
+        (ToolRunner) tool runner.
+    """
+
+    global _runner
+    with _runner_lock:
+        # A forked worker process does not have the event loop thread of its
+        # parent, so it starts its own runner, which shares the slots of the parent.
+        if _runner is None or _runner.pid != os.getpid():
+            _runner = ToolRunner(limits, dict(_runner.slots) if _runner else None)
+        elif limits:
+            _runner.set_limits(limits)
+
+    return _runner
+
+def cancel_on_interrupt():
+    """This function makes an interrupt (Ctrl-C) kill the running tools
+    before KeyboardInterrupt is raised, so the stage workers waiting for
+    the tools finish at once. It must be called from the main thread.
+
+    returns:
+        None.
+    """
+
+    def interrupt(signum, frame):
+        get_runner().cancel()
+        signal.default_int_handler(signum, frame)
+
+    signal.signal(signal.SIGINT, interrupt)
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the tool name and the command.
+
+    returns:
+        (str) tool name.
+        (list) command and its arguments.
+        (float) seconds to wait for the run.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-t",
+        "--tool",
+        type=str,
+        help="A tool name, e.g., d8."
+    )
+    parser.add_argument(
+        "-c",
+        "--command",
+        type=str,
+        nargs=argparse.REMAINDER,
+        help="A command and its arguments."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds to wait for the run."
+    )
+    args = parser.parse_args()
+
+    return args.tool, args.command, args.timeout
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    tool, command, timeout = argument_parser()
+    runner = get_runner()
+    output = runner.run(tool, command, timeout, on_line=lambda line: print (line, end=""))
+    runner.close()
+    print (f"{tool}: exited with {output.returncode}")
@@ -0,0 +1,580 @@
+"""
+    This program provides line sources over the ascii trace files.
+    Pin traces of d8 can grow up to tens of GB, so the analysis stages
+    consume the trace lines through these sources one line at a time
+    instead of loading the whole file into a list.
+
+    TraceSource simply streams the file from the beginning, while
+    MappedTrace memory-maps the file and keeps a line-offset index
+    next to it (<ascii file>.idx.npy), so any line or range of lines
+    can be reached without reading the lines before it.
+
+    Traces and ascii files can be stored compressed (.gz, .xz, or .bz2)
+    and are decompressed on the fly based on the file extension. Since a
+    compressed file cannot be memory-mapped, it is streamed instead.
+
+    TracePipe reads the lines from the output of a running command,
+    e.g., trace2ascii, so the trace can be analysed while it is being
+    converted without storing it first. The command is run by the tool
+    runner (ToolRunner), so it counts against the limit of the tool and
+    is killed when the runner is cancelled.
+
+    Example,
+        $python3 TraceReader.py -f <ascii.out> -s <start line> -e <end line>
+"""
+
+import os, sys
+import bz2
+import gzip
+import lzma
+import mmap
+import shutil
+import argparse
+import tempfile
+import itertools
+import contextlib
+import numpy as np
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import TraceStore as TS
+import ToolRunner as TL
+
+# Compression modules by the file extension.
+COMPRESSIONS = {
+    ".gz": gzip,
+    ".xz": lzma,
+    ".lzma": lzma,
+    ".bz2": bz2,
+}
+# Suffix of the line-offset index file stored next to the ascii file.
+INDEX_SUFFIX = ".idx.npy"
+# Number of bytes scanned at once while building the line-offset index.
+INDEX_CHUNK_SIZE = 1 << 26
+# Number of line offsets converted at once while iterating over a range.
+OFFSET_BLOCK_SIZE = 1 << 16
+
+class TraceSource:
+    """Streaming line source of a single ascii trace file. Every
+    iteration re-opens the file, so the source can be scanned by
+    multiple stages without holding any line in memory.
+    """
+    def __init__(self, filename: str):
+        assert (
+                os.path.exists(filename)
+        ), f"ERROR: Trace file '{filename}' does not exist."
+        self.filename = filename
+
+    def __iter__(self):
+        with open_file(self.filename) as f:
+            for line in f:
+                yield line
+
+    def lines(self, start_from: int, end_at: int = None):
+        """This function returns a generator of the trace lines
+        between start_from and end_at (exclusive).
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of file.
+
+        returns:
+            (generator) trace lines in the range.
+        """
+
+        return itertools.islice(iter(self), start_from, end_at)
+
+    def raw_lines(self, start_from: int, end_at: int = None):
+        """This function returns a generator of the undecoded trace
+        lines between start_from and end_at (exclusive).
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of file.
+
+        returns:
+            (generator) trace lines in bytes in the range.
+        """
+
+        with open_file(self.filename, "rb") as f:
+            for line in itertools.islice(f, start_from, end_at):
+                yield line
+
+    def close(self):
+        # Every iteration closes its own file, so nothing is left open.
+        pass
+
+class MappedTrace:
+    """Memory-mapped line source of a single ascii trace file. The
+    offset of every line is stored in a persistent index, so a line
+    is accessed in O(1) and a range of lines is generated straight
+    from the mapped file without copying the lines before it.
+    """
+    def __init__(self, filename: str):
+        assert (
+                os.path.exists(filename)
+        ), f"ERROR: Trace file '{filename}' does not exist."
+        self.filename = filename
+        self.file = open(filename, "rb")
+        self.size = os.path.getsize(filename)
+        # mmap cannot map an empty file.
+        self.map = None
+        if self.size > 0:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = load_line_index(filename, self.map, self.size)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, line_number: int):
+        if line_number < 0:
+            line_number += len(self)
+        if line_number < 0 or line_number >= len(self):
+            raise IndexError(f"ERROR: Line {line_number} is out of range of {self.filename}.")
+
+        begin = int(self.offsets[line_number])
+        end = int(self.offsets[line_number+1])
+
+        return self.map[begin:end].decode()
+
+    def __iter__(self):
+        return self.lines(0)
+
+    def lines(self, start_from: int, end_at: int = None):
+        """This function generates the trace lines between start_from
+        and end_at (exclusive) directly from the mapped file.
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of file.
+
+        returns:
+            (generator) trace lines in the range.
+        """
+
+        for line in self.raw_lines(start_from, end_at):
+            yield line.decode()
+
+    def raw_lines(self, start_from: int, end_at: int = None):
+        """This function generates the undecoded trace lines between
+        start_from and end_at (exclusive) directly from the mapped file.
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of file.
+
+        returns:
+            (generator) trace lines in bytes in the range.
+        """
+
+        if end_at is None or end_at > len(self):
+            end_at = len(self)
+
+        for block in range(start_from, end_at, OFFSET_BLOCK_SIZE):
+            block_end = min(block + OFFSET_BLOCK_SIZE, end_at)
+            offsets = self.offsets[block:block_end+1].tolist()
+            for i in range(0, len(offsets)-1):
+                yield self.map[offsets[i]:offsets[i+1]]
+
+    def find(self, sub: bytes, start: int = 0, end: int = None):
+        """This function finds the lowest offset of sub in the mapped
+        file between start and end without splitting any line.
+
+        returns:
+            (int) offset of sub, or -1 if not found.
+        """
+
+        if not self.map:
+            return -1
+        return self.map.find(sub, start, self.size if end is None else end)
+
+    def rfind(self, sub: bytes, start: int = 0, end: int = None):
+        """This function finds the highest offset of sub in the mapped
+        file between start and end without splitting any line.
+
+        returns:
+            (int) offset of sub, or -1 if not found.
+        """
+
+        if not self.map:
+            return -1
+        return self.map.rfind(sub, start, self.size if end is None else end)
+
+    def line_of(self, offset: int):
+        """This function returns the line number (0-based) of the line
+        holding the byte at the offset.
+
+        args:
+            offset (int): byte offset in the file.
+
+        returns:
+            (int) line number.
+        """
+
+        return int(np.searchsorted(self.offsets, offset, side='right')) - 1
+
+    def close(self):
+        if self.map:
+            self.map.close()
+        self.file.close()
+
+class TracePipe:
+    """Line source over the standard output of a running command, e.g.,
+    trace2ascii. The lines are consumed incrementally as the command
+    writes them, so the trace is analysed while it is converted, and
+    the lines can be copied (tee) to a file on the way. The lines can
+    only be read forward once.
+    """
+    def __init__(
+            self, command: list, tee_file: str = None, tool: str = "trace2ascii",
+            timeout: float = None
+    ):
+        """
+        args:
+            command (list): command and its arguments.
+            tee_file (str): file to copy the lines to. If None, the
+            lines are not stored anywhere.
+            tool (str): tool name of the command (ToolRunner.TOOL_LIMITS).
+            timeout (float): seconds to wait for the command. If None,
+            wait until it ends.
+        """
+
+        self.command = command
+        self.process = TL.get_runner().pipe(tool, command, timeout)
+        self.tee = open_file(tee_file, "wb") if tee_file else None
+        # Number of lines read so far.
+        self.position = 0
+        # True once the end of output is read.
+        self.ended = False
+
+    def __iter__(self):
+        return self.lines(self.position)
+
+    def lines(self, start_from: int, end_at: int = None):
+        """This function returns a generator of the trace lines
+        between start_from and end_at (exclusive).
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of output.
+
+        returns:
+            (generator) trace lines in the range.
+        """
+
+        for line in self.raw_lines(start_from, end_at):
+            yield line.decode()
+
+    def raw_lines(self, start_from: int, end_at: int = None):
+        """This function returns a generator of the undecoded trace
+        lines between start_from and end_at (exclusive).
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of output.
+
+        returns:
+            (generator) trace lines in bytes in the range.
+        """
+
+        assert (
+                start_from >= self.position
+        ), f"ERROR: Line {start_from} was already read from the pipe of {self.command}."
+
+        stdout = self.process.stdout
+        while end_at is None or self.position < end_at:
+            line = stdout.readline()
+            if not line:
+                self.ended = True
+                break
+            if self.tee:
+                self.tee.write(line)
+            self.position += 1
+            if self.position > start_from:
+                yield line
+
+    def close(self):
+        """This function finishes the command. If the lines are copied
+        to a file, the rest of output is read to complete the file.
+        Otherwise, the command is stopped if its output was not read to
+        the end, since nothing needs the rest.
+
+        returns:
+            None.
+        """
+
+        if self.tee:
+            for _ in self.raw_lines(self.position):
+                pass
+            self.tee.close()
+            self.tee = None
+        elif not self.ended:
+            self.process.kill()
+            self.process.stdout.close()
+            return
+
+        self.process.stdout.close()
+        output = self.process.wait()
+        assert (
+                output.returncode == 0
+        ), f"ERROR: {self.command} exited with {output.returncode}. {output.stderr}"
+
+def load_line_index(filename: str, mapped, size: int):
+    """This function loads the line-offset index of the trace file.
+    If the index does not exist or is older than the trace file, it
+    builds a new index and saves it next to the trace file.
+
+    args:
+        filename (str): trace file path.
+        mapped (mmap): memory-mapped trace file.
+        size (int): size of the trace file in bytes.
+
+    returns:
+        (numpy.ndarray) offsets of each line start followed by the
+        file size.
+    """
+
+    index_f = filename + INDEX_SUFFIX
+    if (
+            os.path.exists(index_f)
+            and os.path.getmtime(index_f) >= os.path.getmtime(filename)
+    ):
+        offsets = np.load(index_f, mmap_mode='r')
+        # Last offset is the file size, so it tells whether the index
+        # was built from the current content of the file or not.
+        if len(offsets) > 0 and offsets[-1] == size:
+            return offsets
+
+    offsets = build_line_index(mapped, size)
+    try:
+        np.save(index_f, offsets)
+    except OSError:
+        # The index is only a cache. If the directory is not writable,
+        # we keep the in-memory index for the current run.
+        pass
+
+    return offsets
+
+def build_line_index(mapped, size: int):
+    """This function scans the mapped trace file chunk by chunk and
+    collects the offset of every line start.
+
+    args:
+        mapped (mmap): memory-mapped trace file.
+        size (int): size of the trace file in bytes.
+
+    returns:
+        (numpy.ndarray) offsets of each line start followed by the
+        file size.
+    """
+
+    chunks = [np.zeros(1, dtype=np.int64)]
+    for begin in range(0, size, INDEX_CHUNK_SIZE):
+        chunk = np.frombuffer(mapped, dtype=np.uint8, count=min(INDEX_CHUNK_SIZE, size-begin), offset=begin)
+        # Next line starts right after each newline character.
+        chunks.append(np.flatnonzero(chunk == ord('\n')).astype(np.int64) + begin + 1)
+        del chunk
+    offsets = np.concatenate(chunks)
+    # If the last line does not end with a newline, close it with the file size.
+    if offsets[-1] != size:
+        offsets = np.append(offsets, size)
+
+    return offsets
+
+def open_trace(filename: str):
+    """This function opens the ascii trace file with a line source that
+    supports random access to the lines. If an up-to-date columnar
+    store of the trace exists (TraceStore), the store is opened instead.
+    A compressed trace file is streamed, since it cannot be mapped.
+
+    args:
+        filename (str): trace file or store directory path.
+
+    returns:
+        (MappedTrace, TraceSource, or TraceStore) line source of the trace file.
+    """
+
+    store = TS.open_store(filename)
+    if store is not None:
+        return store
+    if compression_of(filename):
+        return TraceSource(filename)
+
+    return MappedTrace(filename)
+
+def compression_of(filename: str):
+    """This function returns the compression module of the file
+    based on its extension.
+
+    args:
+        filename (str): file path.
+
+    returns:
+        (module) gzip, lzma, or bz2.
+        (None) if the file is not compressed.
+    """
+
+    return COMPRESSIONS.get(os.path.splitext(filename)[1])
+
+def open_file(filename: str, mode: str = "r"):
+    """This function opens the file, and the file is compressed or
+    decompressed on the fly if its extension is one of COMPRESSIONS.
+
+    args:
+        filename (str): file path.
+        mode (str): open mode as the built-in open.
+
+    returns:
+        (file object) opened file.
+    """
+
+    module = compression_of(filename)
+    if module is None:
+        return open(filename, mode)
+    # Compression modules open files in binary by default.
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+
+    return module.open(filename, mode)
+
+def compress_file(filename: str, compressed_file: str):
+    """This function compresses the file and removes the original.
+
+    args:
+        filename (str): file path.
+        compressed_file (str): compressed file path.
+
+    returns:
+        None.
+    """
+
+    with open(filename, "rb") as src, open_file(compressed_file, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(filename)
+
+@contextlib.contextmanager
+def plain_file(filename: str):
+    """This function provides the path of the file decompressed, since
+    programs like trace2ascii cannot read a compressed file. If the file
+    is not compressed, the path is provided as it is. Otherwise, it is
+    decompressed into a temporary file that is removed afterwards.
+
+    args:
+        filename (str): file path.
+
+    returns:
+        (str) decompressed file path.
+    """
+
+    if not compression_of(filename):
+        yield filename
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".out")
+    try:
+        with os.fdopen(fd, "wb") as dst, open_file(filename, "rb") as src:
+            shutil.copyfileobj(src, dst)
+        yield path
+    finally:
+        os.remove(path)
+
+def get_lines(lines, start_from: int, end_at: int = None):
+    """This function returns the trace lines between start_from and
+    end_at (exclusive) without copying them. It accepts both the line
+    sources in this file and a plain list of lines, so callers that
+    still read the whole file keep working.
+
+    args:
+        lines (TraceSource or list): trace lines.
+        start_from (int): trace line number (0-based) to start.
+        end_at (int): trace line number (0-based) to stop.
+
+    returns:
+        (iterator) trace lines in the range.
+    """
+
+    if hasattr(lines, "lines"):
+        return lines.lines(start_from, end_at)
+    # A list is indexed directly instead of being skipped through from
+    # the start, and a slice would copy the lines in the range.
+    if isinstance(lines, list):
+        end_at = len(lines) if end_at is None else min(end_at, len(lines))
+        return map(lines.__getitem__, range(start_from, end_at))
+
+    return itertools.islice(lines, start_from, end_at)
+
+def get_raw_lines(lines, start_from: int, end_at: int = None):
+    """This function returns the undecoded trace lines between
+    start_from and end_at (exclusive). A plain list of lines is
+    returned as it is read in.
+
+    args:
+        lines (TraceSource or list): trace lines.
+        start_from (int): trace line number (0-based) to start.
+        end_at (int): trace line number (0-based) to stop.
+
+    returns:
+        (iterator) trace lines in the range.
+    """
+
+    if hasattr(lines, "raw_lines"):
+        return lines.raw_lines(start_from, end_at)
+
+    return itertools.islice(lines, start_from, end_at)
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the trace file name
+    and the range of lines to print.
+
+    returns:
+        (str) file name.
+        (int) line number to start.
+        (int) line number to stop.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="An input trace file."
+    )
+    parser.add_argument(
+        "-s",
+        "--start",
+        type=int,
+        default=0,
+        help="Line number to begin printing."
+    )
+    parser.add_argument(
+        "-e",
+        "--end",
+        type=int,
+        default=None,
+        help="Line number to end printing."
+    )
+    args = parser.parse_args()
+
+    return args.file, args.start, args.end
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename, start_from, end_at = argument_parser()
+    source = open_trace(filename)
+    for line in source.lines(start_from, end_at):
+        print (line, end='')
+    source.close()
@@ -0,0 +1,456 @@
+"""
+    This program scans an ascii trace only once and runs the state
+    machines of phase_identifier, bytecode_identifier,
+    initial_node_identifier, graph_former, NodeToOpcode_Mapper, and
+    get_all_nodes over that single scan.
+
+    Each of those stages used to rescan the trace and split every line
+    on its own. However, most of the trace lines belong to functions
+    that none of the stages react to. Thus, while scanning, every line
+    is split once to identify the phase scopes, and only the lines of
+    the functions that the other stages react to are kept. The other
+    stages then replay the kept lines with the same arguments and the
+    same per-line scanners as the original functions, so they produce
+    the same results without touching the trace again.
+
+    If the trace is a columnar store (TraceStore), the phase lines and
+    the kept lines are selected with vectorized filters over the
+    function column instead of scanning every line.
+
+    The stages only need the lines up to the last phase line (the JIT
+    window), while the rest of trace is mostly the optimised code running
+    the PoC. Thus, unless the whole trace is requested, a memory-mapped
+    trace is pre-scanned on the raw bytes for the phase function names
+    and the first exception, and the lines after the window are never
+    split. A trace without any phase function is rejected right away.
+
+    Example,
+        $python3 TraceScanner.py -f <ascii.out> -b <bytecode.json>
+"""
+
+import os, sys
+import json
+import bisect
+import argparse
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import FunctionLists as FL
+import PhaseIdentifier as PI
+import BytecodeIdentifier as BI
+import OptimisationTracker as OT
+import GraphCreator as GC
+import PhaseTimeline as PT
+import NodeToOpcode as NTO
+import TraceReader as TR
+import TraceStore as TS
+import InstructionParser as IP
+
+# Functions that any of the stages react to.
+KEPT_FUNCTIONS = frozenset(
+    GC.GraphFormer.FUNCTIONS
+    + OT.InitialNodeScanner.FUNCTIONS
+    + NTO.NodeToOpcodeScanner.FUNCTIONS
+)
+# Whether the lines of each function id are kept or not.
+IS_KEPT = IP.FunctionTable(
+    lambda name: name in KEPT_FUNCTIONS or bool(IP.function_category(name) & IP.BYTECODE_ACCESS)
+)
+# Byte strings that every phase function line holds, i.e., the lines
+# matching FL.OPT_PHASE_REGEX or FL.PHASE_REGEX.
+PHASE_PATTERNS = (b"PipelineImpl::Run<", b"Phase::Run")
+# Instruction standing for the lines that were not kept. Its function
+# is none of the kept functions.
+SKIPPED_INST = [None, None, None]
+
+class TraceScanner:
+    """Single scan over the lines of an ascii trace. The methods are
+    named after the stages they replace and take the same arguments
+    except for the trace lines.
+    """
+    def __init__(self, lines, scan_to_end: bool = False):
+        """
+        args:
+            lines (MappedTrace, TraceSource, TraceStore, or list): raw trace lines.
+            scan_to_end (bool): If True, keep scanning after the first
+            exception, so node_to_opcode and get_all_nodes can be
+            replayed over the whole trace. Otherwise, the scan stops
+            at the end of the JIT window.
+        """
+
+        self.phase_scanner = PI.PhaseScanner()
+        self.phase_result = None
+        # Kept lines: [line number (0-based), parsed instruction].
+        self.kept = []
+        self.kept_numbers = []
+        # Line numbers (0-based) of the exception lines.
+        self.exceptions = []
+        # Number of lines scanned.
+        self.line_count = 0
+        # True, if the scan reached the end of file.
+        self.complete = False
+
+        self.scan(lines, scan_to_end)
+
+    def scan(self, lines, scan_to_end: bool):
+        """This function scans the trace lines once. Every line is
+        passed to the phase scanner until the first exception, and
+        the lines of the kept functions are stored for the other stages.
+
+        args:
+            lines (MappedTrace, TraceSource, or list): raw trace lines.
+            scan_to_end (bool): keep scanning after the first exception.
+
+        returns:
+            None.
+        """
+
+        if isinstance(lines, TS.TraceStore):
+            self.scan_store(lines, scan_to_end)
+            return
+
+        window = None if scan_to_end else prescan(lines)
+        if window:
+            self.scan_window(lines, *window)
+            return
+
+        phase_scanner = self.phase_scanner
+        kept = self.kept
+        kept_numbers = self.kept_numbers
+
+        in_phases = True
+        line_number = 0
+        for raw_line in TR.get_raw_lines(lines, 0):
+            if in_phases:
+                inst = phase_scanner.scan(raw_line)
+                if inst is None:
+                    in_phases = False
+                    self.exceptions.append(line_number)
+                    if not scan_to_end:
+                        self.line_count = line_number
+                        return
+                    inst = IP.instruction_splitter(raw_line)
+            else:
+                if IP.is_exception(raw_line):
+                    self.exceptions.append(line_number)
+                inst = IP.instruction_splitter(raw_line)
+
+            if inst.function_id is not None and IS_KEPT[inst.function_id]:
+                kept.append([line_number, inst])
+                kept_numbers.append(line_number)
+
+            line_number += 1
+
+        self.line_count = line_number
+        self.complete = True
+
+    def scan_window(self, lines, end_at: int, exception: int, line_count: int):
+        """This function does the same as scan over the lines before
+        end_at, which hold all phase lines before the first exception.
+        The phase scanner only counts the lines after the window, so
+        its state is set as if it had scanned them.
+
+        args:
+            lines (MappedTrace): raw trace lines.
+            end_at (int): end of the JIT window (exclusive).
+            exception (int): line number of the first exception, or None.
+            line_count (int): number of lines in the trace.
+
+        returns:
+            None.
+        """
+
+        phase_scanner = self.phase_scanner
+        line_number = 0
+        for raw_line in TR.get_raw_lines(lines, 0, end_at):
+            inst = phase_scanner.scan(raw_line)
+            if inst.function_id is not None and IS_KEPT[inst.function_id]:
+                self.kept.append([line_number, inst])
+                self.kept_numbers.append(line_number)
+            line_number += 1
+
+        if exception is not None:
+            phase_scanner.line_number = exception + 1
+            phase_scanner.has_exception = True
+            self.exceptions.append(exception)
+        else:
+            phase_scanner.line_number = line_count + 1
+        self.line_count = end_at
+
+    def scan_store(self, store, scan_to_end: bool):
+        """This function does the same as scan over the columnar store.
+        Only the phase lines and the kept lines are rebuilt and parsed.
+
+        args:
+            store (TraceStore): columnar store of the trace.
+            scan_to_end (bool): keep scanning after the first exception.
+
+        returns:
+            None.
+        """
+
+        exceptions = store.exception_rows()
+        phase_end = int(exceptions[0]) if len(exceptions) else len(store)
+        phase_rows = store.select(category=IP.OPT_PHASE | IP.PHASE, end_at=phase_end, program="d8").tolist()
+        # The scan stops at the end of the JIT window as prescan.
+        end_at = len(store) if scan_to_end else (phase_rows[-1] + 1 if phase_rows else 0)
+
+        phase_scanner = self.phase_scanner
+        for row in phase_rows:
+            phase_scanner.line_number = row + 1
+            phase_scanner.scan_instruction(store.instruction(row))
+        phase_scanner.line_number = phase_end + 1
+        phase_scanner.has_exception = phase_end < len(store)
+
+        for row in store.select(table=IS_KEPT, end_at=end_at).tolist():
+            self.kept.append([row, store.instruction(row)])
+            self.kept_numbers.append(row)
+
+        self.exceptions = exceptions.tolist() if scan_to_end else exceptions[:1].tolist()
+        self.line_count = end_at
+        self.complete = end_at == len(store)
+
+    def kept_lines(self, start_from: int, end_at: int = None):
+        """This function generates the kept lines between start_from
+        and end_at (exclusive) with their parsed instruction.
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of scan.
+
+        returns:
+            (iterator) kept line entries in the range.
+        """
+
+        assert (
+                self.complete
+                or end_at is not None and end_at <= self.line_count
+        ), f"ERROR: Lines up to {end_at} were not scanned. Scan stopped at {self.line_count}."
+
+        first = bisect.bisect_left(self.kept_numbers, start_from)
+        last = len(self.kept) if end_at is None else bisect.bisect_left(self.kept_numbers, end_at)
+        return iter(self.kept[first:last])
+
+    def phase_identifier(self):
+        """This function returns the same result as PI.phase_identifier.
+
+        returns:
+            (dict) phase name-to-scope dictionary.
+            (bool) True, if the trace has an exception.
+            (int) last line number scanned.
+            (list) first and last phase line numbers.
+        """
+
+        if not self.phase_result:
+            self.phase_result = self.phase_scanner.result()
+
+        return self.phase_result
+
+    def bytecode_identifier(self, bytecode_dict: dict, phase_scope: dict):
+        """This function returns the same result as BI.bytecode_identifier.
+
+        args:
+            bytecode_dict (dict): dictionary of opcode-to-bytecode.
+            phase_scope (dict): phase name-to-scope dictionary.
+
+        returns:
+            (dict) dictionary holding bytecode info.
+            (int) last line number that next operation should begin scanning the trace file.
+        """
+
+        assert (
+                "GraphBuilderPhase" in phase_scope
+                and len(phase_scope["GraphBuilderPhase"]) > 1
+        ), f"ERROR: Failed to find GraphBuilderPhase in phase_scope. phase_scope: {phase_scope}"
+        GraphBuilderPhase_Scope = phase_scope["GraphBuilderPhase"]
+
+        scanner = BI.BytecodeScanner(bytecode_dict)
+        for entry in self.kept_lines(GraphBuilderPhase_Scope[0], GraphBuilderPhase_Scope[1]):
+            if not scanner.scan(entry[1]):
+                return scanner.bytecode_info, entry[0]
+
+        return scanner.bytecode_info, GraphBuilderPhase_Scope[1]
+
+    def initial_node_identifier(self, bytecode_info: dict, start_from: int, end_at: int):
+        """This function returns the same result as OT.initial_node_identifier
+        over the lines between start_from and end_at (exclusive).
+
+        args:
+            bytecode_info (dict): dictionary holding bytecode information.
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop.
+
+        returns:
+            (dict) bytecode address-to-JS node address dictionary.
+            (dict) JS node address-to-input node addresses dictionary.
+        """
+
+        scanner = OT.InitialNodeScanner(bytecode_info)
+        prev_number = start_from - 1
+        for entry in self.kept_lines(start_from, end_at):
+            if entry[1].function not in scanner.FUNCTIONS:
+                continue
+            # The previous line was not passed to the scanner, so it
+            # must not be taken as the previous instruction.
+            if entry[0] - 1 != prev_number:
+                scanner.prev_inst = SKIPPED_INST
+            scanner.scan(entry[1])
+            prev_number = entry[0]
+
+        return scanner.result()
+
+    def graph_former(self, start_from: int, end_at: int, initial_nodes: list, phase_scopes: dict):
+        """This function returns the same result as GC.graph_former.
+        The phase ids are assigned per phase segment, so the lines that
+        were not kept do not need to be visited.
+
+        args:
+            start_from (int): trace line number to start scanning.
+            end_at (int): trace line number to stop scanning.
+            initial_nodes (list): list of initial bytecode node addresses.
+            phase_scopes (dict): phase name-to-scope dictionary.
+
+        returns:
+            (EventLog) event log of the graph.
+        """
+
+        if end_at is None or (self.complete and end_at > self.line_count):
+            end_at = self.line_count
+
+        former = GC.GraphFormer(initial_nodes)
+        timeline = PT.PhaseTimeline(phase_scopes)
+        for first, last, phase, phase_id in timeline.id_segments(start_from, end_at):
+            former.enter_phase(first, phase, phase_id)
+            for entry in self.kept_lines(first, last):
+                inst = entry[1]
+                if inst.function in former.FUNCTIONS:
+                    former.scan(entry[0], phase, inst, inst.line)
+
+        return former.result()
+
+    def node_to_opcode(self):
+        """This function returns the same result as NTO.NodeToOpcode_Mapper
+        over the whole trace. The trace must be scanned with scan_to_end.
+
+        returns:
+            (dict) node address-to-[opcode, opcode address] dictionary.
+        """
+
+        scanner = NTO.NodeToOpcodeScanner()
+        for entry in self.kept_lines(0):
+            if entry[1].function in scanner.FUNCTIONS:
+                scanner.scan(entry[1], entry[1].line)
+
+        return scanner.NodeToOpcode
+
+    def get_all_nodes(self, start_from: int):
+        """This function returns the same result as OT.get_all_nodes.
+
+        args:
+            start_from (int): line number to start scanning.
+
+        returns:
+            (list) list of collected node addresses.
+        """
+
+        end_at = None
+        for number in self.exceptions:
+            if number >= start_from:
+                end_at = number
+                break
+
+        scanner = OT.AllNodesScanner()
+        for entry in self.kept_lines(start_from, end_at):
+            if entry[1].function == FL.NEW_STR:
+                scanner.scan(entry[1], entry[1].line)
+
+        return scanner.AllNodes
+
+def prescan(lines):
+    """This function locates the JIT window of a memory-mapped trace on
+    its raw bytes without splitting any line. The window ends at the
+    line of the last phase function name before the first exception.
+    Lines of other functions may hold the names too, which only makes
+    the window larger.
+
+    args:
+        lines (MappedTrace or other line source): raw trace lines.
+
+    returns:
+        (tuple) end of the window (exclusive), line number of the first
+        exception or None, and number of lines.
+        (None) if the trace cannot be pre-scanned.
+    """
+
+    if not isinstance(lines, TR.MappedTrace):
+        return None
+
+    exception_at = lines.find(IP.EXCEPTION_BYTES)
+    bound = exception_at if exception_at >= 0 else None
+    last_at = max(lines.rfind(pattern, 0, bound) for pattern in PHASE_PATTERNS)
+
+    exception = lines.line_of(exception_at) if exception_at >= 0 else None
+    # No phase function before the first exception, so nothing was
+    # compiled and no line needs to be split.
+    end_at = lines.line_of(last_at) + 1 if last_at >= 0 else 0
+    # The exception line itself is never scanned.
+    if exception is not None:
+        end_at = min(end_at, exception)
+
+    return end_at, exception, len(lines)
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the trace file name
+    and the bytecode JSON file name.
+
+    returns:
+        (str) file name.
+        (str) bytecode file name.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="An input trace file."
+    )
+    parser.add_argument(
+        "-b",
+        "--bytecode",
+        type=str,
+        help="Opcode to bytecode JSON file."
+    )
+    args = parser.parse_args()
+
+    return args.file, args.bytecode
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    input_file, bytecode_file = argument_parser()
+
+    with open(bytecode_file) as json_file:
+        bytecode_dict = json.load(json_file)
+
+    lines = TR.open_trace(input_file)
+    scanner = TraceScanner(lines)
+    lines.close()
+
+    phase_scopes, has_exception, line_number, first_and_last = scanner.phase_identifier()
+    print (f"Phases: {phase_scopes}")
+    if phase_scopes:
+        bytecode_info, line_number = scanner.bytecode_identifier(bytecode_dict, phase_scopes)
+        last_line = max(phase_scopes["GraphBuilderPhase"])
+        initial_nodes, input_nodes = scanner.initial_node_identifier(bytecode_info, line_number, last_line)
+        graph = scanner.graph_former(0, first_and_last[1], initial_nodes["nodes"], phase_scopes)
+        print (f"Initial nodes: {initial_nodes['nodes']}")
+        print (f"Number of nodes: {len(graph[0])}")
@@ -0,0 +1,622 @@
+"""
+    This program converts an ascii trace file into a columnar binary
+    store and loads the store back for the analysis stages.
+
+    Re-analysing a trace used to parse the whole ascii text again. The
+    store keeps the fields of each trace line (see the structure in
+    OptimisationTracker.instruction_splitter) in NumPy columns, so the
+    conversion is done only once and the store is memory-mapped on load.
+    Lines are selected with vectorized filters over the columns, e.g.,
+    all Node::New lines in a phase, and only the selected lines are
+    rebuilt into parsed instructions.
+
+    The store is a directory next to the ascii file (<ascii file>.store)
+    holding one .npy file per column and meta.json holding the string
+    tables of programs, functions, mnemonics, and registers.
+
+    Columns (one row per trace line):
+        address             (uint64) instruction address.
+        program             (int32) program id.
+        function            (int32) function id.
+        opcode              (uint8 x 15) x86 opcode bytes.
+        opcode_len          (uint8) number of opcode bytes.
+        mnemonic            (int32) asm mnemonic id.
+        operand_offsets     (int64) offsets of the asm operand text in operand_heap.
+        access_offsets      (int64) offsets of the R/W accesses in the access table.
+        flags               (uint8) EXCEPTION and RAW flags.
+    R/W access table (one row per access):
+        access_kind         (uint8) index of ACCESS_KINDS.
+        access_target       (uint64) register id or memory address.
+        access_target_width (uint8) number of hex digits of the memory address.
+        access_value        (uint64) accessed value.
+        access_value_width  (uint8) number of hex digits of the value.
+    Lines that cannot be rebuilt exactly from the columns are flagged
+    as RAW and kept as they are in raw_heap.
+
+    Example,
+        $python3 TraceStore.py -f <ascii.out>
+        $python3 TraceStore.py -f <ascii.out> -n v8::internal::compiler::Node::New
+"""
+
+import os, sys
+import re
+import json
+import shutil
+import argparse
+import array
+import numpy as np
+
+# Code to import modules from other directories.
+# Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+
+import InstructionParser as IP
+import TraceReader as TR
+
+# Suffix of the store directory stored next to the ascii file.
+STORE_SUFFIX = ".store"
+META_FILE = "meta.json"
+
+# Maximum length of a x86 instruction in bytes.
+MAX_OPCODE_LEN = 15
+# Maximum number of hex digits held in a uint64 column.
+MAX_HEX_WIDTH = 16
+
+# Line flags.
+EXCEPTION = 1 << 0
+RAW = 1 << 1
+
+ACCESS_KINDS = ["r", "w", "mr", "mw"]
+ACCESS_KIND_IDS = {kind: i for i, kind in enumerate(ACCESS_KINDS)}
+
+HEX_REGEX = re.compile("[0-9a-f]+")
+REGISTER_REGEX = re.compile("[0-9a-z]+")
+
+COLUMNS = (
+    "address", "program", "function", "opcode", "opcode_len", "mnemonic",
+    "operand_offsets", "operand_heap", "access_offsets", "flags",
+    "access_kind", "access_target", "access_target_width",
+    "access_value", "access_value_width",
+    "raw_rows", "raw_offsets", "raw_heap",
+)
+
+class TraceStore:
+    """Memory-mapped columnar store of a single ascii trace file. It
+    can also be used as a line source, since each line is rebuilt from
+    the columns on access.
+    """
+    def __init__(self, store_dir: str):
+        assert (
+                os.path.exists(os.path.join(store_dir, META_FILE))
+        ), f"ERROR: Trace store '{store_dir}' does not exist."
+        self.store_dir = store_dir
+
+        with open(os.path.join(store_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.programs = self.meta["programs"]
+        self.functions = self.meta["functions"]
+        self.mnemonics = self.meta["mnemonics"]
+        self.registers = self.meta["registers"]
+
+        for column in COLUMNS:
+            setattr(self, column, load_column(os.path.join(store_dir, column + ".npy")))
+
+        # Function id in the store-to-interned function id.
+        self.function_ids = np.array([IP.function_id(name) for name in self.functions], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.flags)
+
+    def __getitem__(self, row: int):
+        if row < 0:
+            row += len(self)
+        if row < 0 or row >= len(self):
+            raise IndexError(f"ERROR: Line {row} is out of range of {self.store_dir}.")
+
+        return self.line(row)
+
+    def __iter__(self):
+        return self.lines(0)
+
+    def lines(self, start_from: int, end_at: int = None):
+        """This function generates the trace lines between start_from
+        and end_at (exclusive) rebuilt from the columns.
+
+        args:
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop. If None,
+            lines are generated until the end of store.
+
+        returns:
+            (generator) trace lines in the range.
+        """
+
+        if end_at is None or end_at > len(self):
+            end_at = len(self)
+
+        for row in range(start_from, end_at):
+            yield self.line(row)
+
+    # Rebuilt lines are already decoded, and the parser takes both.
+    raw_lines = lines
+
+    def close(self):
+        for column in COLUMNS:
+            setattr(self, column, None)
+
+    def line(self, row: int):
+        """This function rebuilds the trace line of the row.
+
+        args:
+            row (int): trace line number (0-based).
+
+        returns:
+            (str) trace line.
+        """
+
+        row = int(row)
+        if self.flags[row] & RAW:
+            i = int(np.searchsorted(self.raw_rows, row))
+            return bytes(self.raw_heap[self.raw_offsets[i]:self.raw_offsets[i+1]]).decode()
+
+        opcode = " ".join(f"{b:02x}" for b in self.opcode[row][:self.opcode_len[row]].tolist())
+        operands = bytes(self.operand_heap[self.operand_offsets[row]:self.operand_offsets[row+1]]).decode()
+        operation = self.mnemonics[self.mnemonic[row]]
+        if operands:
+            operation += " " + operands
+
+        tokens = []
+        begin, end = int(self.access_offsets[row]), int(self.access_offsets[row+1])
+        for i in range(begin, end):
+            kind = ACCESS_KINDS[self.access_kind[i]]
+            value = f"{int(self.access_value[i]):0{self.access_value_width[i]}x}"
+            if kind == "r" or kind == "w":
+                register = self.registers[self.access_target[i]]
+                tokens.append(f"{kind.upper()}:{register.upper()}={value}")
+            else:
+                address = f"{int(self.access_target[i]):0{self.access_target_width[i]}x}"
+                tokens.append(f"{kind.upper()}[{address}]={value}")
+        accesses = " " + " ".join(tokens) + " " if tokens else " "
+
+        return (
+                f"{row};0x{int(self.address[row]):x};{self.programs[self.program[row]]};"
+                f"{self.functions[self.function[row]]};{opcode};{operation};{accesses};\n"
+        )
+
+    def instruction(self, row: int):
+        """This function returns the parsed instruction of the row.
+
+        args:
+            row (int): trace line number (0-based).
+
+        returns:
+            (Instruction) parsed instruction.
+        """
+
+        return IP.instruction_splitter(self.line(row))
+
+    def exception_rows(self):
+        """This function returns the line numbers of the exception lines.
+
+        returns:
+            (numpy.ndarray) line numbers (0-based).
+        """
+
+        return np.flatnonzero(self.flags & EXCEPTION)
+
+    def select(
+            self, functions: list = None, category: int = 0, table = None,
+            start_from: int = 0, end_at: int = None, scopes: list = None, program: str = None
+    ):
+        """This function selects the lines with vectorized filters over
+        the columns. A line is selected if its function is one of the
+        functions, has any of the categories, or is True in the table.
+
+        args:
+            functions (list): function names.
+            category (int): function categories (InstructionParser).
+            table (FunctionTable): table of bool indexed by the function id.
+            start_from (int): trace line number (0-based) to start.
+            end_at (int): trace line number (0-based) to stop.
+            scopes (list): list of [first, last] line numbers. If given,
+            only the lines within the scopes (first < line < last) are
+            selected as GraphCreator.get_current_phase does.
+            program (str): program name of the lines, e.g., "d8".
+
+        returns:
+            (numpy.ndarray) selected line numbers (0-based).
+        """
+
+        if end_at is None or end_at > len(self):
+            end_at = len(self)
+        if start_from >= end_at:
+            return np.zeros(0, dtype=np.int64)
+
+        selected = np.zeros(len(self.functions), dtype=bool)
+        if functions:
+            names = set(functions)
+            selected |= np.array([name in names for name in self.functions], dtype=bool)
+        if category:
+            categories = np.array(IP.FUNCTION_CATEGORIES, dtype=np.int64)
+            selected |= (categories[self.function_ids] & category) != 0
+        if table is not None:
+            selected |= np.array([bool(table[fid]) for fid in self.function_ids.tolist()], dtype=bool)
+
+        mask = selected[self.function[start_from:end_at]]
+        if program is not None:
+            if program not in self.programs:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.program[start_from:end_at] == self.programs.index(program)
+        # RAW lines are rebuilt as they are, so their function column is not filled.
+        mask &= (self.flags[start_from:end_at] & RAW) == 0
+        rows = np.flatnonzero(mask) + start_from
+        rows = np.union1d(rows, self.raw_selection(start_from, end_at, selected, program))
+
+        if scopes is not None:
+            in_scope = np.zeros(len(rows), dtype=bool)
+            for i in range(0, len(scopes)-1, 2):
+                in_scope |= (rows > scopes[i]) & (rows < scopes[i+1])
+            rows = rows[in_scope]
+
+        return rows
+
+    def raw_selection(self, start_from: int, end_at: int, selected, program: str):
+        """This function applies the function filter to the RAW lines
+        in the range by parsing them.
+
+        returns:
+            (numpy.ndarray) selected line numbers (0-based).
+        """
+
+        rows = []
+        begin, end = np.searchsorted(self.raw_rows, [start_from, end_at])
+        for row in self.raw_rows[begin:end].tolist():
+            inst = self.instruction(row)
+            if inst.function is None or inst.function not in self.functions:
+                continue
+            if program is not None and inst.program != program:
+                continue
+            if selected[self.functions.index(inst.function)]:
+                rows.append(row)
+
+        return np.array(rows, dtype=np.int64)
+
+def load_column(filename: str):
+    """This function memory-maps the column file.
+
+    args:
+        filename (str): column .npy file path.
+
+    returns:
+        (numpy.ndarray) column.
+    """
+
+    column = np.load(filename, mmap_mode='r')
+    # An empty column cannot be mapped, so it is read in as it is.
+    if column.size == 0:
+        column = np.load(filename)
+
+    return column
+
+def store_path(filename: str):
+    """This function returns the store directory of the trace file.
+
+    args:
+        filename (str): trace file path.
+
+    returns:
+        (str) store directory path.
+    """
+
+    return filename + STORE_SUFFIX
+
+def is_fresh(filename: str, store_dir: str = None):
+    """This function checks whether the store was converted from the
+    current content of the trace file.
+
+    args:
+        filename (str): trace file path.
+        store_dir (str): store directory path.
+
+    returns:
+        (bool) True, if the store is up to date.
+    """
+
+    store_dir = store_dir or store_path(filename)
+    meta_f = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(meta_f) or not os.path.exists(filename):
+        return False
+    with open(meta_f) as f:
+        meta = json.load(f)
+
+    return (
+            meta.get("size") == os.path.getsize(filename)
+            and meta.get("mtime") == os.path.getmtime(filename)
+    )
+
+def intern(table: dict, name: str):
+    """This function returns the id of the name in the string table.
+
+    args:
+        table (dict): name-to-id dictionary.
+        name (str): name to intern.
+
+    returns:
+        (int) id of the name.
+    """
+
+    nid = table.get(name)
+    if nid is None:
+        nid = table[name] = len(table)
+
+    return nid
+
+def encode_hex(text: str):
+    """This function encodes the hex string to an integer and the
+    number of digits, if the string can be rebuilt from them.
+
+    args:
+        text (str): hex string.
+
+    returns:
+        (tuple) integer value and number of hex digits.
+        (None) if the string cannot be rebuilt.
+    """
+
+    if len(text) > MAX_HEX_WIDTH or not HEX_REGEX.fullmatch(text):
+        return None
+
+    return int(text, 16), len(text)
+
+def encode_line(raw_line: bytes, registers: dict):
+    """This function encodes the trace line into the column values.
+    The line is encoded only if it is rebuilt into the same parsed
+    instruction.
+
+    args:
+        raw_line (bytes): A single line of instruction read in from
+        the ascii trace file.
+        registers (dict): register name-to-id dictionary.
+
+    returns:
+        (tuple) address, program, function, opcode bytes, mnemonic,
+        operand text, and list of accesses.
+        (None) if the line cannot be encoded.
+    """
+
+    try:
+        parts = raw_line.decode().split(';')
+    except UnicodeDecodeError:
+        return None
+    if len(parts) != 8 or parts[7] not in ("\n", ""):
+        return None
+
+    address = parts[1].strip()
+    if not address.startswith("0x"):
+        return None
+    address = encode_hex(address[2:])
+    if not address or f"{address[0]:x}" != parts[1].strip()[2:]:
+        return None
+
+    opcode = parts[4].strip()
+    try:
+        opcode_bytes = bytes.fromhex(opcode)
+    except ValueError:
+        return None
+    if (
+            len(opcode_bytes) > MAX_OPCODE_LEN
+            or " ".join(f"{b:02x}" for b in opcode_bytes) != opcode
+    ):
+        return None
+
+    operation = parts[5].strip()
+    mnemonic = operation.split(' ')[0]
+    operands = operation[len(mnemonic)+1:]
+
+    accesses = []
+    for token in parts[6].split(' ')[1:-1]:
+        try:
+            access = IP.split_access_text(f" {token} ")[0]
+        except IndexError:
+            return None
+        kind, target, value = access
+        if kind not in ACCESS_KIND_IDS:
+            return None
+        value = encode_hex(value)
+        if not value:
+            return None
+        if kind == "r" or kind == "w":
+            if not REGISTER_REGEX.fullmatch(target):
+                return None
+            # Register name must not be taken as a memory access when rebuilt.
+            if "MR" in target.upper() or "MW" in target.upper():
+                return None
+            target = (intern(registers, target), 0)
+        else:
+            target = encode_hex(target)
+            if not target:
+                return None
+        accesses.append((ACCESS_KIND_IDS[kind], target[0], target[1], value[0], value[1]))
+
+    return (
+            address[0], parts[2].strip(), parts[3].strip(),
+            opcode_bytes, mnemonic, operands, accesses
+    )
+
+def convert_trace(filename: str, store_dir: str = None):
+    """This function converts the ascii trace file into the columnar
+    store. The store is written to a temporary directory first and
+    moved in place once it is completed.
+
+    args:
+        filename (str): trace file path.
+        store_dir (str): store directory path. If None, the store is
+        saved next to the trace file.
+
+    returns:
+        (str) store directory path.
+    """
+
+    store_dir = store_dir or store_path(filename)
+
+    programs, functions, mnemonics, registers = {}, {}, {}, {}
+    columns = {
+        "address": array.array('Q'),
+        "program": array.array('i'),
+        "function": array.array('i'),
+        "opcode": bytearray(),
+        "opcode_len": array.array('B'),
+        "mnemonic": array.array('i'),
+        "operand_offsets": array.array('q', [0]),
+        "operand_heap": bytearray(),
+        "access_offsets": array.array('q', [0]),
+        "flags": array.array('B'),
+        "access_kind": array.array('B'),
+        "access_target": array.array('Q'),
+        "access_target_width": array.array('B'),
+        "access_value": array.array('Q'),
+        "access_value_width": array.array('B'),
+        "raw_rows": array.array('q'),
+        "raw_offsets": array.array('q', [0]),
+        "raw_heap": bytearray(),
+    }
+
+    with TR.open_file(filename, "rb") as f:
+        for row, raw_line in enumerate(f):
+            flag = EXCEPTION if IP.is_exception(raw_line) else 0
+            encoded = encode_line(raw_line, registers)
+            if encoded is None:
+                flag |= RAW
+                columns["raw_rows"].append(row)
+                columns["raw_heap"] += raw_line
+                columns["raw_offsets"].append(len(columns["raw_heap"]))
+                encoded = (0, "", "", b"", "", "", [])
+
+            address, program, function, opcode, mnemonic, operands, accesses = encoded
+            columns["address"].append(address)
+            columns["program"].append(intern(programs, program))
+            columns["function"].append(intern(functions, function))
+            columns["opcode"] += opcode.ljust(MAX_OPCODE_LEN, b'\0')
+            columns["opcode_len"].append(len(opcode))
+            columns["mnemonic"].append(intern(mnemonics, mnemonic))
+            columns["operand_heap"] += operands.encode()
+            columns["operand_offsets"].append(len(columns["operand_heap"]))
+            for kind, target, target_width, value, value_width in accesses:
+                columns["access_kind"].append(kind)
+                columns["access_target"].append(target)
+                columns["access_target_width"].append(target_width)
+                columns["access_value"].append(value)
+                columns["access_value_width"].append(value_width)
+            columns["access_offsets"].append(len(columns["access_kind"]))
+            columns["flags"].append(flag)
+
+    tmp_dir = store_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    dtypes = {
+        "address": np.uint64, "program": np.int32, "function": np.int32,
+        "opcode": np.uint8, "opcode_len": np.uint8, "mnemonic": np.int32,
+        "operand_offsets": np.int64, "operand_heap": np.uint8,
+        "access_offsets": np.int64, "flags": np.uint8,
+        "access_kind": np.uint8, "access_target": np.uint64,
+        "access_target_width": np.uint8, "access_value": np.uint64,
+        "access_value_width": np.uint8, "raw_rows": np.int64,
+        "raw_offsets": np.int64, "raw_heap": np.uint8,
+    }
+    for column, values in columns.items():
+        data = np.frombuffer(values, dtype=dtypes[column]) if len(values) else np.zeros(0, dtype=dtypes[column])
+        if column == "opcode":
+            data = data.reshape(-1, MAX_OPCODE_LEN)
+        np.save(os.path.join(tmp_dir, column + ".npy"), data)
+
+    meta = {
+        "source": os.path.abspath(filename),
+        "size": os.path.getsize(filename),
+        "mtime": os.path.getmtime(filename),
+        "programs": list(programs),
+        "functions": list(functions),
+        "mnemonics": list(mnemonics),
+        "registers": list(registers),
+    }
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    os.rename(tmp_dir, store_dir)
+
+    return store_dir
+
+def open_store(filename: str):
+    """This function opens the store of the trace file, if the store
+    is up to date. A store directory can also be given directly.
+
+    args:
+        filename (str): trace file or store directory path.
+
+    returns:
+        (TraceStore) store of the trace file.
+        (None) if no up-to-date store exists.
+    """
+
+    if os.path.isdir(filename) and os.path.exists(os.path.join(filename, META_FILE)):
+        return TraceStore(filename)
+    if is_fresh(filename):
+        return TraceStore(store_path(filename))
+
+    return None
+
+# =============================================================================================
+
+def argument_parser():
+    """This function is for a safe command line
+    input. It should receive the trace file name.
+
+    returns:
+        (str) file name.
+        (str) store directory.
+        (str) function name to select.
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help="An input trace file."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="Store directory. Default: <trace file>.store"
+    )
+    parser.add_argument(
+        "-n",
+        "--function",
+        type=str,
+        default=None,
+        help="Function name to select lines from the store."
+    )
+    args = parser.parse_args()
+
+    return args.file, args.output, args.function
+
+# =============================================================================================
+
+if __name__ == "__main__":
+    filename, store_dir, function = argument_parser()
+    if function:
+        store = open_store(store_dir or filename)
+        assert store, f"ERROR: Store of '{filename}' does not exist or is outdated."
+        for row in store.select(functions=[function]).tolist():
+            print (store.line(row), end='')
+    else:
+        store_dir = convert_trace(filename, store_dir)
+        store = TraceStore(store_dir)
+        print (f"Converted {len(store)} lines to {store_dir}. Raw lines: {len(store.raw_rows)}")
@@ -5,7 +5,6 @@ a single graph.
 import os
 import sys
 import copy
-import GraphRestructurer as GR
 
 # Code to import modules from other directories.
 # Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
@@ -14,6 +13,8 @@ parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
 import GraphAnalyser as GA
+import GraphModel as GMD
+import InstructionParser as IP
 
 METADATA_LEN = 4
 
@@ -21,9 +22,13 @@ def GraphMerger(GraphList: list):
     """
     """
 
-    MergedGraph = copy.deepcopy(GraphList[0])
-    MergedDiffGraph = GR.Graph()
-    PhaseList = GraphList[0].id_to_phase
+    # The restructured graphs are shared, so the merge is done on a copy
+    # of the node lists and phases. The nodes are not changed.
+    MergedGraph = copy.copy(GraphList[0])
+    MergedGraph.id_to_nodes = {id: list(nodes) for id, nodes in MergedGraph.id_to_nodes.items()}
+    MergedGraph.id_to_phase = dict(MergedGraph.id_to_phase)
+    MergedDiffGraph = GMD.Graph()
+    PhaseList = MergedGraph.id_to_phase
     OriginalG = GraphList[0]
     DiffPhaseIdToNodes = {}
     PhaseToConcatId = {}
@@ -49,7 +54,7 @@ def GraphMerger(GraphList: list):
 
     return GroupedPhases, IdToNames
 
-def MergeNodesToOrigin(MergedGraph: GR.Graph, DiffNodesById: dict):
+def MergeNodesToOrigin(MergedGraph: GMD.Graph, DiffNodesById: dict):
     """
     """
 
@@ -66,11 +71,11 @@ def AddNodesToPhaseList(MergedPhaseIdToNodes: dict, DiffNodesById: dict):
         if id in MergedPhaseIdToNodes:
             MergedPhaseIdToNodes[id].extend(nodes)
         else:
-            MergedPhaseIdToNodes[id] = nodes
+            MergedPhaseIdToNodes[id] = list(nodes)
 
     return
 
-def MergeDiffNodes(MergedDiffGraph: GR.Graph, DiffNodesById: dict, Phase_List: dict):
+def MergeDiffNodes(MergedDiffGraph: GMD.Graph, DiffNodesById: dict, Phase_List: dict):
     """
     """
 
@@ -84,7 +89,7 @@ def MergeDiffNodes(MergedDiffGraph: GR.Graph, DiffNodesById: dict, Phase_List: d
 
     return
 
-def GroupPhases(MergedGraph: GR.Graph, PhaseList: dict):
+def GroupPhases(MergedGraph: GMD.Graph, PhaseList: dict):
     """This function groups (merges) phases by their operation.
     The phase ids will be merged (concatenated) with a special symbol '@'.
 
@@ -113,7 +118,7 @@ def GroupPhases(MergedGraph: GR.Graph, PhaseList: dict):
             NameToID[phase_name] = NameToID[phase_name] + '@' + str(phase_id)
         # Group nodes by phase names.
         if phase_name not in NameToNodes:
-            NameToNodes[phase_name] = node_list
+            NameToNodes[phase_name] = list(node_list)
         else:
             NameToNodes[phase_name].extend(node_list)
     # After grouping the phases by node list, group remaining phases,
@@ -135,7 +140,7 @@ def GroupPhases(MergedGraph: GR.Graph, PhaseList: dict):
 
 ## ====================================================
 
-def print_graph(graph: GR.Graph()):
+def print_graph(graph: GMD.Graph):
     """
     """
     print ("Graph ID: ", graph.id)
@@ -145,7 +150,11 @@ def print_graph(graph: GR.Graph()):
         print ("ID: ", id, graph.id_to_phase[id])
         for node in nodes:
             inputs = []
-            for n in node.inputs:
-                inputs.append([n.opcode[0], n.phase_id, n.id])
-            print (node.id, node.graph_id, node.address, node.opcode[0], inputs)
+            for i in range(node.input_length):
+                n = node.input_node(i)
+                inputs.append([IP.opcode_text(n.opcode[0]), n.phase_id, n.id])
+            print (
+                node.id, node.graph_id, IP.address_text(node.address),
+                IP.opcode_text(node.opcode[0]), inputs
+            )
             print ("    ", node.replaced_inputs, node.killed_at, node.removed_usage_at, node.append_inputs)
@@ -5,14 +5,15 @@ import sys
 import copy
 import random
 
-import GraphRestructurer as GR
-
 # Code to import modules from other directories.
 # Soruce: https://codeolives.com/2020/01/10/python-reference-module-in-parent-directory/
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
+import InstructionParser as IP
+import GraphModel as GMD
+
 METADATA_LEN = 6
 OPCODE_POS = 2
 
@@ -44,7 +45,7 @@ def SimplifyGraph(GroupedPhases: dict, IdToNames: dict):
 
     for concat_id, nodes in GroupedPhases.items():
         cleaned_nodes = CleanNodes(nodes)
-        merged = MergeNodes(nodes)
+        merged = MergeNodes(cleaned_nodes)
         SimplifiedGraph[concat_id] = merged
 
     return SimplifiedGraph
@@ -63,10 +64,12 @@ def CleanNodes(nodes: list):
     cleaned_nodes = []
 
     for node in nodes:
-        # Remove edge that's pointing to itself.
-        for ipt_node in node.inputs:
-            if ipt_node.id == node.id:
-                node.inputs.remove(ipt_node)
+        # Remove edge that's pointing to itself. The nodes are shared
+        # with the other graphs, so the node is copied to be changed.
+        if node.id in node.inputs:
+            node = copy.copy(node)
+            node.inputs = tuple([ipt_id for ipt_id in node.inputs if ipt_id != node.id])
+        cleaned_nodes.append(node)
 
     return cleaned_nodes
 
@@ -74,7 +77,8 @@ def MergeNodes(nodes: list):
     """
     """
 
-    MergedNodes = copy.deepcopy(nodes)
+    # The nodes are not changed, so only the list is copied.
+    MergedNodes = list(nodes)
     skip_nodes = []
 
     for n1 in nodes:
@@ -88,7 +92,7 @@ def MergeNodes(nodes: list):
 
     return MergedNodes
 
-def CheckMergeableStat(n1: GR.Node, n2: GR.Node):
+def CheckMergeableStat(n1: GMD.Node, n2: GMD.Node):
     """This function checks if any two nodes can be merged into one.
     
     args:
@@ -117,7 +121,7 @@ def CheckMergeableStat(n1: GR.Node, n2: GR.Node):
             ), f"ERROR: lenth of n1 input list and n2 input list must be equal"
             length = len(n1.inputs)
             for i in range(0, length):
-                if n1.inputs[i].id != n2.inputs[i].id:
+                if n1.inputs[i] != n2.inputs[i]:
                     return False
             return CheckNodeAttributes(n1, n2)
 
@@ -139,8 +143,9 @@ def AddNodesToSets(SimplifiedGraph: dict, IdToNames: dict):
             # Generate a new row initilized with 0 values.
             NewRow = [0]*number_of_sets
             NewRow[0] = str(node.id)
-            NewRow[1] = f"0x{node.address.lstrip('0')}"
-            NewRow[2] = f"0x{node.opcode[0]}"
+            # Addresses and opcodes are converted to their hex form here.
+            NewRow[1] = IP.address_text(node.address)
+            NewRow[2] = f"0x{IP.opcode_text(node.opcode[0])}"
             NewRow[3] = str(node.phase_id)
             NewRow[4] = str(node.graph_id)
             NewRow[5] = f"{node.phase.split('Phase')[0]}"
@@ -346,7 +351,7 @@ def AddDummyNodes(DataSet: list):
                 if row[idx] == 1:
                     row[METADATA_LEN] = 1
 
-def CheckNodeAttributes(n1: GR.Node, n2: GR.Node):
+def CheckNodeAttributes(n1: GMD.Node, n2: GMD.Node):
     """
     """
 
@@ -0,0 +1,40 @@
+"""
+    Shared fixtures of the tests. The modules of src import each other
+    by their file names, so src is added to the module search path.
+"""
+
+import os, sys
+import ast
+
+import pytest
+
+TESTDIR = os.path.dirname(os.path.realpath(__file__))
+DATADIR = TESTDIR + "/data"
+sys.path.insert(0, os.path.dirname(TESTDIR) + "/src")
+
+import PhaseIdentifier as PI
+
+@pytest.fixture
+def trace_lines():
+    """Lines of a small synthetic trace with one compilation that
+    creates, appends, replaces, kills, and removes the usage of nodes.
+    """
+
+    with open(DATADIR + "/trace_small.out") as f:
+        return f.readlines()
+
+@pytest.fixture
+def phase_scopes(trace_lines):
+    scopes, _, _, _ = PI.phase_identifier(trace_lines)
+    return scopes
+
+@pytest.fixture
+def baseline_graph():
+    """Graph data dictionaries that graph_former of the baseline commit
+    (GraphCreator.graph_former of f372538) built for trace_small.out,
+    with its hex string addresses and opcodes converted to ints. It is
+    the oracle of the graphs built by the code under test.
+    """
+
+    with open(DATADIR + "/graph_small.txt") as f:
+        return ast.literal_eval(f.read())
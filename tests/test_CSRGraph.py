@@ -0,0 +1,75 @@
+import pickle
+
+import numpy as np
+
+import CSRGraph as CSR
+import GraphCreator as GC
+
+def hex_graph(graph: tuple):
+    """Graph of the earlier runs, where the addresses and opcodes are hex strings."""
+
+    (
+        node_and_inputs, append_input_phase, replace_input_phase,
+        killed_nodes, removed_usage_nodes, phase_to_nodes, node_to_phase,
+        NodeToOpcode, node_gen_line, id_to_phase, node_to_phase_id
+    ) = graph
+    text = lambda address: None if address is None else f"{address:016x}"
+    keys = lambda values: {text(node): value for node, value in values.items()}
+
+    return (
+        {text(node): [text(ipt) for ipt in inputs] for node, inputs in node_and_inputs.items()},
+        {
+            text(node): [[phase, text(ipt), pid] for phase, ipt, pid in infos]
+            for node, infos in append_input_phase.items()
+        },
+        {
+            text(node): [[phase, text(old), text(new), pid] for phase, old, new, pid in infos]
+            for node, infos in replace_input_phase.items()
+        },
+        keys(killed_nodes),
+        keys(removed_usage_nodes),
+        {phase: [text(node) for node in nodes] for phase, nodes in phase_to_nodes.items()},
+        keys(node_to_phase),
+        {text(node): [f"{op:04x}", text(address)] for node, (op, address) in NodeToOpcode.items()},
+        keys(node_gen_line),
+        id_to_phase,
+        keys(node_to_phase_id),
+    )
+
+def test_round_trip_equals_graph(baseline_graph):
+    csr = CSR.CSRGraph(baseline_graph)
+
+    assert len(csr) == len(baseline_graph[0])
+    assert csr.to_legacy() == baseline_graph
+    assert list(csr.to_legacy()[0]) == list(baseline_graph[0])
+
+def test_rebuilt_inputs_equal_node_and_inputs(baseline_graph):
+    csr = CSR.CSRGraph(baseline_graph)
+
+    for i, (node, inputs) in enumerate(baseline_graph[0].items()):
+        assert csr.address(i) == node
+        assert [csr.address(ipt) for ipt in csr.inputs(i).tolist()] == inputs
+
+def test_event_log_round_trip(trace_lines, phase_scopes, baseline_graph):
+    log = GC.graph_former(trace_lines, 0, None, [], phase_scopes)
+
+    assert CSR.CSRGraph(log).to_legacy() == baseline_graph
+
+def test_pickle_round_trip(baseline_graph):
+    csr = pickle.loads(pickle.dumps(CSR.CSRGraph(baseline_graph)))
+
+    assert csr.to_legacy() == baseline_graph
+
+def test_hex_string_graph_is_converted(baseline_graph):
+    assert CSR.CSRGraph(hex_graph(baseline_graph)).to_legacy() == baseline_graph
+
+def test_empty_graph():
+    empty = tuple({} for _ in range(11))
+
+    assert CSR.CSRGraph(empty).to_legacy() == empty
+
+def test_narrow_picks_smallest_type():
+    assert CSR.narrow([0, 127, -1]).dtype == np.int8
+    assert CSR.narrow([0, 300]).dtype == np.int16
+    assert CSR.narrow([1 << 40]).dtype == np.int64
+    assert CSR.narrow([]).dtype == np.int8
@@ -0,0 +1,88 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import EventLog as EL
+import GraphCreator as GC
+import TraceReader as TR
+import TraceScanner as TS
+
+EXCEPTION_LINE = "0;0x55aa00009999;d8;EXCEPTION;00;nop; R:RSP=00007ffd30632e80 ;\n"
+
+def test_views_match_baseline_graph_former(trace_lines, phase_scopes, baseline_graph):
+    log = GC.graph_former(trace_lines, 0, None, [], phase_scopes)
+
+    assert isinstance(log, EL.EventLog)
+    assert log.to_legacy() == baseline_graph
+    # The node ids of the restructured graphs follow this order.
+    assert list(log[0]) == list(baseline_graph[0])
+
+def test_scanner_views_match_baseline_graph_former(trace_lines, phase_scopes, baseline_graph):
+    scanner = TS.TraceScanner(trace_lines, True)
+    log = scanner.graph_former(0, None, [], phase_scopes)
+
+    assert log.to_legacy() == baseline_graph
+
+@pytest.mark.parametrize("exception_at", [None, 120, 250, 420])
+def test_mapped_scanner_matches_list_scanner(tmp_path, trace_lines, baseline_graph, exception_at):
+    lines = list(trace_lines)
+    if exception_at is not None:
+        lines.insert(exception_at, EXCEPTION_LINE)
+    filename = str(tmp_path / "trace.out")
+    with open(filename, "w") as f:
+        f.writelines(lines)
+    trace = TR.MappedTrace(filename)
+    end_at, exception, line_count = TS.prescan(trace)
+
+    # The list is scanned line by line, and the mapped trace only over
+    # the JIT window found by prescan.
+    scanner = TS.TraceScanner(lines)
+    mapped = TS.TraceScanner(trace)
+
+    assert exception == exception_at
+    assert line_count == len(lines)
+    assert mapped.line_count == end_at
+    assert not mapped.complete
+    assert mapped.exceptions == scanner.exceptions
+    assert mapped.phase_identifier() == scanner.phase_identifier()
+    assert mapped.kept_numbers == scanner.kept_numbers[:len(mapped.kept_numbers)]
+    assert all(number >= end_at for number in scanner.kept_numbers[len(mapped.kept_numbers):])
+
+    scopes, _, _, first_last = scanner.phase_identifier()
+    log = mapped.graph_former(0, first_last[1], [], scopes)
+    assert log.to_legacy() == scanner.graph_former(0, first_last[1], [], scopes).to_legacy()
+    # The exception at 420 is thrown after the compilation.
+    if exception_at in (None, 420):
+        assert log.to_legacy() == baseline_graph
+    trace.close()
+
+def test_views_are_computed_on_demand(trace_lines, phase_scopes, baseline_graph):
+    log = GC.graph_former(trace_lines, 0, None, [], phase_scopes)
+
+    assert log.views == {}
+    assert log[EL.VIEWS.index("killed_nodes")] == baseline_graph[3]
+    assert list(log.views) == ["killed_nodes"]
+
+def test_pickle_keeps_events_and_drops_views(trace_lines, phase_scopes, baseline_graph):
+    log = GC.graph_former(trace_lines, 0, None, [], phase_scopes)
+    log.to_legacy()
+
+    loaded = pickle.loads(pickle.dumps(log))
+
+    assert loaded.views == {}
+    assert loaded.events.dtype == EL.EVENT_DTYPE
+    assert np.array_equal(loaded.events, log.events)
+    assert loaded.to_legacy() == baseline_graph
+
+def test_node_events_are_in_trace_order(trace_lines, phase_scopes, baseline_graph):
+    log = GC.graph_former(trace_lines, 0, None, [], phase_scopes)
+    node = next(iter(baseline_graph[3]))
+
+    events = log.node_events(node)
+
+    assert list(events["line"]) == sorted(events["line"])
+    assert events["kind"][0] == EL.NEW
+    assert events["line"][0] == baseline_graph[8][node]
+    assert EL.KILL in events["kind"]
+    assert log.node_events(0).size == 0
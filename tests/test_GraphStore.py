@@ -0,0 +1,120 @@
+import os
+import pickle
+
+import pytest
+
+import CSRGraph as CSR
+import EventLog as EL
+import GraphCreator as GC
+import GraphStore as GS
+
+@pytest.fixture
+def event_log(trace_lines, phase_scopes):
+    return GC.graph_former(trace_lines, 0, None, [], phase_scopes)
+
+def test_event_log_shard_loads_legacy_graph(tmp_path, event_log, baseline_graph):
+    entry = GS.write_shard(str(tmp_path), "1", event_log)
+
+    assert entry == {
+        "jitted": True,
+        "nodes": len(baseline_graph[GS.NODE_AND_INPUTS]),
+        "phases": len(baseline_graph[GS.PHASE_TO_NODES]),
+    }
+    assert not os.path.exists(GS.shard_file(str(tmp_path), "1") + ".tmp")
+
+    store = GS.GraphStore(str(tmp_path))
+    store.add("1", entry)
+
+    assert isinstance(store.shard("1"), EL.EventLog)
+    assert store["1"] == baseline_graph
+
+def test_legacy_graph_shard_is_stored_as_csr(tmp_path, baseline_graph):
+    store = GS.GraphStore(str(tmp_path))
+    store.put("1", baseline_graph)
+
+    assert isinstance(store.shard("1"), CSR.CSRGraph)
+    assert GS.GraphStore(str(tmp_path))["1"] == baseline_graph
+
+def test_shard_of_earlier_run_is_converted(tmp_path, baseline_graph):
+    store = GS.GraphStore(str(tmp_path))
+    with open(GS.shard_file(str(tmp_path), "1"), "wb") as bin_file:
+        pickle.dump(baseline_graph, bin_file)
+    store.add("1", {"jitted": True, "nodes": 0, "phases": 0})
+
+    assert isinstance(store.shard("1"), CSR.CSRGraph)
+    assert store["1"] == baseline_graph
+
+def test_manifest_keeps_jitted_status(tmp_path, event_log):
+    store = GS.GraphStore(str(tmp_path))
+    store.put("10", event_log)
+    store.put("2", None)
+    store.put("1", event_log)
+
+    store = GS.GraphStore(str(tmp_path))
+
+    assert store.jitted() == {"1": True, "2": False, "10": True}
+    assert list(store) == ["1", "10"]
+    assert len(store) == 2
+    assert "2" not in store
+    assert not os.path.exists(GS.shard_file(str(tmp_path), "2"))
+
+def test_least_recently_used_graphs_are_dropped(tmp_path, event_log, baseline_graph):
+    store = GS.GraphStore(str(tmp_path), cache_size=2)
+    for filenumber in ["1", "2", "3"]:
+        store.put(filenumber, event_log)
+
+    store.shard("1")
+    store.shard("2")
+    store.shard("1")
+    store.shard("3")
+
+    assert list(store.cache) == ["1", "3"]
+    assert store["2"] == baseline_graph
+    assert list(store.cache) == ["3", "2"]
+
+    store.graph("1")
+    store.graph("2")
+    first = store.graph("1")
+    store.graph("3")
+
+    assert list(store.graphs) == ["1", "3"]
+    assert store.graph("1") is first
+
+def test_put_replaces_decoded_graph(tmp_path, event_log):
+    store = GS.GraphStore(str(tmp_path))
+    store.put("1", event_log)
+    store.shard("1")
+    store.put("1", None)
+
+    assert "1" not in store.cache
+    with pytest.raises(KeyError):
+        store.shard("1")
+
+def test_remove_and_clear_delete_shards(tmp_path, event_log):
+    store = GS.GraphStore(str(tmp_path))
+    for filenumber in ["1", "2"]:
+        store.put(filenumber, event_log)
+    open(GS.shard_file(str(tmp_path), "3") + ".tmp", "wb").close()
+
+    store.remove("1")
+
+    assert not os.path.exists(GS.shard_file(str(tmp_path), "1"))
+    assert list(store) == ["2"]
+
+    store.clear()
+
+    assert sorted(os.listdir(tmp_path)) == [GS.MANIFEST]
+    assert len(GS.GraphStore(str(tmp_path))) == 0
+
+def test_import_graphs_of_single_file(tmp_path, baseline_graph):
+    filename = str(tmp_path / "Graphs.pkl")
+    with open(filename, "wb") as bin_file:
+        pickle.dump({"1": baseline_graph}, bin_file)
+        pickle.dump({"2": None}, bin_file)
+        # Record cut off by a stopped run.
+        bin_file.write(pickle.dumps({"3": baseline_graph})[:40])
+
+    store = GS.import_graphs(filename, str(tmp_path / "graphs"))
+
+    assert store.jitted() == {"1": True, "2": False}
+    assert store["1"] == baseline_graph
@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+import RunManifest as RM
+
+def test_record_is_resumed_until_file_changes(tmp_path):
+    output = tmp_path / "asciis" / "ascii_1.out"
+    output.parent.mkdir()
+    output.write_text("line\n")
+    RM.RunManifest(str(tmp_path)).record("1", "trace2ascii", [str(output)], "value")
+
+    manifest = RM.RunManifest(str(tmp_path), resume=True)
+
+    assert manifest.resumed
+    assert manifest.completed("1", "trace2ascii")["value"] == "value"
+    assert manifest.completed("1", "tracer") is None
+
+    output.write_text("line\nline\n")
+
+    assert manifest.completed("1", "trace2ascii") is None
+
+def test_read_only_manifest_is_not_written(tmp_path):
+    manifest = RM.RunManifest(str(tmp_path), resume=True, read_only=True)
+
+    assert not manifest.resumed
+    assert manifest.variants() == []
+    assert not os.path.exists(tmp_path / "etc")
+    with pytest.raises(AssertionError):
+        manifest.record("1", "tracer")
+
+def test_inspection_of_directory_without_manifest(tmp_path):
+    output = subprocess.run(
+        [sys.executable, RM.__file__, "-d", str(tmp_path)],
+        capture_output=True, text=True
+    )
+
+    assert output.returncode == 0, output.stderr
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,99 @@
+import os
+import gzip
+
+import numpy as np
+import pytest
+
+import TraceReader as TR
+
+@pytest.fixture
+def trace_file(tmp_path, trace_lines):
+    filename = str(tmp_path / "trace.out")
+    with open(filename, "w") as f:
+        f.writelines(trace_lines)
+    return filename
+
+def test_mapped_lines_equal_file_lines(trace_file, trace_lines):
+    trace = TR.MappedTrace(trace_file)
+
+    assert len(trace) == len(trace_lines)
+    assert list(trace) == trace_lines
+    assert list(trace.lines(10, 20)) == trace_lines[10:20]
+    assert list(trace.raw_lines(len(trace_lines) - 2)) == [line.encode() for line in trace_lines[-2:]]
+    assert trace[-1] == trace_lines[-1]
+    with pytest.raises(IndexError):
+        trace[len(trace_lines)]
+
+    offset = trace.find(trace_lines[5].encode())
+    assert trace.line_of(offset) == 5
+    assert trace.line_of(offset + 1) == 5
+    trace.close()
+
+def test_index_is_saved_and_reused(trace_file, monkeypatch):
+    TR.MappedTrace(trace_file).close()
+    offsets = np.load(trace_file + TR.INDEX_SUFFIX)
+
+    def build_line_index(mapped, size):
+        raise AssertionError("index is rebuilt")
+    monkeypatch.setattr(TR, "build_line_index", build_line_index)
+
+    assert np.array_equal(TR.MappedTrace(trace_file).offsets, offsets)
+
+def test_stale_index_is_rebuilt_after_append(trace_file, trace_lines):
+    TR.MappedTrace(trace_file).close()
+    with open(trace_file, "a") as f:
+        f.write("last line without newline")
+    # The index is as new as the trace, so only its last offset tells
+    # that it is stale.
+    index_time = os.path.getmtime(trace_file + TR.INDEX_SUFFIX)
+    os.utime(trace_file, (index_time, index_time))
+
+    trace = TR.MappedTrace(trace_file)
+
+    assert list(trace) == trace_lines + ["last line without newline"]
+    assert np.load(trace_file + TR.INDEX_SUFFIX)[-1] == os.path.getsize(trace_file)
+
+def test_stale_index_is_rebuilt_after_rewrite(trace_file, trace_lines):
+    TR.MappedTrace(trace_file).close()
+    # Same size, but the lines are split at other offsets.
+    text = "".join(trace_lines).replace("\n", " ")
+    lines = [text[:100] + "\n", text[101:-1] + "\n"]
+    with open(trace_file, "w") as f:
+        f.writelines(lines)
+    index_time = os.path.getmtime(trace_file + TR.INDEX_SUFFIX)
+    os.utime(trace_file, (index_time + 1, index_time + 1))
+
+    assert list(TR.MappedTrace(trace_file)) == lines
+
+def test_empty_trace(tmp_path):
+    filename = str(tmp_path / "empty.out")
+    open(filename, "w").close()
+
+    trace = TR.MappedTrace(filename)
+
+    assert len(trace) == 0
+    assert list(trace) == []
+    assert trace.find(b"\n") == -1
+    trace.close()
+
+def test_compressed_trace_is_streamed(tmp_path, trace_lines):
+    filename = str(tmp_path / "trace.out.gz")
+    with gzip.open(filename, "wt") as f:
+        f.writelines(trace_lines)
+
+    trace = TR.open_trace(filename)
+
+    assert isinstance(trace, TR.TraceSource)
+    assert list(trace) == trace_lines
+    assert list(trace.lines(10, 20)) == trace_lines[10:20]
+    trace.close()
+
+def test_list_lines_are_not_copied(trace_lines):
+    lines = TR.get_lines(trace_lines, 10, 20)
+    # A copy of the range would not see the changed line.
+    trace_lines[10] = "changed\n"
+
+    assert list(lines) == trace_lines[10:20]
+    assert list(TR.get_lines(trace_lines, 450)) == trace_lines[450:]
+    assert list(TR.get_lines(trace_lines, 450, 1000)) == trace_lines[450:]
+    assert list(TR.get_lines(trace_lines, 1000)) == []
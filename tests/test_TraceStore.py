@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+import FunctionLists as FL
+import InstructionParser as IP
+import TraceReader as TR
+import TraceStore as TS
+
+# Lines that cannot be rebuilt from the columns and are kept as RAW.
+RAW_LINES = [
+    "77;0xzz;d8;weird;;x; R: ;\n",
+    "78;0x10;d8;v8::internal::compiler::Node::New;48 89;mov rax,rbx; R:XMM0=" + "ab"*16 + " ;\n",
+]
+
+@pytest.fixture
+def trace_file(tmp_path, trace_lines):
+    filename = str(tmp_path / "trace.out")
+    with open(filename, "w") as f:
+        f.writelines(trace_lines + RAW_LINES)
+    return filename
+
+def test_store_rebuilds_parsed_lines(trace_file):
+    with open(trace_file) as f:
+        lines = f.readlines()
+
+    store = TS.TraceStore(TS.convert_trace(trace_file))
+
+    assert len(store) == len(lines)
+    assert store.flags[-len(RAW_LINES):].tolist() == [TS.RAW] * len(RAW_LINES)
+    assert list(store)[-len(RAW_LINES):] == RAW_LINES
+    for row, line in enumerate(lines):
+        assert store.instruction(row).to_list() == IP.instruction_splitter(line).to_list()
+    assert list(store.lines(3, 6)) == [store[row] for row in range(3, 6)]
+    with pytest.raises(IndexError):
+        store[len(lines)]
+
+def test_select_matches_parsed_lines(trace_file, phase_scopes):
+    with open(trace_file) as f:
+        lines = f.readlines()
+    scopes = phase_scopes["GraphBuilderPhase"]
+    in_scope = lambda row: any(scopes[i] < row < scopes[i+1] for i in range(0, len(scopes)-1, 2))
+
+    store = TS.TraceStore(TS.convert_trace(trace_file))
+    selected = store.select(functions=[FL.NEW_STR], scopes=scopes)
+
+    assert selected.tolist() == [
+        row for row, line in enumerate(lines)
+        if IP.instruction_splitter(line).function == FL.NEW_STR and in_scope(row)
+    ]
+    assert len(selected) > 0
+    assert store.select(functions=[FL.NEW_STR])[-1] == len(lines) - 1
+    assert store.select(functions=[FL.NEW_STR], program="no such program").size == 0
+
+def test_stale_store_is_not_opened(trace_file):
+    TS.convert_trace(trace_file)
+
+    assert TS.is_fresh(trace_file)
+    assert isinstance(TR.open_trace(trace_file), TS.TraceStore)
+
+    with open(trace_file, "a") as f:
+        f.write(RAW_LINES[0])
+
+    assert not TS.is_fresh(trace_file)
+    assert TS.open_store(trace_file) is None
+    assert isinstance(TR.open_trace(trace_file), TR.MappedTrace)
+    # The store directory is still opened when it is given directly.
+    assert isinstance(TS.open_store(TS.store_path(trace_file)), TS.TraceStore)
+
+def test_conversion_replaces_store(trace_file):
+    store_dir = TS.convert_trace(trace_file)
+    os.makedirs(store_dir + ".tmp")
+    with open(trace_file, "w") as f:
+        f.writelines(RAW_LINES)
+
+    TS.convert_trace(trace_file)
+
+    assert not os.path.exists(store_dir + ".tmp")
+    assert list(TS.TraceStore(store_dir)) == RAW_LINES
+
+def test_empty_trace(tmp_path):
+    filename = str(tmp_path / "empty.out")
+    open(filename, "w").close()
+
+    store = TS.TraceStore(TS.convert_trace(filename))
+
+    assert len(store) == 0
+    assert list(store) == []
+    assert store.select(functions=[FL.NEW_STR]).size == 0